@@ -0,0 +1,175 @@
+# Sensibilités adjointes (mode inverse) aux noeuds des courbes et aux cotations
+import numpy as np
+
+from core.bootstrap import hermite_basis, pchip_edge_slope, pchip_interior_slope
+
+
+def pchip_slope_jacobian(x, y) -> tuple:
+    """
+    Pentes PCHIP aux noeuds (mêmes formules que scipy) et leur jacobienne
+    par rapport aux valeurs des noeuds.
+
+    :return: (d, D) avec d (n,) les pentes et D (n, n), D[k, i] = dd_k / dy_i
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    h = np.diff(x).tolist()
+    m = (np.diff(y) / np.diff(x)).tolist()
+    d = np.zeros(n)
+    D = np.zeros((n, n))
+
+    def add(row, k, coef):
+        # coef * dm_k/dy, avec m_k = (y_{k+1} - y_k) / h_k
+        D[row, k] -= coef / h[k]
+        D[row, k + 1] += coef / h[k]
+
+    if n == 2:
+        # 2 points : interpolation linéaire
+        d[:] = m[0]
+        add(0, 0, 1.0)
+        add(1, 0, 1.0)
+        return d, D
+
+    d[0], g0, g1 = pchip_edge_slope(h[0], h[1], m[0], m[1])
+    add(0, 0, g0)
+    add(0, 1, g1)
+    for k in range(1, n - 1):
+        d[k], g_prev, g_next = pchip_interior_slope(h[k - 1], h[k], m[k - 1], m[k])
+        add(k, k - 1, g_prev)
+        add(k, k, g_next)
+    d[-1], g_last, g_prev = pchip_edge_slope(h[-1], h[-2], m[-1], m[-2])
+    add(n - 1, n - 2, g_last)
+    add(n - 1, n - 3, g_prev)
+    return d, D
+
+
+def _hermite_weights(x, t) -> tuple:
+    # intervalle de chaque date et poids (h00, h10*h, h01, h11*h) de r(t) en (y_j, d_j, y_j+1, d_j+1)
+    h = np.diff(x)
+    j = np.clip(np.searchsorted(x, t, side="right") - 1, 0, len(x) - 2)
+    hj = h[j]
+    b00, b10, b01, b11 = hermite_basis((t - x[j]) / hj)
+    return j, (b00, b10 * hj, b01, b11 * hj)
+
+
+def _node_adjoint(idx, weights, bar_r, size) -> tuple:
+    # cumule bar_r sur (y, d) aux indices idx (intervalle) et idx + 1
+    b00, b10, b01, b11 = weights
+    bar_y = np.bincount(idx, bar_r * b00, size) + np.bincount(idx + 1, bar_r * b01, size)
+    bar_d = np.bincount(idx, bar_r * b10, size) + np.bincount(idx + 1, bar_r * b11, size)
+    return bar_y, bar_d
+
+
+def pchip_rate_adjoint(x, y, t, bar_r) -> np.ndarray:
+    """
+    Passe inverse de r(t) = PCHIP(x, y)(t) avec extrapolation plate
+    (comme ZeroCouponCurve.get_zero_rate) : renvoie bar_y = sum_k bar_r_k dr(t_k)/dy.
+
+    Coût O(nb de dates + n^2) : les adjoints sont cumulés par intervalle
+    (poids d'Hermite) puis remontés aux noeuds par la jacobienne des pentes.
+
+    :param t: Dates (..., P)
+    :param bar_r: Adjoints des taux aux dates, même forme que t
+    :return: Adjoints des noeuds (..., n) ; la somme porte sur le dernier axe
+    """
+    x = np.asarray(x, dtype=float)
+    t = np.asarray(t, dtype=float)
+    bar_r = np.broadcast_to(np.asarray(bar_r, dtype=float), t.shape)
+    n = len(x)
+
+    lead = t.shape[:-1]
+    n_rows = int(np.prod(lead)) if lead else 1
+    tt = t.reshape(n_rows, -1)
+    br = bar_r.reshape(n_rows, -1)
+
+    left = tt <= x[0]
+    right = (tt >= x[-1]) & ~left
+    inside = ~left & ~right
+
+    j, weights = _hermite_weights(x, tt)
+    idx = (np.arange(n_rows)[:, None] * n + j).ravel()
+    bar_y, bar_d = _node_adjoint(idx, [w.ravel() for w in weights], np.where(inside, br, 0.0).ravel(), n_rows * n)
+    bar_y = bar_y.reshape(n_rows, n)
+
+    # extrapolation plate : tout l'adjoint va au premier / dernier noeud
+    bar_y[:, 0] += np.sum(np.where(left, br, 0.0), axis=1)
+    bar_y[:, -1] += np.sum(np.where(right, br, 0.0), axis=1)
+
+    _, D = pchip_slope_jacobian(x, y)
+    bar_y += bar_d.reshape(n_rows, n) @ D
+    return bar_y.reshape(lead + (n,))
+
+
+def discount_factor_adjoint(curve, t, bar_df) -> np.ndarray:
+    """
+    Passe inverse de DF(t) = exp(-r(t) t) : renvoie bar_y (..., n_noeuds).
+    En mode tabulé, le gradient est celui de la spline exacte.
+
+    :param curve: ZeroCouponCurve
+    :param t: Dates (..., P)
+    :param bar_df: Adjoints des facteurs d'actualisation
+    """
+    t = np.asarray(t, dtype=float)
+    df = np.exp(-curve.get_zero_rate(t) * t)
+    return pchip_rate_adjoint(curve.times, curve.rates, t, -np.asarray(bar_df) * t * df)
+
+
+def ois_quote_jacobian(market_quotes: dict, x, y) -> np.ndarray:
+    """
+    Jacobienne dy/dq du bootstrap OIS (noeuds x cotations triées par maturité).
+
+    Le pilier k est résolu sur la courbe tronquée aux noeuds 0..k :
+    F_k(y_0..y_k, q_k) = 1 - DF(T_k) - q_k (sum_c DF(c) + stub DF(T_k)) = 0,
+    d'où, par le théorème des fonctions implicites, pilier après pilier :
+    dy_k/dq = -(sum_{j<k} dF_k/dy_j dy_j/dq + dF_k/dq) / (dF_k/dy_k).
+    Le noeud t=0 vaut la première cotation.
+
+    :param market_quotes: Cotations {Maturité: Taux fixe}
+    :param x: Dates des noeuds de la courbe bootstrappée (0, T_1, ..., T_K)
+    :param y: Taux zéro aux noeuds
+    :return: Matrice (K+1, K)
+    """
+    maturities = sorted(market_quotes)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    J = np.zeros((len(maturities) + 1, len(maturities)))
+    J[0, 0] = 1.0
+
+    for k, T in enumerate(maturities, start=1):
+        q = market_quotes[T]
+        stub = T % 1
+        xk, yk = x[:k + 1], y[:k + 1]
+        t = np.append(np.arange(1, int(T) + 1, dtype=float), T)
+
+        # spline tronquée : toutes les dates sont dans [0, T_k]
+        d, D = pchip_slope_jacobian(xk, yk)
+        j, weights = _hermite_weights(xk, t)
+        b00, b10, b01, b11 = weights
+        df = np.exp(-(b00 * yk[j] + b10 * d[j] + b01 * yk[j + 1] + b11 * d[j + 1]) * t)
+        annuity = np.sum(df[:-1]) + stub * df[-1]
+
+        # dF/dDF : -q par coupon, -(1 + q * stub) à maturité
+        bar_df = np.full(len(t), -q)
+        bar_df[-1] = -1.0 - q * stub
+        dF_dy, dF_dd = _node_adjoint(j, weights, -bar_df * t * df, k + 1)
+        dF_dy += dF_dd @ D
+
+        rhs = dF_dy[:k] @ J[:k]
+        rhs[k - 1] -= annuity
+        J[k] = -rhs / dF_dy[k]
+    return J
+
+
+def quote_gradient(curve, node_gradient) -> np.ndarray:
+    """
+    Gradient par rapport aux cotations du bootstrap : dPV/dq = dPV/dy @ dy/dq,
+    avec la jacobienne stockée sur la courbe au bootstrap.
+
+    :param curve: ZeroCouponCurve issue de bootstrap_ois_curve
+    :param node_gradient: Gradient aux noeuds (..., n_noeuds)
+    :return: Gradient (..., n_cotations), cotations triées par maturité
+    """
+    if curve.quote_jacobian is None:
+        raise ValueError(f"la courbe {curve.name} n'est pas issue d'un bootstrap OIS")
+    return np.asarray(node_gradient) @ curve.quote_jacobian
@@ -0,0 +1,215 @@
+# Moteur de bootstrapping rapide des courbes OIS
+import math
+import time
+
+from scipy.optimize import brentq
+
+
+def _sign(x: float) -> int:
+    # meme convention que np.sign (sign(0) = 0)
+    return (x > 0) - (x < 0)
+
+
+def pchip_edge_slope(h0: float, h1: float, m0: float, m1: float):
+    """
+    Pente PCHIP à une extrémité (formule à 3 points de scipy) et ses dérivées.
+
+    :return: (d, dd/dm0, dd/dm1)
+    """
+    d = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    if _sign(d) != _sign(m0):
+        return 0.0, 0.0, 0.0
+    if _sign(m0) != _sign(m1) and abs(d) > 3.0 * abs(m0):
+        return 3.0 * m0, 3.0, 0.0
+    return d, (2 * h0 + h1) / (h0 + h1), -h0 / (h0 + h1)
+
+
+def pchip_interior_slope(h_prev: float, h_next: float, m_prev: float, m_next: float):
+    """
+    Pente PCHIP à un noeud intérieur (moyenne harmonique pondérée) et ses dérivées.
+
+    :return: (d, dd/dm_prev, dd/dm_next)
+    """
+    if m_prev == 0 or m_next == 0 or _sign(m_prev) != _sign(m_next):
+        return 0.0, 0.0, 0.0
+    w1 = 2 * h_next + h_prev
+    w2 = h_next + 2 * h_prev
+    d = (w1 + w2) / (w1 / m_prev + w2 / m_next)
+    k = d * d / (w1 + w2)
+    return d, k * w1 / (m_prev * m_prev), k * w2 / (m_next * m_next)
+
+
+def hermite_basis(s: float):
+    # base d'Hermite cubique sur [0, 1] : (h00, h10, h01, h11)
+    s2 = s * s
+    s3 = s2 * s
+    return 2 * s3 - 3 * s2 + 1, s3 - 2 * s2 + s, -2 * s3 + 3 * s2, s3 - s2
+
+
+class OISBootstrapper:
+    """
+    Bootstrapping OIS pilier par pilier sans reconstruire de spline PCHIP.
+
+    Ajouter un pilier T_n ne modifie la spline que sur les deux derniers
+    intervalles (pentes aux noeuds n-1 et n, plus le noeud 0 tant que la
+    courbe n'a que 3 points). Les coupons antérieurs sont donc actualisés
+    une seule fois et cumulés ; seuls les coupons des derniers intervalles
+    sont réévalués à chaque itération de Newton, avec une dérivée
+    analytique. Le solveur borné (brentq) sert de repli si Newton échoue.
+
+    Le résultat est identique (à la tolérance près) à l'ancienne méthode
+    qui reconstruisait une ZeroCouponCurve temporaire à chaque évaluation.
+    """
+
+    def __init__(self, tol: float = 1e-10, max_iter: int = 20, bracket: tuple = (-0.05, 0.15)):
+        """
+        :param tol: Tolérance sur le pas de Newton (en taux)
+        :param max_iter: Nombre maximal d'itérations de Newton par pilier
+        :param bracket: Intervalle de recherche du solveur de repli
+        """
+        self.tol = tol
+        self.max_iter = max_iter
+        self.bracket = bracket
+
+    def bootstrap(self, market_quotes: dict):
+        """
+        Résout les taux zéro aux piliers.
+
+        :param market_quotes: Dictionnaire {Maturité (années): Taux Fixe du Swap}
+        :return: (dates, taux zéro, rapport) où le rapport est un dict
+                 avec les itérations par pilier, les replis et le temps écoulé
+        """
+        start = time.perf_counter()
+        sorted_maturities = sorted(market_quotes.keys())
+
+        # Point initial t=0 (même convention que ZeroCouponCurve.bootstrap_ois_curve)
+        x = [0.0]
+        y = [float(market_quotes[sorted_maturities[0]])]
+
+        iterations = []
+        fallbacks = []
+        fixed_sum = 0.0   # somme des DF des coupons sur les intervalles définitifs
+        next_coupon = 1   # prochain coupon annuel pas encore dans fixed_sum
+
+        for n, T in enumerate(sorted_maturities, start=1):
+            T = float(T)
+            q = float(market_quotes[T])
+            frac = T % 1
+            n_coupons = int(T)
+
+            x.append(T)
+            h_last = T - x[n - 1]
+            y_prev = y[n - 1]
+
+            # Pentes fixes nécessaires aux intervalles variables
+            if n >= 2:
+                h_prev = x[n - 1] - x[n - 2]
+                m_prev = (y[n - 1] - y[n - 2]) / h_prev
+            if n >= 3:
+                # pente au noeud n-2, devenue intérieure et définitive
+                h_prev2 = x[n - 2] - x[n - 3]
+                m_prev2 = (y[n - 2] - y[n - 3]) / h_prev2
+                d_fixed = pchip_interior_slope(h_prev2, h_prev, m_prev2, m_prev)[0]
+
+            # Coupons dont la valeur dépend du taux au pilier T :
+            # (interval, t, h00, h10*h, h01, h11*h) pour t dans ]x_{n-2}, T[
+            first_var = max(n - 2, 0)
+            var_coupons = []
+            k = next_coupon
+            while k <= n_coupons and k < T:
+                j = first_var if k <= x[first_var + 1] else n - 1
+                h = x[j + 1] - x[j]
+                b00, b10, b01, b11 = hermite_basis((k - x[j]) / h)
+                var_coupons.append((j, float(k), b00, b10 * h, b01, b11 * h))
+                k += 1
+            # coupon tombant exactement sur T : DF(T) = exp(-z T)
+            n_at_T = 1 if n_coupons >= 1 and n_coupons == T else 0
+            stub = frac if frac > 0 else 0.0
+
+            def evaluate(z):
+                m_last = (z - y_prev) / h_last
+                if n == 1:
+                    # 2 points : interpolation linéaire
+                    d_nm1, dd_nm1 = m_last, 1.0 / h_last
+                    d_n, dd_n = m_last, 1.0 / h_last
+                else:
+                    d_nm1, _, g = pchip_interior_slope(h_prev, h_last, m_prev, m_last)
+                    dd_nm1 = g / h_last
+                    d_n, g, _ = pchip_edge_slope(h_last, h_prev, m_last, m_prev)
+                    dd_n = g / h_last
+                    if n == 2:
+                        # le noeud 0 est une extrémité dont la pente dépend de m_1
+                        d_first, _, g = pchip_edge_slope(h_prev, h_last, m_prev, m_last)
+                        dd_first = g / h_last
+                    else:
+                        d_first, dd_first = d_fixed, 0.0
+
+                df_T = math.exp(-z * T)
+                s_var = 0.0
+                ds_var = 0.0
+                for j, t, b00, b10, b01, b11 in var_coupons:
+                    if j == n - 1:
+                        r = b00 * y_prev + b10 * d_nm1 + b01 * z + b11 * d_n
+                        dr = b10 * dd_nm1 + b01 + b11 * dd_n
+                    else:
+                        r = b00 * y[j] + b10 * d_first + b01 * y_prev + b11 * d_nm1
+                        dr = b10 * dd_first + b11 * dd_nm1
+                    df = math.exp(-r * t)
+                    s_var += df
+                    ds_var -= t * df * dr
+
+                annuity = fixed_sum + s_var + (n_at_T + stub) * df_T
+                d_annuity = ds_var - (n_at_T + stub) * T * df_T
+                f = 1.0 - df_T - q * annuity
+                fp = T * df_T - q * d_annuity
+                return f, fp
+
+            # Newton depuis le dernier taux résolu, décalé du mouvement de la cotation
+            z = y_prev + (q - q_prev) if n > 1 else q
+            converged = False
+            it = 0
+            for it in range(1, self.max_iter + 1):
+                f, fp = evaluate(z)
+                if fp == 0 or not math.isfinite(f):
+                    break
+                step = f / fp
+                z -= step
+                if not math.isfinite(z):
+                    break
+                if abs(step) < self.tol:
+                    converged = True
+                    break
+
+            if not converged or not (self.bracket[0] <= z <= self.bracket[1]):
+                fallbacks.append(T)
+                try:
+                    z = brentq(lambda g: evaluate(g)[0], *self.bracket)
+                except ValueError:
+                    # même valeur par défaut que l'ancien solveur
+                    z = q
+
+            iterations.append(it)
+            y.append(z)
+            q_prev = q
+
+            # L'intervalle n-2 est désormais figé : ses coupons passent dans la somme fixe
+            if n >= 2:
+                d_lo = pchip_edge_slope(h_prev, h_last, m_prev, (z - y_prev) / h_last)[0] if n == 2 else d_fixed
+                d_hi = pchip_interior_slope(h_prev, h_last, m_prev, (z - y_prev) / h_last)[0]
+                k = next_coupon
+                while k <= x[n - 1] and k <= n_coupons:
+                    b00, b10, b01, b11 = hermite_basis((k - x[n - 2]) / h_prev)
+                    r = b00 * y[n - 2] + b10 * h_prev * d_lo + b01 * y[n - 1] + b11 * h_prev * d_hi
+                    fixed_sum += math.exp(-r * k)
+                    k += 1
+                next_coupon = k
+
+        report = {
+            "method": "newton",
+            "n_pillars": len(sorted_maturities),
+            "iterations": iterations,
+            "total_iterations": sum(iterations),
+            "fallbacks": fallbacks,
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+        return x, y, report
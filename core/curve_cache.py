@@ -0,0 +1,76 @@
+# Cache des courbes construites, partagé par toutes les pages et tous les pricers
+import hashlib
+
+from core.curves import ZeroCouponCurve
+from core.utils import LRUCache
+
+
+def _quotes_key(kind: str, points: dict, curve_name: str, settings: dict) -> str:
+    """
+    Empreinte du contenu d'une courbe : (type, points, nom, paramètres d'interpolation).
+    Deux jeux de cotations identiques donnent la même clé, quel que soit l'ordre du dict.
+    """
+    items = tuple(sorted((float(t), float(r)) for t, r in points.items()))
+    payload = repr((kind, items, curve_name, tuple(sorted(settings.items()))))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CurveCache(LRUCache):
+    """
+    Cache LRU de ZeroCouponCurve adressé par le contenu des cotations.
+
+    Streamlit ré-exécute le script d'une page à chaque interaction : la
+    courbe n'est bootstrappée que si ses cotations (ou son nom, ou ses
+    paramètres) ont changé. Les courbes renvoyées sont partagées et ne
+    doivent pas être modifiées.
+    """
+
+    def get_ois_curve(self, market_quotes: dict, curve_name: str = "OIS_Bootstrapped", method: str = "newton",
+                      tabulation_step: float = None) -> ZeroCouponCurve:
+        """
+        Courbe OIS bootstrappée à partir des cotations de swaps.
+
+        :param market_quotes: Dictionnaire {Maturité (années): Taux Fixe du Swap}
+        :param curve_name: Nom de la courbe
+        :param method: Méthode de bootstrap (voir ZeroCouponCurve.bootstrap_ois_curve)
+        :param tabulation_step: Pas du mode tabulé (None = spline exacte)
+        """
+        settings = {"interpolation": "pchip", "method": method, "tabulation_step": tabulation_step}
+        key = _quotes_key("ois_bootstrap", market_quotes, curve_name, settings)
+
+        def build():
+            curve = ZeroCouponCurve.bootstrap_ois_curve(market_quotes, curve_name, method=method)
+            if tabulation_step is not None:
+                curve.tabulate(tabulation_step)
+            return curve
+
+        return self.get_or_build(key, build)
+
+    def get_zero_curve(self, zero_rates: dict, curve_name: str = "OIS", tabulation_step: float = None) -> ZeroCouponCurve:
+        """
+        Courbe construite directement à partir de taux zéro (ex: proxy IBOR).
+
+        :param zero_rates: Dictionnaire {Maturité (années): Taux zéro}
+        :param curve_name: Nom de la courbe
+        :param tabulation_step: Pas du mode tabulé (None = spline exacte)
+        """
+        settings = {"interpolation": "pchip", "tabulation_step": tabulation_step}
+        key = _quotes_key("zero", zero_rates, curve_name, settings)
+        return self.get_or_build(
+            key,
+            lambda: ZeroCouponCurve(list(zero_rates.keys()), list(zero_rates.values()), curve_name,
+                                    tabulation_step=tabulation_step)
+        )
+
+
+# Instance partagée par tout le processus (survit aux reruns Streamlit)
+curve_cache = CurveCache()
+
+
+def get_ois_curve(market_quotes: dict, curve_name: str = "OIS_Bootstrapped", method: str = "newton",
+                  tabulation_step: float = None) -> ZeroCouponCurve:
+    return curve_cache.get_ois_curve(market_quotes, curve_name, method, tabulation_step)
+
+
+def get_zero_curve(zero_rates: dict, curve_name: str = "OIS", tabulation_step: float = None) -> ZeroCouponCurve:
+    return curve_cache.get_zero_curve(zero_rates, curve_name, tabulation_step)
@@ -1,8 +1,15 @@
 # Construction et interpolation des courbes
+import hashlib
+import math
+import time
+
 import numpy as np
 from scipy.interpolate import PchipInterpolator
 from scipy.optimize import brentq
 
+from core.adjoint import ois_quote_jacobian
+from core.bootstrap import OISBootstrapper
+
 class ZeroCouponCurve:
     """
     Classe représentant une courbe de taux Zéro-Coupon.
@@ -10,13 +17,14 @@ class ZeroCouponCurve:
     conformément aux spécifications techniques.
     """
     
-    def __init__(self, dates_in_years: list, zero_rates: list, curve_name: str = "OIS"):
+    def __init__(self, dates_in_years: list, zero_rates: list, curve_name: str = "OIS", tabulation_step: float = None):
         """
         Initialise la courbe avec des maturités et des taux zéro-coupon.
         
         :param dates_in_years: Liste des maturités en années (ex: [0.5, 1.0, 2.0])
         :param zero_rates: Liste des taux zéro-coupon correspondants (ex: [0.03, 0.035, ...])
         :param curve_name: Nom de la courbe (ex: "EUR-OIS-ESTR" ou "EUR-IBOR-3M")
+        :param tabulation_step: Si renseigné, active le mode tabulé (voir tabulate)
         """
         # Tri des données par date pour assurer la cohérence de l'interpolation
         sorted_indices = np.argsort(dates_in_years)
@@ -28,66 +36,222 @@ class ZeroCouponCurve:
         # PCHIP = Piecewise Cubic Hermite Interpolating Polynomial
         self.interpolator = PchipInterpolator(self.times, self.rates)
 
-    def get_zero_rate(self, t: float) -> float:
+        # Rapport du bootstrap (itérations, temps) si la courbe en est issue
+        self.bootstrap_report = None
+
+        # Cotations du bootstrap et jacobienne dy/dq aux noeuds (voir core.adjoint, calculée au premier accès)
+        self.market_quotes = None
+        self._quote_jacobian = None
+        # Dernier bootstrap exact (cotations, taux) dont partent les mises à jour incrémentales
+        self._anchor = None
+
+        # Mode tabulé (désactivé par défaut)
+        self.tabulation_step = None
+        self.tabulation_error = None
+        self._tab_log_df = None
+        if tabulation_step is not None:
+            self.tabulate(tabulation_step)
+
+    def fingerprint(self) -> str:
+        """
+        Empreinte du contenu de la courbe (noeuds, nom, mode tabulé).
+        Sert de clé aux caches des moteurs construits sur une courbe (arbres, ...).
+        """
+        payload = self.times.tobytes() + self.rates.tobytes() + repr((self.name, self.tabulation_step)).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()
+
+    def tabulate(self, step: float = 1 / 365, t_max: float = None) -> float:
+        """
+        Active le mode tabulé : la spline est évaluée une fois sur une grille
+        dense, puis les facteurs d'actualisation sont obtenus par lecture
+        indexée O(1) et interpolation linéaire de log DF.
+        Pensé pour les pricers Monte Carlo / arbres qui interrogent la
+        courbe des milliers de fois.
+        
+        :param step: Pas de la grille en années (par défaut : quotidien)
+        :param t_max: Fin de la grille (par défaut : dernier pilier)
+        :return: Écart maximal |DF tabulé - DF exact| (aux milieux de la grille)
+        """
+        if step <= 0:
+            raise ValueError(f"pas de tabulation invalide: {step}")
+        if t_max is None:
+            t_max = float(self.times[-1])
+
+        n_steps = max(int(math.ceil(t_max / step)), 1)
+        grid = np.arange(n_steps + 1) * step
+        log_df = -self.get_zero_rate(grid) * grid
+
+        # Écart maximal à la spline exacte, mesuré aux milieux des mailles
+        # (là où l'interpolation linéaire de log DF s'en éloigne le plus)
+        mid = grid[:-1] + 0.5 * step
+        df_exact = np.exp(-self.get_zero_rate(mid) * mid)
+        df_tab = np.exp(0.5 * (log_df[:-1] + log_df[1:]))
+
+        self.use_tabulation(log_df, step, float(np.max(np.abs(df_tab - df_exact))))
+        return self.tabulation_error
+
+    def use_tabulation(self, log_df: np.ndarray, step: float, error: float = None):
+        """
+        Active le mode tabulé à partir d'une table log DF déjà calculée
+        (ex: table publiée en mémoire partagée par un autre processus).
+        
+        :param log_df: log DF aux dates 0, step, 2*step, ...
+        :param step: Pas de la grille en années
+        :param error: Écart maximal mesuré lors de la tabulation
+        """
+        self._tab_log_df = log_df
+        self._tab_log_df_list = log_df.tolist()  # lecture scalaire plus rapide qu'un tableau
+        self._tab_inv_step = 1.0 / step
+        self._tab_last = len(log_df) - 1
+        self.tabulation_step = step
+        self.tabulation_error = error
+
+    def disable_tabulation(self):
+        """Revient aux requêtes exactes sur la spline."""
+        self.tabulation_step = None
+        self.tabulation_error = None
+        self._tab_log_df = None
+        self._tab_log_df_list = None
+
+    def _exact_discount_factor(self, t):
+        if np.ndim(t) == 0:
+            if t == 0:
+                return 1.0
+            return np.exp(-self.get_zero_rate(t) * t)
+        r = self.get_zero_rate(t)
+        return np.where(t == 0, 1.0, np.exp(-r * t))
+
+    def _tabulated_discount_factor(self, t):
+        if np.ndim(t) == 0:
+            u = t * self._tab_inv_step
+            if 0 <= u < self._tab_last:
+                log_df = self._tab_log_df_list
+                i = int(u)
+                w = u - i
+                return math.exp((1.0 - w) * log_df[i] + w * log_df[i + 1])
+            # hors grille : formule exacte (extrapolation plate au-delà du dernier pilier)
+            return self._exact_discount_factor(t)
+
+        log_df = self._tab_log_df
+        t = np.asarray(t, dtype=float)
+        u = t * self._tab_inv_step
+        inside = (u >= 0) & (u < self._tab_last)
+        i = np.clip(u, 0, self._tab_last - 1).astype(int)
+        w = u - i
+        df = np.exp((1.0 - w) * log_df[i] + w * log_df[i + 1])
+        if not inside.all():
+            df[~inside] = self._exact_discount_factor(t[~inside])
+        return df
+
+    def get_zero_rate(self, t):
         """
         Récupère le taux zéro-coupon interpolé à la date t.
+        Accepte un scalaire ou un tableau NumPy de maturités : dans ce cas
+        tout l'échéancier est évalué en un seul appel à l'interpolateur.
         
-        :param t: Maturité en années
-        :return: Taux zéro-coupon interpolé
-        """
-        # Gestion des cas limites (extrapolation plate si t < min ou t > max)
-        if t <= self.times[0]:
-            return self.rates[0]
-        if t >= self.times[-1]:
-            return self.rates[-1]
-            
-        return float(self.interpolator(t))
+        :param t: Maturité en années (float ou np.ndarray)
+        :return: Taux zéro-coupon interpolé (float ou np.ndarray de même forme)
+        """
+        if np.ndim(t) == 0:
+            # Gestion des cas limites (extrapolation plate si t < min ou t > max)
+            if t <= self.times[0]:
+                return self.rates[0]
+            if t >= self.times[-1]:
+                return self.rates[-1]
+                
+            return float(self.interpolator(t))
+
+        # Version vectorisée : masques d'extrapolation plate élément par élément
+        t = np.asarray(t, dtype=float)
+        t_clipped = np.clip(t, self.times[0], self.times[-1])
+        rates = self.interpolator(t_clipped)
+        rates = np.where(t <= self.times[0], self.rates[0], rates)
+        rates = np.where(t >= self.times[-1], self.rates[-1], rates)
+        return rates
 
-    def get_discount_factor(self, t: float) -> float:
+    def get_discount_factor(self, t):
         """
         Calcule le facteur d'actualisation DF(t) = exp(-r * t).
         C'est la méthode principale utilisée par les Pricers.
         
-        :param t: Maturité en années
-        :return: Facteur d'actualisation
+        :param t: Maturité en années (float ou np.ndarray)
+        :return: Facteur d'actualisation (float ou np.ndarray de même forme)
         """
-        # Si t=0, le facteur d'actualisation est 1.0
-        if t == 0:
-            return 1.0
-            
+        if self._tab_log_df is not None:
+            return self._tabulated_discount_factor(t)
+
+        if np.ndim(t) == 0:
+            # Si t=0, le facteur d'actualisation est 1.0
+            if t == 0:
+                return 1.0
+                
+            r = self.get_zero_rate(t)
+            return np.exp(-r * t)
+
+        t = np.asarray(t, dtype=float)
         r = self.get_zero_rate(t)
-        return np.exp(-r * t)
+        return np.where(t == 0, 1.0, np.exp(-r * t))
 
-    def get_forward_rate(self, t1: float, t2: float) -> float:
+    def get_forward_rate(self, t1, t2):
         """
         Calcule le taux forward implicite entre t1 et t2.
         Utile pour la courbe de projection (IBOR).
+        t1 et t2 peuvent être des tableaux NumPy (diffusés l'un contre l'autre).
         
         :param t1: Date de début
         :param t2: Date de fin
         :return: Taux forward annualisé
         """
-        if t1 == t2:
-            return self.get_zero_rate(t1)
-        
+        if np.ndim(t1) == 0 and np.ndim(t2) == 0:
+            if t1 == t2:
+                return self.get_zero_rate(t1)
+            
+            df1 = self.get_discount_factor(t1)
+            df2 = self.get_discount_factor(t2)
+            
+            # Formule : DF(t2) = DF(t1) * exp(-fwd * (t2-t1))
+            # Donc fwd = -ln(DF2/DF1) / (t2-t1)
+            dt = t2 - t1
+            fwd = -np.log(df2 / df1) / dt
+            return fwd
+
+        t1, t2 = np.broadcast_arrays(np.asarray(t1, dtype=float), np.asarray(t2, dtype=float))
         df1 = self.get_discount_factor(t1)
         df2 = self.get_discount_factor(t2)
-        
-        # Formule : DF(t2) = DF(t1) * exp(-fwd * (t2-t1))
-        # Donc fwd = -ln(DF2/DF1) / (t2-t1)
         dt = t2 - t1
-        fwd = -np.log(df2 / df1) / dt
-        return fwd
+        same = dt == 0
+
+        # Cas t1 == t2 : on renvoie le taux zéro (comme la version scalaire)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fwd = -np.log(df2 / df1) / np.where(same, 1.0, dt)
+        return np.where(same, self.get_zero_rate(t1), fwd)
     
     @classmethod
-    def bootstrap_ois_curve(cls, market_quotes: dict, curve_name: str = "OIS_Bootstrapped"):
+    def bootstrap_ois_curve(cls, market_quotes: dict, curve_name: str = "OIS_Bootstrapped", method: str = "newton"):
         """
         Construit une courbe zéro-coupon par Bootstrapping à partir des cotations de Swaps OIS.
         
         :param market_quotes: Dictionnaire {Maturité (années): Taux Fixe du Swap}. 
                               Ex: {1.0: 0.03, 2.0: 0.035}
+        :param method: "newton" (moteur rapide OISBootstrapper, par défaut) ou
+                       "brentq" (solveur historique, une spline par évaluation)
         :return: Une instance de ZeroCouponCurve calibrée.
+                 Le rapport (itérations, temps) est dans curve.bootstrap_report.
         """
+        if method == "newton":
+            curve_dates, curve_rates, report = OISBootstrapper().bootstrap(market_quotes)
+            curve = cls(curve_dates, curve_rates, curve_name)
+            curve.bootstrap_report = report
+            curve._set_quotes(market_quotes)
+            return curve
+
+        if method != "brentq":
+            raise ValueError(f"methode de bootstrap inconnue: {method}")
+
+        start = time.perf_counter()
+        iterations = []
+        fallbacks = []
+
         # 1. On trie les instruments par maturité croissante
         sorted_maturities = sorted(market_quotes.keys())
         
@@ -134,17 +298,113 @@ class ZeroCouponCurve:
 
             # On utilise le solveur brentq pour trouver le taux qui annule la valeur du swap
             try:
-                calibrated_rate = brentq(objective_function, -0.05, 0.15) # Recherche entre -5% et 15%
+                calibrated_rate, result = brentq(objective_function, -0.05, 0.15, full_output=True) # Recherche entre -5% et 15%
+                iterations.append(result.iterations)
             except ValueError:
                 # Si le solveur échoue, on prend une valeur par défaut (fallback)
                 calibrated_rate = market_rate
+                iterations.append(0)
+                fallbacks.append(T)
 
             # 4. On valide ce point et on l'ajoute définitivement à la courbe en construction
             curve_dates.append(T)
             curve_rates.append(calibrated_rate)
             
         # 5. On retourne la courbe finale construite
-        return cls(curve_dates, curve_rates, curve_name)
+        curve = cls(curve_dates, curve_rates, curve_name)
+        curve.bootstrap_report = {
+            "method": "brentq",
+            "n_pillars": len(sorted_maturities),
+            "iterations": iterations,
+            "total_iterations": sum(iterations),
+            "fallbacks": fallbacks,
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+        curve._set_quotes(market_quotes)
+        return curve
+
+    def _set_quotes(self, market_quotes: dict):
+        # La courbe devient l'ancre des mises à jour ; la jacobienne n'est calculée qu'à la demande
+        self.market_quotes = dict(market_quotes)
+        self._anchor = (self.market_quotes, self.rates.copy())
+
+    @property
+    def quote_jacobian(self) -> np.ndarray:
+        """
+        Jacobienne dy/dq des taux aux noeuds par rapport aux cotations du
+        bootstrap d'ancrage (None si la courbe n'est pas bootstrappée).
+        Calculée au premier accès (update_quotes, quote_gradient, VaR par
+        chocs de cotations) : les bootstraps qui n'en ont pas besoin (cache,
+        bumps, re-bootstraps de scénarios) ne la paient pas. Son coût est
+        reporté dans bootstrap_report["jacobian_ms"].
+        """
+        if self._quote_jacobian is None and self._anchor is not None:
+            start = time.perf_counter()
+            anchor_quotes, anchor_rates = self._anchor
+            self._quote_jacobian = ois_quote_jacobian(anchor_quotes, self.times, anchor_rates)
+            if self.bootstrap_report is not None:
+                self.bootstrap_report["jacobian_ms"] = (time.perf_counter() - start) * 1000.0
+        return self._quote_jacobian
+
+    @quote_jacobian.setter
+    def quote_jacobian(self, jacobian):
+        self._quote_jacobian = jacobian
+
+    def _rebootstrap(self, quotes: dict, method: str) -> "ZeroCouponCurve":
+        # bootstrap complet qui garde le mode de la courbe courante (tabulée ou non)
+        curve = self.bootstrap_ois_curve(quotes, self.name, method)
+        if self.tabulation_step is not None:
+            curve.tabulate(self.tabulation_step)
+        return curve
+
+    def update_quotes(self, quotes: dict, max_quote_move: float = 2e-4, method: str = "newton") -> "ZeroCouponCurve":
+        """
+        Nouvelle courbe après un mouvement de cotations, au premier ordre :
+        y = y_ancre + J (q - q_ancre), un produit matrice-vecteur au lieu d'un
+        bootstrap complet. L'ancre est le dernier bootstrap exact, donc les
+        erreurs ne se cumulent pas d'un tick à l'autre.
+
+        Seuil d'exactitude : si une cotation s'écarte de plus de max_quote_move
+        de l'ancre (erreur de second ordre, ~1e-7 en taux pour 1bp sur les
+        cotations de test), si les maturités changent ou si le bootstrap
+        d'ancrage a eu des replis, la courbe est re-bootstrappée entièrement
+        (avec le même pas de tabulation) et devient la nouvelle ancre. Le
+        temps reporté inclut le calcul de la jacobienne s'il a lieu ici.
+
+        :param quotes: Nouvelles cotations {Maturité: Taux fixe} (toutes ou seulement celles qui bougent)
+        :param max_quote_move: Écart maximal à l'ancre toléré par cotation
+        :param method: Méthode du re-bootstrap complet
+        :return: Nouvelle ZeroCouponCurve (la courbe courante n'est pas modifiée).
+                 curve.bootstrap_report["method"] vaut "jacobian" pour une mise à jour incrémentale.
+        """
+        if self._anchor is None:
+            raise ValueError(f"la courbe {self.name} n'est pas issue d'un bootstrap OIS")
+
+        start = time.perf_counter()
+        new_quotes = {**self.market_quotes, **quotes}
+        anchor_quotes, anchor_rates = self._anchor
+        maturities = sorted(anchor_quotes)
+
+        if sorted(new_quotes) != maturities or self.bootstrap_report["fallbacks"]:
+            return self._rebootstrap(new_quotes, method)
+        dq = np.array([new_quotes[T] - anchor_quotes[T] for T in maturities])
+        max_move = float(np.max(np.abs(dq)))
+        if max_move > max_quote_move:
+            return self._rebootstrap(new_quotes, method)
+
+        curve = ZeroCouponCurve(self.times, anchor_rates + self.quote_jacobian @ dq, self.name,
+                                tabulation_step=self.tabulation_step)
+        curve.market_quotes = new_quotes
+        curve.quote_jacobian = self.quote_jacobian
+        curve._anchor = self._anchor
+        curve.bootstrap_report = {
+            "method": "jacobian",
+            "n_pillars": len(maturities),
+            "max_quote_move": max_move,
+            "fallbacks": [],
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+        return curve
 
 # --- Bloc de test rapide (ne s'exécute que si on lance ce fichier directement) ---
 # --- Bloc de test (ne s'exécute que si on lance ce fichier directement) ---
@@ -171,12 +431,21 @@ if __name__ == "__main__":
     # Vérification : Le swap 5 ans doit valoir 0 (aux erreurs d'arrondi près)
     # C'est la preuve que le bootstrap a fonctionné
     print(f"Facteur d'actualisation à 5 ans : {ois_curve.get_discount_factor(5.0):.6f}")
+    report = ois_curve.bootstrap_report
+    print(f"Bootstrap : {report['total_iterations']} itérations en {report['elapsed_ms']:.3f} ms")
+
+    # Tick de +0.5bp sur le 5 ans : mise à jour par la jacobienne contre re-bootstrap complet
+    ticked = ois_curve.update_quotes({5.0: market_data[5.0] + 0.5e-4})
+    exact = ZeroCouponCurve.bootstrap_ois_curve({**market_data, 5.0: market_data[5.0] + 0.5e-4})
+    print(f"Tick ({ticked.bootstrap_report['method']}) : écart max au bootstrap exact "
+          f"{np.max(np.abs(ticked.rates - exact.rates)):.2e} "
+          f"(jacobienne calculée au premier tick en {report['jacobian_ms']:.3f} ms)")
     
     # Petit graphe pour admirer le résultat
     try:
         import matplotlib.pyplot as plt
         times = np.linspace(0, 10, 100)
-        zeros = [ois_curve.get_zero_rate(t) for t in times]
+        zeros = ois_curve.get_zero_rate(times)
         plt.plot(times, zeros, label="Courbe Zéro-Coupon Bootstrappée")
         plt.scatter(market_data.keys(), market_data.values(), color='red', label="Taux Swap Marché")
         plt.title("Bootstrapping OIS")
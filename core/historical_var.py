@@ -0,0 +1,160 @@
+# VaR / Expected Shortfall historiques par revalorisation complète vectorisée
+import time
+
+import numpy as np
+
+from core.curve_cache import get_ois_curve, get_zero_curve
+from core.curves import ZeroCouponCurve
+from core.market_data import HistoricalQuoteStore
+from core.portfolio import PortfolioPricer, SwapBlock
+from core.scenarios import ScenarioCurve
+
+
+def var_es(pnl, confidence: float = 0.99) -> tuple:
+    """
+    VaR et Expected Shortfall historiques d'un vecteur de P&L (pertes positives).
+
+    :param pnl: P&L par scénario
+    :param confidence: Niveau de confiance (0.99 = VaR 99%)
+    :return: (VaR, ES)
+    """
+    losses = -np.asarray(pnl, dtype=float)
+    var = float(np.quantile(losses, confidence))
+    return var, float(losses[losses >= var].mean())
+
+
+class HistoricalVaREngine:
+    """
+    VaR historique par revalorisation complète d'un bloc de swaps.
+
+    Les variations de cotations sur horizon jours (fenêtres glissantes de
+    l'historique) sont appliquées aux cotations de la date d'arrêté et
+    transformées en un cube de courbes (ScenarioCurve) :
+    - OIS : au premier ordre via la jacobienne dy/dq stockée au bootstrap
+      (un produit matriciel pour tous les scénarios), ou par re-bootstrap
+      exact de chaque scénario si rebootstrap=True ;
+    - IBOR : les cotations sont des taux zéro, choqués directement.
+    Le portefeuille est ensuite revalorisé sur tous les scénarios en une
+    passe du PortfolioPricer (total_price : périodes uniques du bloc).
+    """
+
+    def __init__(self, store: HistoricalQuoteStore, horizon: int = 1, confidence: float = 0.99,
+                 rebootstrap: bool = False, ois_name: str = "EUR-OIS", ibor_name: str = "EUR-IBOR-3M"):
+        """
+        :param store: Historique des cotations
+        :param horizon: Horizon de la VaR en jours ouvrés (variations glissantes)
+        :param confidence: Niveau de confiance
+        :param rebootstrap: Re-bootstrapper chaque scénario OIS au lieu de passer par la jacobienne
+        :param ois_name: Nom de la courbe OIS
+        :param ibor_name: Nom de la courbe IBOR
+        """
+        self.store = store
+        self.horizon = horizon
+        self.confidence = confidence
+        self.rebootstrap = rebootstrap
+        self.ois_name = ois_name
+        self.ibor_name = ibor_name
+
+    def _changes(self, kind: str, start, end) -> tuple:
+        dates, quotes = self.store.window(kind, start, end)
+        if len(dates) <= self.horizon:
+            raise ValueError(f"historique trop court: {len(dates)} dates pour un horizon de {self.horizon}")
+        return dates[self.horizon:], quotes[self.horizon:] - quotes[:-self.horizon]
+
+    def scenario_curves(self, start=None, end=None) -> dict:
+        """
+        Courbes de base à la date d'arrêté (dernière date de la plage) et
+        cubes de scénarios historiques.
+
+        :return: dict avec as_of, scenario_dates, base_ois, base_ibor, ois, ibor
+                 (les entrées IBOR valent None si le store n'a pas de cotations IBOR)
+        """
+        scenario_dates, dq = self._changes("ois", start, end)
+        as_of = scenario_dates[-1]
+        quotes = self.store.quotes_on("ois", as_of)
+        base_ois = get_ois_curve(quotes, self.ois_name)
+
+        if self.rebootstrap:
+            maturities = sorted(quotes)
+            rates = np.array([
+                ZeroCouponCurve.bootstrap_ois_curve({T: quotes[T] + d for T, d in zip(maturities, shock)}).rates
+                for shock in dq
+            ])
+            ois = ScenarioCurve(base_ois.times, rates, f"{self.ois_name}-historical")
+        else:
+            ois = ScenarioCurve.from_shocks(base_ois, dq @ base_ois.quote_jacobian.T, f"{self.ois_name}-historical")
+
+        base_ibor = ibor = None
+        if "ibor" in self.store.pillars:
+            _, d_ibor = self._changes("ibor", start, end)
+            base_ibor = get_zero_curve(self.store.quotes_on("ibor", as_of), self.ibor_name)
+            ibor = ScenarioCurve.from_shocks(base_ibor, d_ibor, f"{self.ibor_name}-historical")
+
+        return {
+            "as_of": as_of,
+            "scenario_dates": scenario_dates,
+            "base_ois": base_ois,
+            "base_ibor": base_ibor,
+            "ois": ois,
+            "ibor": ibor,
+        }
+
+    def run(self, block: SwapBlock, start=None, end=None, projection: str = "ibor",
+            compounding: str = "continuous") -> dict:
+        """
+        VaR et ES du bloc sur l'historique [start, end].
+
+        :param block: Bloc de swaps linéaires
+        :param projection: Courbe de projection des forwards : "ois" ou "ibor"
+        :param compounding: Convention des forwards
+        :return: dict avec var, es, confidence, horizon, as_of, base_pv, pnl (par scénario),
+                 scenario_dates, worst_dates (5 pires scénarios) et elapsed_ms
+        """
+        start_time = time.perf_counter()
+        curves = self.scenario_curves(start, end)
+        if projection == "ibor" and curves["ibor"] is None:
+            raise ValueError("projection IBOR demandée mais le store n'a pas de cotations IBOR")
+        use_ibor = projection == "ibor"
+
+        base_pv = PortfolioPricer(curves["base_ois"], curves["base_ibor"] if use_ibor else None,
+                                  compounding).total_price(block)
+        scenario_pv = PortfolioPricer(curves["ois"], curves["ibor"] if use_ibor else None,
+                                      compounding).total_price(block)
+        pnl = scenario_pv - base_pv
+        var, es = var_es(pnl, self.confidence)
+
+        return {
+            "var": var,
+            "es": es,
+            "confidence": self.confidence,
+            "horizon": self.horizon,
+            "as_of": curves["as_of"],
+            "base_pv": base_pv,
+            "pnl": pnl,
+            "scenario_dates": curves["scenario_dates"],
+            "worst_dates": curves["scenario_dates"][np.argsort(pnl)[:5]],
+            "elapsed_ms": (time.perf_counter() - start_time) * 1000.0,
+        }
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from core.market_data import generate_mock_history
+    from core.portfolio import regular_schedules
+
+    # test rapide : 10 ans d'historique fictif, VaR 1 jour 99% de 5000 swaps
+    with tempfile.TemporaryDirectory() as tmp:
+        store = generate_mock_history(tmp)
+        rng = np.random.default_rng(0)
+        n = 5000
+        block = SwapBlock(rng.uniform(1e6, 1e8, size=n), rng.uniform(0.02, 0.05, size=n),
+                          regular_schedules(rng.integers(1, 11, size=n), rng.choice([1, 2, 4], size=n)))
+
+        report = HistoricalVaREngine(HistoricalQuoteStore(tmp)).run(block)
+        print(f"{len(report['pnl'])} scénarios au {report['as_of']} : VaR 99% {report['var']:,.0f}, "
+              f"ES {report['es']:,.0f} en {report['elapsed_ms']:.0f} ms")
+
+        exact = HistoricalVaREngine(store, rebootstrap=True).run(block, start="2024-01-01")
+        approx = HistoricalVaREngine(store).run(block, start="2024-01-01")
+        print(f"depuis 2024 : VaR jacobienne {approx['var']:,.0f} / re-bootstrap {exact['var']:,.0f}")
@@ -1,12 +1,63 @@
+import hashlib
+
 import numpy as np
+from scipy.stats import norm
 
 class HullWhiteModel:
     
-    def __init__(self, a: float, sigma: float):
+    def __init__(self, a: float, sigma, sigma_times=None):
         # a: vitesse retour moyenne
-        # sigma: volatilite du taux court
+        # sigma: volatilite du taux court ; constante, ou constante par morceaux :
+        #   sigma[0] sur [0, sigma_times[0]), sigma[k] sur [sigma_times[k-1], sigma_times[k]), sigma[-1] ensuite
+        # en constante par morceaux, les integrales cumulees de sigma^2 e^{k a u} (k = 0, 1, 2) sont
+        # precalculees aux noeuds : variances, covariances et drifts se lisent en O(1) par date
         self.a = a
         self.sigma = sigma
+        self.sigma_times = None
+        if sigma_times is not None or np.ndim(sigma) > 0:
+            self.sigma = np.atleast_1d(np.asarray(sigma, dtype=float))
+            self.sigma_times = np.asarray([] if sigma_times is None else sigma_times, dtype=float)
+            if len(self.sigma) != len(self.sigma_times) + 1:
+                raise ValueError(f"{len(self.sigma)} sigmas pour {len(self.sigma_times)} noeuds (attendu noeuds + 1)")
+            if np.any(self.sigma_times <= 0) or np.any(np.diff(self.sigma_times) <= 0):
+                raise ValueError("les noeuds de sigma doivent etre > 0 et strictement croissants")
+            self._build_tables()
+
+    def _build_tables(self):
+        # G_k(b_i) = integrale de sigma^2 m_k(u) sur [0, b_i] aux bornes b = [0, noeuds...]
+        self._bounds = np.concatenate(([0.0], self.sigma_times))
+        self._sigma2 = self.sigma ** 2
+        steps = [self._sigma2[:-1] * self._moment_integral(k, self._bounds[:-1], self._bounds[1:]) for k in range(3)]
+        self._tables = [np.concatenate(([0.0], np.cumsum(step))) for step in steps]
+
+    def _moment_integral(self, k, s, t):
+        # integrale de m_k(u) sur [s, t] : m_k(u) = e^{k a u}, ou u^k si a = 0
+        if self.a == 0:
+            return (t ** (k + 1) - s ** (k + 1)) / (k + 1)
+        if k == 0:
+            return t - s
+        return (np.exp(k * self.a * t) - np.exp(k * self.a * s)) / (k * self.a)
+
+    def _cumulative(self, k, t):
+        # G_k(t) = integrale de sigma(u)^2 m_k(u) sur [0, t], lue sur les tables
+        t = np.asarray(t, dtype=float)
+        i = np.clip(np.searchsorted(self._bounds, t, side="right") - 1, 0, len(self._bounds) - 1)
+        return self._tables[k][i] + self._sigma2[i] * self._moment_integral(k, self._bounds[i], t)
+
+    def _sigma_integrals(self, s, t) -> tuple:
+        # (integrales de sigma^2 m_k sur [s, t]) pour k = 0, 1, 2
+        return tuple(self._cumulative(k, t) - self._cumulative(k, s) for k in range(3))
+
+    @property
+    def is_constant(self) -> bool:
+        return self.sigma_times is None
+
+    def sigma_at(self, t):
+        # volatilite instantanee en t (continue a droite aux noeuds)
+        if self.is_constant:
+            return np.full(np.shape(t), float(self.sigma)) if np.ndim(t) else float(self.sigma)
+        i = np.searchsorted(self.sigma_times, np.asarray(t, dtype=float), side="right")
+        return self.sigma[i]
 
     def calc_b(self, t: float, T: float) -> float:
         #transforme le taux en prix
@@ -17,10 +68,250 @@ class HullWhiteModel:
 
     def calc_variance(self, t: float) -> float:
         #pour calculer l'écartement de l'arbre
+        if not self.is_constant:
+            return self.conditional_variance(0.0, t)
         if self.a == 0:
             return (self.sigma ** 2) * t
         return (self.sigma ** 2) / (2 * self.a) * (1.0 - np.exp(-2 * self.a * t))
 
+    def conditional_variance(self, s, t):
+        # variance de x(t) sachant x(s), s <= t (tableaux diffuses)
+        s = np.asarray(s, dtype=float)
+        t = np.asarray(t, dtype=float)
+        if self.is_constant:
+            return self.calc_variance(t - s)
+        if self.a == 0:
+            return self._cumulative(0, t) - self._cumulative(0, s)
+        return np.exp(-2 * self.a * t) * (self._cumulative(2, t) - self._cumulative(2, s))
+
+    def variance_clock(self, t):
+        # horloge v(t) = e^{2at} var(x(t)) : x(t) = e^{-at} W(v(t)), W brownien standard
+        t = np.asarray(t, dtype=float)
+        if not self.is_constant:
+            return self._cumulative(0 if self.a == 0 else 2, t)
+        if self.a == 0:
+            return self.sigma ** 2 * t
+        return self.sigma ** 2 * np.expm1(2 * self.a * t) / (2 * self.a)
+
+    def step_coefficients(self, t0, t1) -> tuple:
+        # schema exact OU sur les pas [t0, t1] : x(t1) = decay x(t0) + std z
+        t0 = np.asarray(t0, dtype=float)
+        t1 = np.asarray(t1, dtype=float)
+        dt = t1 - t0
+        decay = np.exp(-self.a * dt)
+        if not self.is_constant:
+            return decay, np.sqrt(self.conditional_variance(t0, t1))
+        if self.a == 0:
+            return decay, self.sigma * np.sqrt(dt)
+        return decay, self.sigma * np.sqrt((1 - np.exp(-2 * self.a * dt)) / (2 * self.a))
+
+    def bond_price(self, curve, t, T, x_t):
+        # prix zero-coupon P(t,T) = P(0,T)/P(0,t) * exp(-B x - 0.5 B^2 var(t)) sachant x(t)
+        # t, T et x_t peuvent etre des tableaux (diffuses entre eux : chemins x flux)
+        t = np.asarray(t, dtype=float)
+        T = np.asarray(T, dtype=float)
+        B = self.calc_b(t, T)
+        return (curve.get_discount_factor(T) / curve.get_discount_factor(t)
+                * np.exp(-B * x_t - 0.5 * B * B * self.calc_variance(t)))
+
+    def simulate_x(self, times, rng, n_paths: int, antithetic: bool = False) -> np.ndarray:
+        # schema exact OU pour le facteur x (x(0) = 0) sur une grille croissante de dates >= 0
+        # tirages date par date (n_paths normales par pas) ; en antithetic les chemins 2k et 2k+1
+        # forment une paire (x, -x), x etant lineaire en les tirages
+        # renvoie un tableau (n_paths x n_dates)
+        times = np.asarray(times, dtype=float)
+        if antithetic:
+            half = self.simulate_x(times, rng, n_paths // 2)
+            x = np.empty((2 * half.shape[0], len(times)))
+            x[0::2] = half
+            x[1::2] = -half
+            return x
+
+        start = 1 if times[0] == 0 else 0  # pas de tirage pour x(0) = 0
+        t1 = times[start:]
+        t0 = np.concatenate(([0.0], t1[:-1])) if start == 0 else times[:-1]
+        decay, std = self.step_coefficients(t0, t1)
+
+        z = rng.normal(size=(len(t1), n_paths))
+        x = np.zeros((n_paths, len(times)))
+        prev = np.zeros(n_paths)
+        for j in range(len(t1)):
+            prev = prev * decay[j] + std[j] * z[j]
+            x[:, start + j] = prev
+        return x
+
+    def simulate_x_integral(self, times, rng, n_paths: int) -> tuple:
+        # simulation exacte jointe de x(t) et de I(t) = integrale de x sur [0, t] (gaussiens) :
+        # x est tire exactement comme simulate_x (memes tirages, memes trajectoires), les
+        # increments de I utilisent un second bloc de tirages correle
+        # renvoie (x, I), deux tableaux (n_paths x n_dates)
+        times = np.asarray(times, dtype=float)
+        x = self.simulate_x(times, rng, n_paths)
+        start = 1 if times[0] == 0 else 0
+        t1 = times[start:]
+        t0 = np.concatenate(([0.0], t1[:-1])) if start == 0 else times[:-1]
+        dt = t1 - t0
+
+        B = self.calc_b(0.0, dt)
+        var_x = self.conditional_variance(t0, t1)
+        var_i = self.integral_variance(t0, t1)
+        cov = self.integral_covariance(t0, t1)
+
+        # I_{j+1} = I_j + B x_j + eps_I, avec eps_I = beta eps_x + residu independant
+        x_prev = np.concatenate((np.zeros((n_paths, 1)), x[:, start:-1]), axis=1) if start == 0 else x[:, :-1]
+        eps_x = x[:, start:] - x_prev * np.exp(-self.a * dt)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = np.where(var_x > 0, cov / var_x, 0.0)
+        resid_std = np.sqrt(np.maximum(var_i - beta * cov, 0.0))
+
+        z = rng.normal(size=(len(dt), n_paths))
+        increments = x_prev * B + eps_x * beta + z.T * resid_std
+        I = np.zeros((n_paths, len(times)))
+        I[:, start:] = np.cumsum(increments, axis=1)
+        return x, I
+
+    def integral_variance(self, t, T=None):
+        # variance de l'integrale de x sur [t, T] sachant x(t) ; un seul argument : sur [0, t]
+        if T is None:
+            t, T = 0.0, t
+        t = np.asarray(t, dtype=float)
+        T = np.asarray(T, dtype=float)
+        a = self.a
+        if self.is_constant:
+            dt = T - t
+            if a == 0:
+                return self.sigma ** 2 * dt ** 3 / 3.0
+            return self.sigma ** 2 / a ** 2 * (dt - 2.0 * self.calc_b(0.0, dt) + (1.0 - np.exp(-2 * a * dt)) / (2 * a))
+        s0, s1, s2 = self._sigma_integrals(t, T)
+        if a == 0:
+            return T * T * s0 - 2.0 * T * s1 + s2
+        return (s0 - 2.0 * np.exp(-a * T) * s1 + np.exp(-2 * a * T) * s2) / a ** 2
+
+    def integral_covariance(self, t, T):
+        # covariance de x(T) et de l'integrale de x sur [t, T], sachant x(t)
+        t = np.asarray(t, dtype=float)
+        T = np.asarray(T, dtype=float)
+        a = self.a
+        if self.is_constant:
+            B = self.calc_b(t, T)
+            return 0.5 * self.sigma ** 2 * B * B
+        s0, s1, s2 = self._sigma_integrals(t, T)
+        if a == 0:
+            return T * s0 - s1
+        return (np.exp(-a * T) * s1 - np.exp(-2 * a * T) * s2) / a
+
+    def path_discount_factor(self, curve, t, I_t):
+        # facteur d'actualisation trajectoriel exp(-integrale de r) = P(0,t) exp(-I(t) - 0.5 var(I(t))),
+        # d'esperance P(0,t) (r = x + phi, phi calee sur la courbe)
+        return curve.get_discount_factor(np.asarray(t, dtype=float)) * np.exp(-I_t - 0.5 * self.integral_variance(t))
+
+    def bond_price_q(self, curve, t, T, x_t):
+        # prix zero-coupon P(t,T) sachant x(t) sous la mesure risque-neutre (x de moyenne nulle sous Q) :
+        # P(0,T)/P(0,t) * exp(0.5 (V(t,T) - V(0,T) + V(0,t)) - B x), V = integral_variance ;
+        # coherent avec path_discount_factor (E[D(0,t) P(t,T)] = P(0,T))
+        t = np.asarray(t, dtype=float)
+        T = np.asarray(T, dtype=float)
+        B = self.calc_b(t, T)
+        log_a = 0.5 * (self.integral_variance(t, T) - self.integral_variance(T) + self.integral_variance(t))
+        return curve.get_discount_factor(T) / curve.get_discount_factor(t) * np.exp(log_a - B * x_t)
+
+    def forward_measure_mean(self, t, s, T, x_t):
+        # esperance de x(s) sachant x(t) sous la mesure forward de maturite T (numeraire P(., T)) :
+        # x_t e^{-a(s-t)} - integrale de sigma(u)^2 e^{-a(s-u)} B(u,T) du sur [t, s]
+        t = np.asarray(t, dtype=float)
+        s = np.asarray(s, dtype=float)
+        T = np.asarray(T, dtype=float)
+        a = self.a
+        if not self.is_constant:
+            s0, s1, s2 = self._sigma_integrals(t, s)
+            if a == 0:
+                drift = T * s0 - s1
+            else:
+                drift = (np.exp(-a * s) * s1 - np.exp(-a * (s + T)) * s2) / a
+            return x_t * np.exp(-a * (s - t)) - drift
+        if a == 0:
+            drift = 0.5 * ((T - t) ** 2 - (T - s) ** 2)
+        else:
+            drift = (self.calc_b(t, s) - (np.exp(-a * (T - s)) - np.exp(-a * (T + s - 2 * t))) / (2 * a)) / a
+        return x_t * np.exp(-a * (s - t)) - self.sigma ** 2 * drift
+
+    def zero_bond_option(self, curve, T, S, strike, call: bool = True):
+        # option europeenne d'echeance T sur le zero-coupon de maturite S (nominal 1), formule fermee HW :
+        # sigma_p = B(T,S) sqrt(var(T)), h = ln(P(0,S) / (X P(0,T))) / sigma_p + sigma_p / 2
+        # T, S et strike sont diffuses entre eux (grilles entieres en un appel)
+        T = np.asarray(T, dtype=float)
+        S = np.asarray(S, dtype=float)
+        df_T = curve.get_discount_factor(T)
+        df_S = curve.get_discount_factor(S)
+        sigma_p = np.maximum(self.calc_b(T, S) * np.sqrt(self.calc_variance(T)), 1e-16)
+        h = np.log(df_S / (strike * df_T)) / sigma_p + 0.5 * sigma_p
+        if call:
+            return df_S * norm.cdf(h) - strike * df_T * norm.cdf(h - sigma_p)
+        return strike * df_T * norm.cdf(sigma_p - h) - df_S * norm.cdf(-h)
+
+    def swaption(self, curve, expiries, tenors, strikes=None, frequency: int = 1, payer: bool = True) -> dict:
+        """
+        Swaptions europeennes (courbe unique) par decomposition de Jamshidian,
+        sur toute la grille expiries x tenors en un appel : le taux critique
+        x* de chaque swaption est resolu par Newton vectorise (sum c_i P(T0,T_i|x) = 1,
+        decroissante et convexe en x), puis le prix est la somme des options
+        zero-coupon de strikes P(T0,T_i|x*).
+
+        :param expiries: Maturites des options (E,)
+        :param tenors: Durees des swaps sous-jacents en annees (K,)
+        :param strikes: Taux fixes (E, K) ; par defaut les taux forward (ATM)
+        :param frequency: Paiements fixes par an
+        :param payer: Swaption payeuse (sinon receveuse)
+        :return: dict avec price, annuity, forward (E x K), par unite de nominal
+        """
+        expiries = np.asarray(expiries, dtype=float)
+        tenors = np.asarray(tenors, dtype=float)
+        T0 = np.repeat(expiries[:, None], len(tenors), axis=1)
+        n_pay = np.rint(tenors * frequency).astype(int)
+        n_pay = np.broadcast_to(n_pay[None, :], T0.shape)
+
+        # echeanciers fixes completes : les dates en trop restent a T0 avec un coupon nul
+        j = np.arange(1, n_pay.max() + 1)
+        alive = j <= n_pay[..., None]
+        pay = np.where(alive, T0[..., None] + j / frequency, T0[..., None])
+        accrual = alive / frequency
+
+        df_pay = curve.get_discount_factor(pay)
+        annuity = np.sum(accrual * df_pay, axis=-1)
+        df_end = np.take_along_axis(df_pay, n_pay[..., None] - 1, axis=-1)[..., 0]
+        forward = (curve.get_discount_factor(T0) - df_end) / annuity
+        strike = forward if strikes is None else np.broadcast_to(np.asarray(strikes, dtype=float), T0.shape)
+
+        coupons = strike[..., None] * accrual
+        coupons[np.arange(len(expiries))[:, None], np.arange(len(tenors))[None, :], n_pay - 1] += 1.0
+
+        # P(T0, T_i | x) = exp(log_a - B x), prix exact sous Q (bond_price_q)
+        T = T0[..., None]
+        B = self.calc_b(T, pay)
+        log_a = (np.log(df_pay / curve.get_discount_factor(T))
+                 + 0.5 * (self.integral_variance(T, pay) - self.integral_variance(pay) + self.integral_variance(T)))
+        x = np.zeros(T0.shape)
+        for _ in range(50):
+            bonds = coupons * np.exp(log_a - B * x[..., None])
+            f = bonds.sum(axis=-1) - 1.0
+            step = f / -(B * bonds).sum(axis=-1)
+            x -= step
+            if np.max(np.abs(step)) < 1e-14:
+                break
+
+        strikes_zc = np.exp(log_a - B * x[..., None])
+        options = self.zero_bond_option(curve, T, pay, strikes_zc, call=not payer)
+        price = np.sum(np.where(alive, coupons * options, 0.0), axis=-1)
+        return {"price": price, "annuity": annuity, "forward": forward, "strike": strike}
+
+    def fingerprint(self) -> str:
+        # empreinte des parametres du modele (cles de cache des trajectoires)
+        if self.is_constant:
+            payload = ("hull_white", float(self.a), float(self.sigma))
+        else:
+            payload = ("hull_white", float(self.a), tuple(self.sigma.tolist()), tuple(self.sigma_times.tolist()))
+        return hashlib.sha1(repr(payload).encode("utf-8")).hexdigest()
+
 if __name__ == "__main__":
     # test rapide
     hw = HullWhiteModel(a=0.03, sigma=0.01)
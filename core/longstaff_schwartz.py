@@ -0,0 +1,266 @@
+# Options d'annulation (callable / puttable) par Longstaff-Schwartz sur trajectoires Hull-White
+import time
+from functools import partial
+
+import numpy as np
+
+from core.curves import ZeroCouponCurve
+from core.hull_white import HullWhiteModel
+from core.legs import LegEngine
+from core.monte_carlo import MonteCarloEngine
+from core.path_store import PathStore, _x_integral_chunk
+from core.portfolio import SwapBlock
+
+
+class CancellableSwapBook:
+    """
+    Bloc de swaps annulables : un SwapBlock (receveur du flottant + spread,
+    payeur du fixe ; notionnel négatif pour recevoir le fixe) et, par trade,
+    ses dates d'exercice et le détenteur du droit d'annulation.
+
+    Une annulation à la date t supprime toutes les périodes commençant à t
+    ou après (comme le call de CallableSwapPricer) ; les périodes déjà
+    commencées sont payées.
+    """
+
+    def __init__(self, block: SwapBlock, exercise_times, holder_exercises=True):
+        """
+        :param block: Swaps sous-jacents
+        :param exercise_times: Dates d'exercice par trade : liste de listes ou tableau (n, E) complété par des NaN
+        :param holder_exercises: True si le détenteur du swap peut annuler (puttable), False si c'est la
+                                 contrepartie (callable) ; scalaire ou (n,)
+        """
+        if isinstance(exercise_times, np.ndarray):
+            times = np.atleast_2d(np.asarray(exercise_times, dtype=float))
+        else:
+            n_max = max(1, max(len(t) for t in exercise_times))
+            times = np.full((len(exercise_times), n_max), np.nan)
+            for k, t in enumerate(exercise_times):
+                times[k, :len(t)] = t
+        if times.shape[0] != block.n_trades:
+            raise ValueError(f"{times.shape[0]} échéanciers d'exercice pour {block.n_trades} trades")
+
+        self.block = block
+        self.exercise_times = np.where(times > 0, times, np.nan)  # pas d'exercice en t=0
+        self.holder_exercises = np.broadcast_to(np.asarray(holder_exercises, dtype=bool), (block.n_trades,)).copy()
+
+    @property
+    def n_trades(self) -> int:
+        return self.block.n_trades
+
+    @property
+    def owner_sign(self) -> np.ndarray:
+        # +1 : option détenue (puttable), -1 : option vendue (callable)
+        return np.where(self.holder_exercises, 1.0, -1.0)
+
+
+class LongstaffSchwartzEngine:
+    """
+    Swaps annulables par régression (Longstaff-Schwartz) sur un jeu de
+    trajectoires Hull-White partagé par tout le livre.
+
+    Le facteur x et son intégrale sont simulés exactement et conjointement
+    (HullWhiteModel.simulate_x_integral) sur la grille des dates d'exercice :
+    l'actualisation est trajectorielle, exp(-intégrale de r), et la valeur
+    des périodes restantes à une date d'exercice est fermée en x(t)
+    (HullWhiteModel.bond_price_q, même mesure). Aucune date intermédiaire
+    n'est nécessaire : une annulation en t ne porte que sur des périodes
+    fixées après t.
+
+    Le prix d'un trade est la PV du swap dans le modèle (forwards ajustés de
+    la convexité) plus (puttable) ou moins (callable) la valeur de l'option
+    d'entrer dans le swap opposé.
+    En remontant les dates d'exercice, tous les trades exerçables à une date
+    partagent la même base polynomiale en x(t) : les moindres carrés, restreints
+    aux chemins dans la monnaie de chaque trade, se réduisent à un seul produit
+    (chemins x base²) @ (chemins x trades) et à un système k x k par trade,
+    résolus en un appel.
+
+    Mémoire : (n_paths x n_trades) pour les flux d'option ; les trajectoires
+    peuvent venir d'un PathStore.
+    """
+
+    def __init__(self, hw_model: HullWhiteModel, discount_curve: ZeroCouponCurve,
+                 projection_curve: ZeroCouponCurve = None, compounding: str = "continuous",
+                 n_paths: int = 20_000, seed: int = 42, degree: int = 3,
+                 mc_engine: MonteCarloEngine = None, path_store: PathStore = None):
+        """
+        :param hw_model: Modèle Hull-White du facteur de taux
+        :param discount_curve: Courbe d'actualisation
+        :param projection_curve: Courbe de projection (par défaut la courbe d'actualisation)
+        :param compounding: Convention des forwards ("continuous" ou "simple"), comme le PortfolioPricer
+        :param n_paths: Nombre de chemins Monte Carlo
+        :param seed: Graine (ignorée si mc_engine est fourni)
+        :param degree: Degré de la base polynomiale en x des régressions
+        :param mc_engine: Moteur d'exécution Monte Carlo (paquets, threads)
+        :param path_store: Cache de trajectoires partagé
+        """
+        if compounding not in ("continuous", "simple"):
+            raise ValueError(f"composition inconnue: {compounding}")
+        self.hw_model = hw_model
+        self.legs = LegEngine(discount_curve, projection_curve)
+        self.compounding = compounding
+        self.n_paths = n_paths
+        self.degree = degree
+        self.mc_engine = mc_engine if mc_engine is not None else MonteCarloEngine(seed=seed)
+        self.path_store = path_store
+        self.report = None
+
+    def _paths(self, grid) -> np.ndarray:
+        # (n_paths x 2 x n_dates) : x puis son intégrale
+        if self.path_store is not None:
+            return self.path_store.hull_white_integral_paths(self.hw_model, grid, self.n_paths, self.mc_engine)
+        return self.mc_engine.run_concat(partial(_x_integral_chunk, self.hw_model, grid), self.n_paths)
+
+    def _remaining_values(self, block: SwapBlock, trades, t, x_t, scale=1.0) -> np.ndarray:
+        """
+        Valeur en t, chemin par chemin, des périodes commençant à t ou après,
+        pour les trades donnés, multipliée par scale : (n_trades x n_paths). Périodes regroupées
+        par triplet unique (début, fin, paiement), comme l'ExposureEngine ;
+        les forwards non encore fixés sont valorisés sous la mesure forward
+        de leur date de paiement (ajustement de convexité exact).
+        """
+        hw = self.hw_model
+        mask = block.mask[trades] & (block.starts[trades] >= t - 1e-10)
+        rows = np.nonzero(mask)[0]
+        starts, ends = block.starts[trades][mask], block.ends[trades][mask]
+        pays = block.pay_times[trades][mask]
+
+        periods = np.column_stack((starts, ends, pays))
+        unique, inverse = np.unique(periods, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        n_cols = len(trades)
+        weight = (block.notionals[trades] * scale[:, None] if np.ndim(scale) else block.notionals[trades] * scale)[mask]
+        weight = weight * self.legs.accruals(starts, ends)
+        cells = inverse * n_cols + rows
+        size = len(unique) * n_cols
+        W = np.bincount(cells, weight, size).reshape(len(unique), n_cols)
+        C = np.bincount(cells, weight * (block.spreads[trades][mask] - block.fixed_rates[trades][mask]),
+                        size).reshape(len(unique), n_cols)
+
+        s, e, p = unique.T
+        x = x_t[:, None]
+        df = hw.bond_price_q(self.legs.discount_curve, t, p, x)
+
+        # forward fixé en s >= t, payé en p : log-ratio L = ln P(s,s)/P(s,e) = c + B(s,e) x(s), gaussien
+        # sous la mesure forward de p, d'où une valeur exacte (convexité comprise) dans les deux conventions
+        projection = self.legs.projection_curve
+        B = hw.calc_b(s, e)
+        c = (np.log(projection.get_discount_factor(s) / projection.get_discount_factor(e))
+             - 0.5 * (hw.integral_variance(s, e) - hw.integral_variance(e) + hw.integral_variance(s)))
+        mean = c + B * hw.forward_measure_mean(t, s, p, x)
+        if self.compounding == "continuous":
+            fwd = mean / (e - s)
+        else:
+            fwd = np.expm1(mean + 0.5 * B * B * hw.conditional_variance(t, s)) / self.legs.accruals(s, e)
+        return W.T @ (fwd * df).T + C.T @ df.T
+
+    def _basis(self, x_t) -> np.ndarray:
+        # polynômes en x réduit (conditionnement des équations normales)
+        z = x_t / max(x_t.std(), 1e-12)
+        return np.vander(z, self.degree + 1, increasing=True)
+
+    def _continuation(self, basis, target, in_money) -> np.ndarray:
+        """
+        Régressions de toutes les lignes de target (trades x chemins) sur la
+        même base, chacune restreinte à ses chemins dans la monnaie :
+        A_j = Phi' M_j Phi, b_j = Phi' M_j y_j, résolues en un appel.
+        """
+        n, k = basis.shape
+        weights = in_money.astype(float)
+        outer = (basis[:, :, None] * basis[:, None, :]).reshape(n, k * k)
+        A = (weights @ outer).reshape(-1, k, k)
+        b = (weights * target) @ basis
+        ridge = 1e-10 * np.maximum(np.trace(A, axis1=1, axis2=2), 1.0)
+        A += ridge[:, None, None] * np.eye(k)
+        beta = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+        return beta @ basis.T
+
+    def price(self, book: CancellableSwapBook) -> np.ndarray:
+        """Prix des swaps annulables (n_trades,), du point de vue du détenteur du swap."""
+        return self.run(book)["price"]
+
+    def run(self, book: CancellableSwapBook) -> dict:
+        """
+        Valorisation du livre.
+
+        :return: dict avec price, swap (PV sans option, dans le modèle), option (valeur de l'option
+                 d'annulation pour son détenteur, >= 0), exercise_probability (par trade), n_paths, elapsed_ms
+        """
+        start = time.perf_counter()
+        block = book.block
+        hw = self.hw_model
+        sign = book.owner_sign
+
+        swap = self._remaining_values(block, np.arange(book.n_trades), 0.0, np.zeros(1))[:, 0]
+
+        exercise = book.exercise_times
+        dates = np.unique(exercise[~np.isnan(exercise)])
+        option = np.zeros(book.n_trades)
+        exercised = np.zeros(book.n_trades)
+        if len(dates):
+            grid = np.concatenate(([0.0], dates))
+            paths = self._paths(grid)
+            deflator = hw.path_discount_factor(self.legs.discount_curve, grid, paths[:, 1])
+
+            # flux d'option actualisés en 0 (trades x chemins), remontés date par date ;
+            # un flux > 0 signale un exercice sur le chemin
+            cashflows = np.zeros((book.n_trades, paths.shape[0]))
+            for j in range(len(dates), 0, -1):
+                t = grid[j]
+                trades = np.nonzero(np.any(np.abs(exercise - t) < 1e-10, axis=1))[0]
+                x_t = paths[:, 0, j]
+                D = deflator[:, j]
+
+                # valeur d'exercice pour le détenteur de l'option : entrer dans le swap opposé
+                payoff = self._remaining_values(block, trades, t, x_t, -sign[trades])
+                np.maximum(payoff, 0.0, out=payoff)
+                future = cashflows[trades]
+                continuation = self._continuation(self._basis(x_t), future / D, payoff > 0)
+
+                exercise_now = payoff > np.maximum(continuation, 0.0)
+                np.multiply(payoff, D, out=payoff)
+                np.copyto(future, payoff, where=exercise_now)
+                cashflows[trades] = future
+
+            option = cashflows.mean(axis=1)
+            exercised = (cashflows > 0).mean(axis=1)
+
+        self.report = {
+            "price": swap + sign * option,
+            "swap": swap,
+            "option": option,
+            "exercise_probability": exercised,
+            "n_paths": self.n_paths,
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+        return self.report
+
+
+if __name__ == "__main__":
+    from core.portfolio import regular_schedules
+    from pricers.callable_swap import CallableSwapPricer
+
+    # test rapide : callable 10 ans annuel (recevoir le fixe), comparé à l'arbre trinomial
+    curve = ZeroCouponCurve([0.5, 1, 2, 5, 10, 30], [0.025, 0.027, 0.03, 0.032, 0.033, 0.034])
+    hw = HullWhiteModel(0.03, 0.01)
+    times = list(np.arange(0, 11.0))
+    tree = CallableSwapPricer(1e6, 0.032, times, times[1:-1], curve, hw, steps_per_period=12).price()
+
+    single = CancellableSwapBook(SwapBlock([-1e6], [0.032], [times]), [times[1:-1]], holder_exercises=False)
+    engine = LongstaffSchwartzEngine(hw, curve, n_paths=50_000)
+    report = engine.run(single)
+    print(f"callable : LSM {report['price'][0]:,.0f} / arbre {tree:,.0f} (option {report['option'][0]:,.0f})")
+
+    # livre de 2000 callables / puttables sur le même jeu de trajectoires
+    rng = np.random.default_rng(0)
+    n = 2000
+    maturities = rng.integers(2, 16, size=n)
+    schedules = regular_schedules(maturities, 1)
+    calls = np.where(schedules[:, 1:-1] >= rng.integers(1, 3, size=n)[:, None], schedules[:, 1:-1], np.nan)
+    book = CancellableSwapBook(SwapBlock(rng.uniform(1e6, 1e7, size=n) * rng.choice([-1, 1], size=n),
+                                         rng.uniform(0.02, 0.045, size=n), schedules),
+                               calls, holder_exercises=rng.random(n) < 0.5)
+    report = LongstaffSchwartzEngine(hw, curve, n_paths=20_000).run(book)
+    print(f"{n} swaps annulables, {report['n_paths']} chemins en {report['elapsed_ms']:.0f} ms, "
+          f"option moyenne {report['option'].mean():,.0f}")
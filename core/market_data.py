@@ -1,4 +1,9 @@
 # TODO: prendre de vraies données si possible via bloomberg
+import json
+import os
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
 
 def get_mock_ois_quotes():
     # {maturite_en_annees: taux_swap_ois}
@@ -18,3 +23,182 @@ def get_mock_ibor_quotes():
         2.0: 0.038,
         5.0: 0.039
     }
+
+
+def get_mock_swaption_vols():
+    # matrice ATM de volatilités normales (en taux, 0.0080 = 80 pb) : expiries x tenors (années)
+    expiries = [0.5, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0]
+    tenors = [1.0, 2.0, 5.0, 10.0, 20.0]
+    vols = [
+        [0.0095, 0.0097, 0.0098, 0.0094, 0.0088],
+        [0.0098, 0.0099, 0.0099, 0.0095, 0.0088],
+        [0.0099, 0.0099, 0.0097, 0.0093, 0.0086],
+        [0.0097, 0.0097, 0.0095, 0.0091, 0.0084],
+        [0.0093, 0.0093, 0.0091, 0.0087, 0.0080],
+        [0.0089, 0.0089, 0.0087, 0.0083, 0.0077],
+        [0.0084, 0.0084, 0.0082, 0.0079, 0.0073],
+    ]
+    return expiries, tenors, vols
+
+
+class SwaptionVolSurface:
+    """
+    Nappe de volatilités normales ATM de swaptions (expiries x tenors),
+    interpolée bilinéairement, extrapolation plate hors de la grille.
+    """
+
+    def __init__(self, expiries, tenors, vols):
+        """
+        :param expiries: Maturités des options (E,), croissantes
+        :param tenors: Durées des swaps sous-jacents (K,), croissantes
+        :param vols: Volatilités normales (E, K)
+        """
+        self.expiries = np.asarray(expiries, dtype=float)
+        self.tenors = np.asarray(tenors, dtype=float)
+        self.vols = np.asarray(vols, dtype=float)
+        if self.vols.shape != (len(self.expiries), len(self.tenors)):
+            raise ValueError(f"nappe de forme {self.vols.shape}, attendu {(len(self.expiries), len(self.tenors))}")
+        self._interpolator = RegularGridInterpolator((self.expiries, self.tenors), self.vols)
+
+    @classmethod
+    def mock(cls) -> "SwaptionVolSurface":
+        return cls(*get_mock_swaption_vols())
+
+    def vol(self, expiries, tenors) -> np.ndarray:
+        """Volatilités normales aux points (expiry, tenor), diffusables entre eux."""
+        expiries, tenors = np.broadcast_arrays(np.asarray(expiries, dtype=float), np.asarray(tenors, dtype=float))
+        points = np.stack((np.clip(expiries, self.expiries[0], self.expiries[-1]),
+                           np.clip(tenors, self.tenors[0], self.tenors[-1])), axis=-1)
+        return self._interpolator(points.reshape(-1, 2)).reshape(expiries.shape)
+
+
+class HistoricalQuoteStore:
+    """
+    Historique daté des cotations OIS / IBOR stocké sur disque en binaire
+    brut (.npy) et ouvert en mémoire mappée : rien n'est lu avant le
+    premier accès, et une plage de dates est une simple vue sur le fichier
+    (aucune copie), quelle que soit la profondeur de l'historique.
+
+    Répertoire du store :
+    - meta.json : piliers de chaque courbe
+    - dates.npy : dates (datetime64[D], croissantes)
+    - ois.npy, ibor.npy : cotations (n_dates x n_piliers)
+    """
+
+    KINDS = ("ois", "ibor")
+
+    def __init__(self, path: str):
+        """
+        :param path: Répertoire du store (voir write)
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.pillars = {kind: np.array(meta["pillars"][kind], dtype=float) for kind in meta["pillars"]}
+        self._arrays = {}
+
+    @classmethod
+    def write(cls, path: str, dates, ois_pillars, ois_quotes, ibor_pillars=None, ibor_quotes=None) -> "HistoricalQuoteStore":
+        """
+        Écrit un historique sur disque et renvoie le store correspondant.
+
+        :param dates: Dates croissantes (n_dates,), convertibles en datetime64[D]
+        :param ois_pillars: Maturités des cotations OIS (n_ois,)
+        :param ois_quotes: Cotations OIS (n_dates x n_ois)
+        :param ibor_pillars: Maturités des cotations IBOR (optionnel)
+        :param ibor_quotes: Cotations IBOR (n_dates x n_ibor)
+        """
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if np.any(np.diff(dates) <= np.timedelta64(0, "D")):
+            raise ValueError("les dates doivent être strictement croissantes")
+
+        panels = {"ois": (ois_pillars, ois_quotes)}
+        if ibor_quotes is not None:
+            panels["ibor"] = (ibor_pillars, ibor_quotes)
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "dates.npy"), dates)
+        meta = {"pillars": {}}
+        for kind, (pillars, quotes) in panels.items():
+            quotes = np.asarray(quotes, dtype=float)
+            if quotes.shape != (len(dates), len(pillars)):
+                raise ValueError(f"{kind}: cotations de forme {quotes.shape}, attendu {(len(dates), len(pillars))}")
+            np.save(os.path.join(path, f"{kind}.npy"), quotes)
+            meta["pillars"][kind] = [float(T) for T in pillars]
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return cls(path)
+
+    def _array(self, name: str) -> np.ndarray:
+        # ouverture paresseuse, en lecture seule et sans copie
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._arrays[name]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._array("dates")
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def date_slice(self, start=None, end=None) -> slice:
+        """
+        Indices des dates de [start, end] (bornes incluses, None = pas de borne),
+        par recherche dichotomique sur les dates triées.
+        """
+        dates = self.dates
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return slice(lo, hi)
+
+    def window(self, kind: str, start=None, end=None) -> tuple:
+        """
+        Cotations d'une courbe sur une plage de dates (vues sur le fichier mappé).
+
+        :param kind: "ois" ou "ibor"
+        :return: (dates (n,), cotations (n x n_piliers))
+        """
+        if kind not in self.pillars:
+            raise ValueError(f"courbe absente du store: {kind}")
+        rows = self.date_slice(start, end)
+        return self.dates[rows], self._array(kind)[rows]
+
+    def quotes_on(self, kind: str, date=None) -> dict:
+        """
+        Cotations {Maturité: Taux} à une date (dernière date connue <= date ;
+        par défaut la plus récente), au format de get_mock_ois_quotes.
+        """
+        rows = self.date_slice(end=date)
+        if rows.stop == 0:
+            raise ValueError(f"aucune cotation avant le {date}")
+        quotes = self._array(kind)[rows.stop - 1]
+        return {float(T): float(q) for T, q in zip(self.pillars[kind], quotes)}
+
+
+def generate_mock_history(path: str, n_days: int = 2520, end_date: str = "2026-01-30",
+                          daily_vol: float = 0.0004, seed: int = 42) -> HistoricalQuoteStore:
+    """
+    Historique fictif de jours ouvrés finissant sur les cotations mock :
+    marche aléatoire des taux (facteur commun + composante propre à chaque
+    pilier), en attendant de vraies données.
+
+    :param n_days: Nombre de jours ouvrés (2520 ~ 10 ans)
+    :param daily_vol: Écart-type des variations quotidiennes
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(end_date, "D")
+    dates = np.busday_offset(end, -np.arange(n_days)[::-1], roll="backward")
+
+    panels = []
+    for quotes in (get_mock_ois_quotes(), get_mock_ibor_quotes()):
+        pillars = np.array(sorted(quotes))
+        last = np.array([quotes[T] for T in pillars])
+        common = rng.normal(0.0, daily_vol, size=(n_days, 1))
+        own = rng.normal(0.0, daily_vol / 2, size=(n_days, len(pillars)))
+        walk = np.cumsum(common + own, axis=0)
+        panels.append((pillars, last + walk - walk[-1]))
+
+    (ois_pillars, ois), (ibor_pillars, ibor) = panels
+    return HistoricalQuoteStore.write(path, dates, ois_pillars, ois, ibor_pillars, ibor)
+
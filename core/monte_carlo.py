@@ -0,0 +1,99 @@
+# Couche d'exécution Monte Carlo partagée par les pricers
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+
+def _run_chunk(task, stream: np.random.SeedSequence, size: int):
+    # fonction de module pour pouvoir être envoyée à un pool de processus
+    return task(np.random.default_rng(stream), size)
+
+
+class MonteCarloEngine:
+    """
+    Exécution parallèle et reproductible des simulations Monte Carlo.
+
+    Les trajectoires sont découpées en paquets de taille fixe (chunk_size) ;
+    le paquet k reçoit le k-ième flux de SeedSequence(seed).spawn, ses
+    tirages ne dépendent donc que de (seed, k). Les paquets tournent en série
+    ou sur un pool de threads / processus et les résultats sont fusionnés
+    dans l'ordre des paquets : pour une graine donnée, le résultat est
+    identique au bit près quel que soit le nombre de workers.
+
+    Une tâche est une fonction task(rng, size) qui simule size trajectoires
+    avec le générateur rng et renvoie un tableau (ou un tuple de tableaux).
+    En mode "process", la tâche doit être picklable (fonction de module,
+    méthode ou functools.partial d'un objet picklable).
+    """
+
+    def __init__(self, seed: int = 42, chunk_size: int = 4096, n_workers: int = 1, executor: str = "thread"):
+        """
+        :param seed: Graine racine de la SeedSequence
+        :param chunk_size: Nombre de trajectoires par paquet (fixe le découpage, donc les tirages)
+        :param n_workers: Nombre de workers (1 = exécution en série)
+        :param executor: "thread" ou "process"
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor inconnu: {executor}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size doit être >= 1: {chunk_size}")
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.executor = executor
+
+    def chunk_sizes(self, n_paths: int) -> list:
+        """Tailles des paquets pour n_paths trajectoires (indépendantes du nombre de workers)."""
+        n_full, rest = divmod(n_paths, self.chunk_size)
+        return [self.chunk_size] * n_full + ([rest] if rest else [])
+
+    def map(self, task, sizes: list) -> list:
+        """
+        Exécute task(rng_k, sizes[k]) pour chaque paquet k.
+
+        :param task: Fonction (rng, size) -> résultat
+        :param sizes: Taille de chaque paquet
+        :return: Liste des résultats, dans l'ordre des paquets
+        """
+        streams = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        if self.n_workers <= 1 or len(sizes) <= 1:
+            return [_run_chunk(task, stream, size) for stream, size in zip(streams, sizes)]
+
+        pool_class = ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+        with pool_class(max_workers=min(self.n_workers, len(sizes))) as pool:
+            return list(pool.map(_run_chunk, [task] * len(sizes), streams, sizes))
+
+    def run(self, task, n_paths: int) -> list:
+        """Simule n_paths trajectoires par paquets ; renvoie les résultats par paquet."""
+        return self.map(task, self.chunk_sizes(n_paths))
+
+    def run_concat(self, task, n_paths: int, axis: int = 0):
+        """
+        Comme run, en concaténant les résultats des paquets le long de axis.
+        Si la tâche renvoie un tuple, chaque composante est concaténée
+        séparément (une composante None reste None).
+        """
+        return concat_chunks(self.run(task, n_paths), axis)
+
+
+def concat_chunks(results: list, axis: int = 0):
+    """Concatène des résultats par paquet (tableaux ou tuples de tableaux)."""
+    if isinstance(results[0], tuple):
+        return tuple(
+            None if parts[0] is None else np.concatenate(parts, axis=axis)
+            for parts in zip(*results)
+        )
+    return np.concatenate(results, axis=axis)
+
+
+if __name__ == "__main__":
+    # test rapide : même résultat en série, sur threads et sur processus
+    def task(rng, size):
+        return rng.normal(size=size)
+
+    serial = MonteCarloEngine(seed=7, chunk_size=1000).run_concat(task, 10_500)
+    threads = MonteCarloEngine(seed=7, chunk_size=1000, n_workers=4).run_concat(task, 10_500)
+    procs = MonteCarloEngine(seed=7, chunk_size=1000, n_workers=4, executor="process").run_concat(task, 10_500)
+    print(f"moyenne: {serial.mean():.6f}")
+    print(f"identique threads: {np.array_equal(serial, threads)}, processus: {np.array_equal(serial, procs)}")
@@ -0,0 +1,166 @@
+# Cache de trajectoires Hull-White partagé : mémoire (LRU) puis disque (.npy mappés)
+import hashlib
+import os
+import threading
+from functools import partial
+
+import numpy as np
+
+from core.hull_white import HullWhiteModel
+from core.monte_carlo import MonteCarloEngine
+from core.utils import LRUCache
+
+
+def path_key(hw_model: HullWhiteModel, grid, n_paths: int, mc_engine: MonteCarloEngine,
+             antithetic: bool = False, integral: bool = False) -> str:
+    """
+    Clé des trajectoires : paramètres du modèle, grille, nombre de chemins,
+    découpage des flux aléatoires (graine, taille des paquets) et contenu
+    (x seul ou x et son intégrale). Le nombre de workers n'en fait pas
+    partie : il ne change pas les trajectoires.
+    """
+    grid = np.ascontiguousarray(grid, dtype=float)
+    payload = repr((hw_model.fingerprint(), hashlib.sha1(grid.tobytes()).hexdigest(), int(n_paths),
+                    mc_engine.seed, mc_engine.chunk_size, bool(antithetic), bool(integral)))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _x_chunk(hw_model, grid, antithetic, rng, n):
+    return hw_model.simulate_x(grid, rng, n, antithetic=antithetic)
+
+
+def _x_integral_chunk(hw_model, grid, rng, n):
+    return np.stack(hw_model.simulate_x_integral(grid, rng, n), axis=1)
+
+
+class PathStore(LRUCache):
+    """
+    Trajectoires du facteur x de Hull-White, partagées entre pricers
+    (range accrual, expositions, Longstaff-Schwartz) et entre runs.
+
+    Deux niveaux :
+    - mémoire : LRU de max_size tableaux (lecture seule) ;
+    - disque (si spill_dir) : les tableaux évincés de la mémoire sont écrits
+      en .npy et relus en mémoire mappée, sans copie ; les fichiers d'un
+      run précédent dans le même répertoire sont réutilisés.
+    Un hit, en mémoire comme sur disque, évite toute simulation.
+    """
+
+    def __init__(self, max_size: int = 8, spill_dir: str = None):
+        """
+        :param max_size: Nombre de jeux de trajectoires gardés en mémoire
+        :param spill_dir: Répertoire du niveau disque (None = pas de niveau disque)
+        """
+        super().__init__(max_size)
+        self.spill_dir = spill_dir
+        self.disk_hits = 0
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.npy")
+
+    def _spill(self, key: str, paths: np.ndarray):
+        # écriture via un fichier temporaire : un .npy présent est toujours complet
+        target = self._disk_path(key)
+        if isinstance(paths, np.memmap) or os.path.exists(target):
+            return
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+        np.save(tmp, paths)
+        os.replace(tmp, target)
+
+    def _build(self, key: str, build) -> np.ndarray:
+        # niveau disque d'abord, simulation sinon (hors du verrou du cache)
+        if self.spill_dir is not None and os.path.exists(self._disk_path(key)):
+            paths = np.load(self._disk_path(key), mmap_mode="r")
+            with self._lock:
+                self.disk_hits += 1
+            return paths
+        paths = super()._build(key, build)
+        paths.flags.writeable = False
+        return paths
+
+    def _evict(self, key: str, paths: np.ndarray):
+        if self.spill_dir is not None:
+            self._spill(key, paths)
+
+    def flush(self):
+        """Écrit sur disque tous les tableaux encore seulement en mémoire."""
+        if self.spill_dir is not None:
+            with self._lock:
+                items = list(self._items.items())
+            for key, paths in items:
+                self._spill(key, paths)
+
+    def hull_white_paths(self, hw_model: HullWhiteModel, grid, n_paths: int, mc_engine: MonteCarloEngine = None,
+                         antithetic: bool = False) -> np.ndarray:
+        """
+        Trajectoires x (n_paths x n_dates) sur la grille, simulées par le
+        moteur Monte Carlo au premier appel (mêmes flux que
+        HullWhiteModel.simulate_x paquet par paquet), relues ensuite.
+
+        :param mc_engine: Moteur Monte Carlo (graine et paquets) ; par défaut MonteCarloEngine()
+        :param antithetic: Paires (x, -x)
+        """
+        mc_engine = mc_engine if mc_engine is not None else MonteCarloEngine()
+        grid = np.asarray(grid, dtype=float)
+        key = path_key(hw_model, grid, n_paths, mc_engine, antithetic)
+        return self.get_or_build(key, lambda: mc_engine.run_concat(partial(_x_chunk, hw_model, grid, antithetic), n_paths))
+
+    def hull_white_integral_paths(self, hw_model: HullWhiteModel, grid, n_paths: int,
+                                  mc_engine: MonteCarloEngine = None) -> np.ndarray:
+        """
+        Trajectoires jointes de x et de son intégrale I (n_paths x 2 x n_dates),
+        HullWhiteModel.simulate_x_integral paquet par paquet : [:, 0] est x
+        (identique à hull_white_paths), [:, 1] est I, pour l'actualisation
+        trajectorielle (Longstaff-Schwartz).
+        """
+        mc_engine = mc_engine if mc_engine is not None else MonteCarloEngine()
+        grid = np.asarray(grid, dtype=float)
+        key = path_key(hw_model, grid, n_paths, mc_engine, integral=True)
+        return self.get_or_build(key, lambda: mc_engine.run_concat(partial(_x_integral_chunk, hw_model, grid), n_paths))
+
+    @staticmethod
+    def chunks(paths: np.ndarray, chunk_size: int):
+        """
+        Paquets de lignes successifs (vues) : sur un tableau mappé, seules
+        les pages du paquet courant sont lues.
+        """
+        for start in range(0, paths.shape[0], chunk_size):
+            yield paths[start:start + chunk_size]
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["disk_hits"] = self.disk_hits
+        return stats
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self.disk_hits = 0
+
+
+# Instance partagée par tout le processus
+path_store = PathStore()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    # test rapide : 20 000 chemins quotidiens sur 5 ans, puis relecture mémoire et disque
+    hw = HullWhiteModel(0.03, 0.01)
+    grid = np.arange(0, 5 * 252 + 1) / 252
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PathStore(max_size=1, spill_dir=tmp)
+        for label in ("simulation", "mémoire"):
+            start = time.perf_counter()
+            x = store.hull_white_paths(hw, grid, 20_000)
+            print(f"{label}: {time.perf_counter() - start:.3f}s")
+
+        store.hull_white_paths(HullWhiteModel(0.05, 0.01), grid, 20_000)  # évince le premier jeu sur disque
+        start = time.perf_counter()
+        y = store.hull_white_paths(hw, grid, 20_000)
+        print(f"disque: {time.perf_counter() - start:.3f}s, identique: {np.array_equal(x, y)}, {type(y).__name__}")
+        print(store.stats())
+        del x, y
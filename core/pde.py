@@ -0,0 +1,316 @@
+# EDP de Hull-White par différences finies (Crank-Nicolson) calibrée sur la courbe
+import numpy as np
+from scipy.linalg import solve_banded
+
+from core.curves import ZeroCouponCurve
+from core.hull_white import HullWhiteModel
+from core.utils import LRUCache
+
+
+def _tridiag_dot(lower, diag, upper, v):
+    # produit d'une matrice tridiagonale (diagonales de même longueur n, lower[0] et upper[-1] ignorés)
+    # par v, de forme (n,) ou (n, m)
+    if v.ndim == 2:
+        lower, diag, upper = lower[:, None], diag[:, None], upper[:, None]
+    out = diag * v
+    out[1:] += lower[1:] * v[:-1]
+    out[:-1] += upper[:-1] * v[1:]
+    return out
+
+
+class HullWhitePDE:
+    """
+    EDP de Hull-White en x = r - alpha(t) :
+        V_t - a x V_x + 0.5 sigma^2 V_xx - (x + alpha(t)) V = 0,
+    résolue par Crank-Nicolson sur une grille uniforme en x (x = 0 est un
+    noeud) ; chaque pas est un système tridiagonal (solve_banded).
+
+    alpha, constant sur chaque pas de temps, se factorise hors de l'opérateur
+    en x (exp(-alpha dt)) : comme pour l'arbre trinomial, il est ajusté pas à
+    pas par induction avant des prix d'Arrow-Debreu (schéma adjoint du
+    rollback), de sorte que la grille reprice exactement les facteurs
+    d'actualisation de la courbe aux dates de la grille.
+
+    Aux bords, la diffusion est coupée et la convection (rentrante) est
+    décentrée vers l'intérieur : la matrice reste tridiagonale et aucune
+    condition extérieure n'est nécessaire.
+
+    Le rollback accepte des tableaux (noeuds x produits) : tous les trades
+    d'un livre remontent en une seule résolution par pas.
+    """
+
+    def __init__(self, hw_model: HullWhiteModel, discount_curve: ZeroCouponCurve, times,
+                 steps_per_year: int = 50, n_x: int = 201, n_std: float = 6.0, theta: float = 0.5):
+        """
+        :param hw_model: Modèle Hull-White (a, sigma)
+        :param discount_curve: Courbe à repricer
+        :param times: Dates d'évènements (paiements, exercices) ; la grille les contient toutes et commence à 0
+        :param steps_per_year: Nombre minimal de pas de temps par an entre deux évènements
+        :param n_x: Nombre de noeuds en x (rendu impair pour que x = 0 soit un noeud)
+        :param n_std: Demi-largeur de la grille, en écarts-types de x à l'horizon
+        :param theta: 0.5 = Crank-Nicolson, 1 = implicite
+        """
+        if np.any(np.asarray(hw_model.sigma) <= 0):
+            raise ValueError(f"sigma doit être > 0 pour construire la grille: {hw_model.sigma}")
+        events = np.unique(np.concatenate(([0.0], np.asarray(times, dtype=float))))
+        if events[0] < 0:
+            raise ValueError("les dates de la grille doivent être >= 0")
+        if not hw_model.is_constant:
+            # sigma constant sur chaque pas : les noeuds de sigma sont des dates de la grille
+            knots = hw_model.sigma_times
+            events = np.unique(np.concatenate((events, knots[knots < events[-1]])))
+
+        self.hw = hw_model
+        self.curve = discount_curve
+        self.theta = theta
+        self.times = self._refine(events, steps_per_year)
+        self.dt = np.diff(self.times)
+        self.n_steps = len(self.dt)
+
+        n_x = n_x + 1 - n_x % 2
+        half_width = n_std * np.sqrt(hw_model.calc_variance(self.times[-1]))
+        self.x = np.linspace(-half_width, half_width, n_x)
+        self.mid = n_x // 2
+        self.dx = self.x[1] - self.x[0]
+
+        self._operators = {}
+        self._fit_drift()
+
+    @staticmethod
+    def _refine(events, steps_per_year) -> np.ndarray:
+        # chaque intervalle entre évènements est découpé en pas égaux d'au plus 1/steps_per_year
+        pieces = [events[:1]]
+        for t0, t1 in zip(events[:-1], events[1:]):
+            n = max(int(np.ceil((t1 - t0) * steps_per_year - 1e-9)), 1)
+            pieces.append(t0 + (t1 - t0) * np.arange(1, n + 1) / n)
+        times = np.concatenate(pieces)
+        times[np.searchsorted(times, events[1:] - 1e-12)] = events[1:]  # évènements exacts
+        return times
+
+    def _generator(self, sigma: float):
+        # opérateur en x (sans alpha) : diagonales inférieure, principale, supérieure
+        a, x, dx = self.hw.a, self.x, self.dx
+        drift = -a * x
+        diffusion = 0.5 * sigma ** 2 / dx ** 2
+        lower = diffusion - drift / (2 * dx)
+        diag = np.full_like(x, -2.0 * diffusion) - x
+        upper = diffusion + drift / (2 * dx)
+
+        # bords : convection décentrée vers l'intérieur, pas de diffusion
+        lower[0], upper[0], diag[0] = 0.0, drift[0] / dx, -drift[0] / dx - x[0]
+        lower[-1], upper[-1], diag[-1] = -drift[-1] / dx, 0.0, drift[-1] / dx - x[-1]
+        return lower, diag, upper
+
+    def _operator(self, level_index: int) -> tuple:
+        """
+        Matrices du pas i (mises en cache par longueur de pas et sigma : une
+        grille uniforme par intervalle n'en a que quelques-unes) : bandes de
+        I - theta dt L et de sa transposée, diagonales de I + (1 - theta) dt L.
+        """
+        dt = self.dt[level_index]
+        sigma = float(self.hw.sigma_at(self.times[level_index]))
+        key = (round(float(dt), 12), sigma)
+        operator = self._operators.get(key)
+        if operator is None:
+            lower, diag, upper = self._generator(sigma)
+            n = len(diag)
+            implicit = np.zeros((3, n))
+            implicit[0, 1:] = -self.theta * dt * upper[:-1]
+            implicit[1] = 1.0 - self.theta * dt * diag
+            implicit[2, :-1] = -self.theta * dt * lower[1:]
+            implicit_t = np.zeros((3, n))
+            implicit_t[0, 1:] = implicit[2, :-1]
+            implicit_t[1] = implicit[1]
+            implicit_t[2, :-1] = implicit[0, 1:]
+            c = (1.0 - self.theta) * dt
+            explicit = (c * lower, 1.0 + c * diag, c * upper)
+            operator = (implicit, implicit_t, explicit)
+            self._operators[key] = operator
+        return operator
+
+    def _fit_drift(self):
+        # Induction avant : q_{i+1} = exp(-alpha_i dt) S_i' q_i, alpha_i choisi pour repricer P(0, t_{i+1})
+        dfs = self.curve.get_discount_factor(self.times)
+        self.alpha = np.zeros(self.n_steps)
+        q = np.zeros(len(self.x))
+        q[self.mid] = 1.0
+        self.arrow_debreu = [q]
+
+        for i, dt in enumerate(self.dt):
+            implicit, implicit_t, (lower, diag, upper) = self._operator(i)
+            # transposée de l'explicite : les diagonales hors-diagonale échangent leur rôle, décalées d'un cran
+            y = solve_banded((1, 1), implicit_t, q)
+            up_t = np.zeros_like(lower)
+            low_t = np.zeros_like(upper)
+            up_t[:-1] = lower[1:]
+            low_t[1:] = upper[:-1]
+            q_free = _tridiag_dot(low_t, diag, up_t, y)
+
+            self.alpha[i] = (np.log(q_free.sum()) - np.log(dfs[i + 1])) / dt
+            q = q_free * np.exp(-self.alpha[i] * dt)
+            self.arrow_debreu.append(q)
+
+    def short_rates(self, level_index: int) -> np.ndarray:
+        """Taux courts des noeuds au niveau i."""
+        return self.alpha[min(level_index, self.n_steps - 1)] + self.x
+
+    def levels(self, t, tol: float = 1e-9) -> np.ndarray:
+        """Niveaux de la grille aux dates t (qui doivent être des noeuds de la grille)."""
+        t = np.asarray(t, dtype=float)
+        i = np.minimum(np.searchsorted(self.times, t - tol), self.n_steps)
+        off = np.abs(self.times[i] - t) > tol
+        if np.any(off):
+            raise ValueError(f"dates hors de la grille: {t[off][:5]}")
+        return i
+
+    def rollback(self, values_next: np.ndarray, level_index: int) -> np.ndarray:
+        """
+        Espérance actualisée d'un pas : valeurs au niveau i+1 -> niveau i.
+        values_next peut être 2-D (noeuds x produits).
+
+        :param values_next: Valeurs au niveau i+1
+        :param level_index: Niveau i
+        """
+        i = level_index
+        implicit, _, (lower, diag, upper) = self._operator(i)
+        rhs = _tridiag_dot(lower, diag, upper, values_next)
+        values = solve_banded((1, 1), implicit, rhs, overwrite_b=True, check_finite=False)
+        return values * np.exp(-self.alpha[i] * self.dt[i])
+
+    def fit_error(self) -> float:
+        """Écart maximal |sum_j Q(i, j) - P(0, t_i)| (contrôle de calibration)."""
+        dfs = self.curve.get_discount_factor(self.times)
+        sums = np.array([q.sum() for q in self.arrow_debreu])
+        return float(np.max(np.abs(sums - dfs)))
+
+    def price_cancellable(self, book, compounding: str = "continuous",
+                          projection_curve: ZeroCouponCurve = None) -> np.ndarray:
+        """
+        Valeurs en t=0 d'un livre de swaps annulables (CancellableSwapBook),
+        tous remontés ensemble sur la grille.
+
+        Colonnes remontées : une par trade (valeur des périodes restantes
+        pour le détenteur du swap) et une par zéro-coupon de maturité
+        distincte (fin ou paiement de période, remis à 1 à sa maturité), lu
+        au début des périodes. La période k vaut en son début
+        N alpha (forward + spread - K) P(début, paiement), forward tiré de
+        P(début, fin) ; une courbe de projection distincte ajoute un écart
+        déterministe, comme dans les autres moteurs Hull-White. À une date
+        d'exercice, les périodes qui commencent à cette date ou après sont
+        annulées : max(V, 0) si le détenteur exerce, min(V, 0) sinon.
+
+        :param book: Livre de swaps annulables (toutes ses dates doivent être sur la grille)
+        :param compounding: Convention des forwards ("continuous" ou "simple")
+        :param projection_curve: Courbe de projection (par défaut la courbe de la grille)
+        :return: Tableau (n_trades,)
+        """
+        if compounding not in ("continuous", "simple"):
+            raise ValueError(f"composition inconnue: {compounding}")
+        block = book.block
+        mask = block.mask
+        rows, _ = np.nonzero(mask)
+        starts, ends, pays = block.starts[mask], block.ends[mask], block.pay_times[mask]
+        accrual = ends - starts
+        coupon = block.notionals[mask] * accrual
+        carry = block.spreads[mask] - block.fixed_rates[mask]
+
+        # écart de base déterministe projection / actualisation sur chaque période
+        basis = np.zeros(len(starts))
+        if projection_curve is not None:
+            curve = self.curve
+            basis = (np.log(projection_curve.get_discount_factor(starts) / projection_curve.get_discount_factor(ends))
+                     - np.log(curve.get_discount_factor(starts) / curve.get_discount_factor(ends)))
+
+        maturities, bond_col = np.unique(np.concatenate((ends, pays)), return_inverse=True)
+        end_col, pay_col = bond_col[:len(ends)], bond_col[len(ends):]
+        n_trades = block.n_trades
+
+        start_level = self.levels(starts)
+        maturity_level = self.levels(maturities)
+        exercise = book.exercise_times
+        ex_rows, ex_cols = np.nonzero(~np.isnan(exercise))
+        ex_level = self.levels(exercise[ex_rows, ex_cols])
+        holder = book.holder_exercises
+
+        values = np.zeros((len(self.x), n_trades + len(maturities)))
+        last = self.n_steps
+        for i in range(last, -1, -1):
+            if i < last:
+                values = self.rollback(values, i)
+
+            ones = n_trades + np.nonzero(maturity_level == i)[0]
+            values[:, ones] = 1.0
+
+            periods = np.nonzero(start_level == i)[0]
+            if len(periods):
+                log_ratio = -np.log(values[:, n_trades + end_col[periods]]) + basis[periods]
+                if compounding == "continuous":
+                    fwd = log_ratio / accrual[periods]
+                else:
+                    fwd = np.expm1(log_ratio) / accrual[periods]
+                cash = coupon[periods] * (fwd + carry[periods]) * values[:, n_trades + pay_col[periods]]
+                values[:, rows[periods]] += cash
+
+            calls = ex_rows[ex_level == i]
+            if len(calls):
+                own = calls[holder[calls]]
+                other = calls[~holder[calls]]
+                values[:, own] = np.maximum(values[:, own], 0.0)
+                values[:, other] = np.minimum(values[:, other], 0.0)
+
+        return values[self.mid, :n_trades].copy()
+
+
+# Une même grille sert à tous les produits partageant (courbe, a, sigma, dates)
+pde_cache = LRUCache(max_size=16)
+
+
+def get_hull_white_pde(hw_model: HullWhiteModel, discount_curve: ZeroCouponCurve, times,
+                       steps_per_year: int = 50, n_x: int = 201, n_std: float = 6.0) -> HullWhitePDE:
+    """
+    Grille EDP calibrée, construite une seule fois par état de marché.
+
+    :param hw_model: Modèle Hull-White (a, sigma)
+    :param discount_curve: Courbe d'actualisation
+    :param times: Dates d'évènements
+    :param steps_per_year: Pas de temps minimal par an
+    :param n_x: Nombre de noeuds en x
+    :param n_std: Demi-largeur de la grille, en écarts-types
+    """
+    times = np.unique(np.asarray(times, dtype=float))
+    key = (discount_curve.fingerprint(), hw_model.fingerprint(), times.tobytes(), int(steps_per_year), int(n_x),
+           float(n_std))
+    return pde_cache.get_or_build(key, lambda: HullWhitePDE(hw_model, discount_curve, times, steps_per_year, n_x, n_std))
+
+
+if __name__ == "__main__":
+    import time
+
+    from core.longstaff_schwartz import CancellableSwapBook
+    from core.portfolio import SwapBlock, regular_schedules
+    from pricers.callable_swap import CallableSwapPricer
+
+    # test rapide : callable 10 ans annuel (recevoir le fixe), comparé à l'arbre trinomial
+    curve = ZeroCouponCurve([0.5, 1, 2, 5, 10, 30], [0.025, 0.027, 0.03, 0.032, 0.033, 0.034])
+    hw = HullWhiteModel(0.03, 0.01)
+    times = list(np.arange(0, 11.0))
+    tree = CallableSwapPricer(1e6, 0.032, times, times[1:-1], curve, hw, steps_per_period=48).price()
+
+    start = time.perf_counter()
+    pde = HullWhitePDE(hw, curve, times)
+    single = CancellableSwapBook(SwapBlock([-1e6], [0.032], [times]), [times[1:-1]], holder_exercises=False)
+    value = pde.price_cancellable(single)[0]
+    print(f"callable : EDP {value:,.2f} / arbre {tree:,.2f} en {(time.perf_counter() - start) * 1e3:.0f} ms, "
+          f"erreur de calibration {pde.fit_error():.1e}")
+
+    # livre de 1000 callables / puttables annuels sur la même grille
+    rng = np.random.default_rng(0)
+    n = 1000
+    schedules = regular_schedules(rng.integers(2, 16, size=n), 1)
+    calls = np.where(schedules[:, 1:-1] >= rng.integers(1, 3, size=n)[:, None], schedules[:, 1:-1], np.nan)
+    book = CancellableSwapBook(SwapBlock(rng.uniform(1e6, 1e7, size=n) * rng.choice([-1, 1], size=n),
+                                         rng.uniform(0.02, 0.045, size=n), schedules),
+                               calls, holder_exercises=rng.random(n) < 0.5)
+    start = time.perf_counter()
+    values = HullWhitePDE(hw, curve, np.arange(0, 16.0)).price_cancellable(book)
+    print(f"{n} swaps annulables en {(time.perf_counter() - start) * 1e3:.0f} ms")
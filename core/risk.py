@@ -0,0 +1,179 @@
+# Sensibilités par pilier (DV01 / key-rate) communes à tous les pricers
+import numpy as np
+
+from core.adjoint import quote_gradient
+from core.curve_cache import get_ois_curve, get_zero_curve
+from core.portfolio import PortfolioPricer, SwapBlock
+
+
+def pricer_trade(factory, method: str = "price"):
+    """
+    Interface commune de revalorisation d'un pricer unitaire.
+
+    :param factory: Fonction (ois_curve, ibor_curve) -> pricer
+    :param method: Méthode de pricing à appeler (ex: "price", "price_constant_notional")
+    :return: Fonction (ois_curve, ibor_curve) -> PV. Les pricers qui renvoient
+             un tuple (pv, détails...) sont ramenés à leur PV.
+    """
+    def revalue(ois_curve, ibor_curve):
+        result = getattr(factory(ois_curve, ibor_curve), method)()
+        return result[0] if isinstance(result, tuple) else result
+    return revalue
+
+
+def block_trade(block: SwapBlock, projection: str = "ois", compounding: str = "continuous"):
+    """
+    Interface commune pour un bloc de swaps (une PV par trade du bloc).
+
+    :param block: Bloc de swaps linéaires
+    :param projection: Courbe de projection des forwards : "ois" ou "ibor"
+    :param compounding: Convention des forwards
+    """
+    def revalue(ois_curve, ibor_curve):
+        projection_curve = ibor_curve if projection == "ibor" else None
+        return PortfolioPricer(ois_curve, projection_curve, compounding).price(block)
+    return revalue
+
+
+class KeyRateEngine:
+    """
+    DV01 par pilier : chaque cotation OIS passée au bootstrap (et chaque
+    noeud zéro IBOR) est choquée de bump, les courbes choquées sont
+    construites une seule fois (via le cache de courbes) puis partagées par
+    tous les trades. Une échelle complète coûte (n_buckets + 1)
+    revalorisations du portefeuille, quel que soit le nombre de trades.
+
+    Un trade est une fonction (ois_curve, ibor_curve) -> PV (float, ou
+    tableau pour un bloc), voir pricer_trade et block_trade.
+    """
+
+    def __init__(self, ois_quotes: dict, ibor_zero_rates: dict = None, bump: float = 1e-4,
+                 ois_name: str = "EUR-OIS", ibor_name: str = "EUR-IBOR-3M", method: str = "newton",
+                 ibor_tabulation_step: float = None):
+        """
+        :param ois_quotes: Cotations OIS {Maturité: Taux fixe} passées au bootstrap
+        :param ibor_zero_rates: Noeuds zéro IBOR {Maturité: Taux zéro} (optionnel)
+        :param bump: Choc appliqué à chaque pilier (1e-4 = 1bp)
+        :param ois_name: Nom de la courbe OIS
+        :param ibor_name: Nom de la courbe IBOR
+        :param method: Méthode de bootstrap OIS
+        :param ibor_tabulation_step: Pas du mode tabulé de la courbe IBOR
+        """
+        self.ois_quotes = dict(ois_quotes)
+        self.ibor_zero_rates = dict(ibor_zero_rates) if ibor_zero_rates is not None else None
+        self.bump = bump
+        self.ois_name = ois_name
+        self.ibor_name = ibor_name
+        self.method = method
+        self.ibor_tabulation_step = ibor_tabulation_step
+
+        self.buckets = [("OIS", T) for T in sorted(self.ois_quotes)]
+        if self.ibor_zero_rates is not None:
+            self.buckets += [("IBOR", T) for T in sorted(self.ibor_zero_rates)]
+        self._bumped = None
+
+    def bucket_labels(self) -> list:
+        return [f"{kind} {T:g}Y" for kind, T in self.buckets]
+
+    def _ois_curve(self, quotes: dict):
+        return get_ois_curve(quotes, self.ois_name, self.method)
+
+    def _ibor_curve(self, zero_rates: dict):
+        if zero_rates is None:
+            return None
+        return get_zero_curve(zero_rates, self.ibor_name, self.ibor_tabulation_step)
+
+    def base_curves(self) -> tuple:
+        """(courbe OIS, courbe IBOR) non choquées."""
+        return self._ois_curve(self.ois_quotes), self._ibor_curve(self.ibor_zero_rates)
+
+    def bumped_curves(self) -> list:
+        """
+        Paires (courbe OIS, courbe IBOR) choquées, une par bucket, construites
+        en un seul passage au premier appel. La courbe non choquée d'une paire
+        est l'objet de base lui-même (partagé avec les caches des moteurs).
+        """
+        if self._bumped is None:
+            ois_base, ibor_base = self.base_curves()
+            self._bumped = []
+            for kind, T in self.buckets:
+                if kind == "OIS":
+                    quotes = dict(self.ois_quotes)
+                    quotes[T] += self.bump
+                    self._bumped.append((self._ois_curve(quotes), ibor_base))
+                else:
+                    zero_rates = dict(self.ibor_zero_rates)
+                    zero_rates[T] += self.bump
+                    self._bumped.append((ois_base, self._ibor_curve(zero_rates)))
+        return self._bumped
+
+    @staticmethod
+    def revalue(trades: list, ois_curve, ibor_curve) -> np.ndarray:
+        """PV de tous les trades (les blocs contribuent une ligne par trade)."""
+        return np.concatenate([
+            np.atleast_1d(np.asarray(trade(ois_curve, ibor_curve), dtype=float))
+            for trade in trades
+        ])
+
+    def dv01(self, trades: list) -> np.ndarray:
+        """
+        Matrice trades x buckets des variations de PV pour un choc de +bump
+        sur chaque pilier.
+
+        :param trades: Liste de fonctions (ois_curve, ibor_curve) -> PV
+        """
+        base = self.revalue(trades, *self.base_curves())
+        ladder = np.empty((len(base), len(self.buckets)))
+        for k, curves in enumerate(self.bumped_curves()):
+            ladder[:, k] = self.revalue(trades, *curves) - base
+        return ladder
+
+    def dv01_adjoint(self, block: SwapBlock, projection: str = "ois", compounding: str = "continuous") -> np.ndarray:
+        """
+        Échelle de DV01 d'un bloc au premier ordre, par différentiation
+        adjointe : une passe avant et une passe inverse sur les courbes de
+        base, sans aucune courbe choquée. Les buckets OIS passent par la
+        jacobienne dy/dq du bootstrap. Mêmes colonnes que dv01 ; l'écart avec
+        les chocs finis est d'ordre bump^2.
+
+        :param block: Bloc de swaps linéaires
+        :param projection: Courbe de projection des forwards : "ois" ou "ibor"
+        :param compounding: Convention des forwards
+        """
+        ois_curve, ibor_curve = self.base_curves()
+        projection_curve = ibor_curve if projection == "ibor" else None
+        grads = PortfolioPricer(ois_curve, projection_curve, compounding).price_and_gradient(block)
+
+        ois_nodes = grads["discount"]
+        if projection_curve is None:
+            ois_nodes = ois_nodes + grads["projection"]
+        columns = [quote_gradient(ois_curve, ois_nodes)]
+        if self.ibor_zero_rates is not None:
+            ibor_nodes = grads["projection"] if projection_curve is not None else np.zeros((block.n_trades, len(ibor_curve.times)))
+            columns.append(ibor_nodes)
+        return np.hstack(columns) * self.bump
+
+
+if __name__ == "__main__":
+    from core.market_data import get_mock_ibor_quotes, get_mock_ois_quotes
+    from core.portfolio import regular_schedules
+    from pricers.constant_notional_swap import ConstantNotionalSwapPricer
+    from pricers.step_up_swap import StepUpPricer
+
+    # test rapide : deux pricers unitaires et un bloc de 1000 swaps
+    engine = KeyRateEngine(get_mock_ois_quotes(), get_mock_ibor_quotes())
+    rng = np.random.default_rng(0)
+    block = SwapBlock(np.full(1000, 1e6), rng.uniform(0.02, 0.05, 1000),
+                      regular_schedules(rng.integers(1, 11, 1000), 4))
+    trades = [
+        pricer_trade(lambda ois, ibor: ConstantNotionalSwapPricer(1e6, 5, 4, 0.03, ois, ibor),
+                     "price_constant_notional"),
+        pricer_trade(lambda ois, ibor: StepUpPricer(1e6, [0, 1, 2, 3], [0.02, 0.025, 0.03], ois)),
+        block_trade(block),
+    ]
+    ladder = engine.dv01(trades)
+    print(engine.bucket_labels())
+    print(np.round(ladder[:2], 2))
+    print(f"bloc : DV01 total {ladder[2:].sum():,.2f} sur {ladder.shape[0] - 2} trades")
+    adjoint = engine.dv01_adjoint(block)
+    print(f"bloc (adjoint) : DV01 total {adjoint.sum():,.2f}, écart max {np.max(np.abs(adjoint - ladder[2:])):.2e}")
@@ -0,0 +1,155 @@
+# Courbes à axe de scénarios : S jeux de noeuds zéro évalués en une passe
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+from core.curves import ZeroCouponCurve
+
+
+class ScenarioCurve:
+    """
+    Cube de courbes zéro-coupon : S jeux de taux aux mêmes noeuds, stockés
+    dans un tableau (S x n_noeuds) et interpolés par une seule spline PCHIP
+    vectorisée sur l'axe des scénarios (mêmes pentes, même extrapolation
+    plate que ZeroCouponCurve, scénario par scénario).
+
+    Même interface que ZeroCouponCurve (get_zero_rate, get_discount_factor,
+    get_forward_rate) : un tableau de dates de forme (...) donne un résultat
+    de forme (S, ...). Le LegEngine et le PortfolioPricer l'acceptent donc
+    directement : les PV deviennent des vecteurs de S scénarios.
+    """
+
+    def __init__(self, dates_in_years, zero_rates, curve_name: str = "Scenarios"):
+        """
+        :param dates_in_years: Maturités des noeuds (n,)
+        :param zero_rates: Taux zéro par scénario (S, n)
+        :param curve_name: Nom du cube de scénarios
+        """
+        times = np.asarray(dates_in_years, dtype=float)
+        rates = np.atleast_2d(np.asarray(zero_rates, dtype=float))
+        if rates.shape[1] != len(times):
+            raise ValueError(f"zero_rates doit être de forme (S, {len(times)}), reçu {rates.shape}")
+
+        order = np.argsort(times)
+        self.times = times[order]
+        self.rates = rates[:, order]
+        self.name = curve_name
+        self.n_scenarios = self.rates.shape[0]
+        self.interpolator = PchipInterpolator(self.times, self.rates, axis=1)
+
+    @classmethod
+    def from_shocks(cls, base_curve: ZeroCouponCurve, shocks, curve_name: str = None) -> "ScenarioCurve":
+        """
+        Scénarios = noeuds de la courbe de base + chocs.
+
+        :param base_curve: Courbe de base
+        :param shocks: Chocs additifs sur les taux zéro (S, n_noeuds)
+        """
+        shocks = np.atleast_2d(np.asarray(shocks, dtype=float))
+        return cls(base_curve.times, base_curve.rates[None, :] + shocks, curve_name or f"{base_curve.name}-scenarios")
+
+    def __len__(self) -> int:
+        return self.n_scenarios
+
+    def scenario(self, k: int) -> ZeroCouponCurve:
+        """Scénario k sous forme de ZeroCouponCurve (contrôles, affichage)."""
+        return ZeroCouponCurve(self.times, self.rates[k], f"{self.name}[{k}]")
+
+    def get_zero_rate(self, t) -> np.ndarray:
+        """
+        Taux zéro de tous les scénarios, extrapolation plate hors des noeuds.
+
+        :param t: Maturités (float ou tableau de forme (...))
+        :return: Tableau (S, ...)
+        """
+        t = np.asarray(t, dtype=float)
+        return self.interpolator(np.clip(t, self.times[0], self.times[-1]))
+
+    def get_discount_factor(self, t) -> np.ndarray:
+        """Facteurs d'actualisation exp(-r t) de tous les scénarios, (S, ...)."""
+        t = np.asarray(t, dtype=float)
+        return np.exp(-self.get_zero_rate(t) * t)
+
+    def get_forward_rate(self, t1, t2) -> np.ndarray:
+        """Forwards continus entre t1 et t2 (diffusés), taux zéro si t1 == t2 ; (S, ...)."""
+        t1, t2 = np.broadcast_arrays(np.asarray(t1, dtype=float), np.asarray(t2, dtype=float))
+        df1 = self.get_discount_factor(t1)
+        df2 = self.get_discount_factor(t2)
+        dt = t2 - t1
+        same = dt == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fwd = -np.log(df2 / df1) / np.where(same, 1.0, dt)
+        return np.where(same, self.get_zero_rate(t1), fwd)
+
+
+def parallel_shifts(base_curve: ZeroCouponCurve, shifts) -> ScenarioCurve:
+    """
+    Translations parallèles de la courbe.
+
+    :param shifts: Chocs (S,) appliqués à tous les noeuds
+    """
+    shifts = np.asarray(shifts, dtype=float)
+    return ScenarioCurve.from_shocks(base_curve, np.repeat(shifts[:, None], len(base_curve.times), axis=1))
+
+
+def twists(base_curve: ZeroCouponCurve, short_shifts, long_shifts) -> ScenarioCurve:
+    """
+    Rotations (pentification / aplatissement) : le choc varie linéairement
+    en maturité, de short_shifts au premier noeud à long_shifts au dernier.
+
+    :param short_shifts: Chocs au premier noeud (S,)
+    :param long_shifts: Chocs au dernier noeud (S,)
+    """
+    times = base_curve.times
+    w = (times - times[0]) / (times[-1] - times[0])
+    short_shifts = np.asarray(short_shifts, dtype=float)[:, None]
+    long_shifts = np.asarray(long_shifts, dtype=float)[:, None]
+    return ScenarioCurve.from_shocks(base_curve, short_shifts + (long_shifts - short_shifts) * w[None, :])
+
+
+def pillar_shocks(base_curve: ZeroCouponCurve, size: float = 1e-4) -> ScenarioCurve:
+    """Un scénario par noeud : le noeud k est choqué de size, les autres sont inchangés."""
+    return ScenarioCurve.from_shocks(base_curve, size * np.eye(len(base_curve.times)))
+
+
+def historical_scenarios(base_curve: ZeroCouponCurve, history, horizon: int = 1,
+                         relative: bool = False) -> ScenarioCurve:
+    """
+    Scénarios historiques : variations observées des taux aux noeuds sur
+    horizon jours (fenêtres glissantes), appliquées à la courbe de base.
+
+    :param history: Historique des taux zéro aux noeuds de la courbe de base (n_dates x n_noeuds)
+    :param horizon: Horizon des variations en nombre d'observations
+    :param relative: Variations relatives (r_base * r(t+h) / r(t)) au lieu d'absolues
+    """
+    history = np.asarray(history, dtype=float)
+    if history.ndim != 2 or history.shape[1] != len(base_curve.times):
+        raise ValueError(f"history doit être de forme (n_dates, {len(base_curve.times)})")
+    if not 1 <= horizon < history.shape[0]:
+        raise ValueError(f"horizon {horizon} incompatible avec {history.shape[0]} observations")
+
+    start, end = history[:-horizon], history[horizon:]
+    if relative:
+        return ScenarioCurve(base_curve.times, base_curve.rates[None, :] * end / start,
+                             f"{base_curve.name}-historical")
+    return ScenarioCurve.from_shocks(base_curve, end - start, f"{base_curve.name}-historical")
+
+
+if __name__ == "__main__":
+    import time
+
+    from core.legs import LegEngine, period_bounds
+
+    # test rapide : swap 10 ans trimestriel sous 5000 translations parallèles
+    base = ZeroCouponCurve([0.5, 1, 2, 5, 10, 30], [0.025, 0.027, 0.03, 0.032, 0.033, 0.034])
+    cube = parallel_shifts(base, np.linspace(-0.02, 0.02, 5000))
+    starts, ends = period_bounds(np.arange(0, 10.25, 0.25))
+
+    start = time.perf_counter()
+    legs = LegEngine(cube)
+    pvs = legs.present_value(legs.floating_cashflows(starts, ends, 1e6) - legs.fixed_cashflows(starts, ends, 1e6, 0.03), ends)
+    print(f"{len(cube)} scénarios en {time.perf_counter() - start:.3f}s")
+
+    k = 1234
+    legs_k = LegEngine(cube.scenario(k))
+    pv_k = legs_k.present_value(legs_k.floating_cashflows(starts, ends, 1e6) - legs_k.fixed_cashflows(starts, ends, 1e6, 0.03), ends)
+    print(f"scénario {k}: cube {pvs[k]:,.4f} / courbe seule {pv_k:,.4f}")
@@ -0,0 +1,150 @@
+# Arbre trinomial Hull-White calibré sur la courbe (prix d'Arrow-Debreu)
+import numpy as np
+
+from core.curves import ZeroCouponCurve
+from core.hull_white import HullWhiteModel
+from core.utils import LRUCache
+
+
+class TrinomialHullWhiteTree:
+    """
+    Arbre trinomial Hull-White (procédure Hull-White / Brigo-Mercurio).
+
+    On construit d'abord l'arbre du facteur x (Ornstein-Uhlenbeck centré),
+    puis on ajuste le drift alpha(t_i) pas à pas par induction avant des
+    prix d'Arrow-Debreu Q(i, j), de sorte que l'arbre reprice exactement
+    les facteurs d'actualisation de la courbe : sum_j Q(i, j) = P(0, t_i).
+
+    Les pas de temps peuvent être irréguliers : l'espacement du niveau i+1
+    vaut dx = sqrt(3 V_i) où V_i est la variance de x sur le pas i, ce qui
+    garde des probabilités positives.
+
+    Le taux court au noeud (i, j) est r = alpha_i + j * dx_i, constant sur [t_i, t_{i+1}].
+
+    La largeur de chaque niveau est tronquée à n_std écarts-types de x(t_i) :
+    sur une grille fine (pas quotidien), l'arbre non tronqué grossirait d'un
+    noeud de chaque côté par pas alors que la masse au-delà de 7 écarts-types
+    est négligeable. Aux bords, le branchement est décalé vers l'intérieur.
+    """
+
+    def __init__(self, hw_model: HullWhiteModel, discount_curve: ZeroCouponCurve, times, n_std: float = 7.0):
+        """
+        :param hw_model: Modèle Hull-White (a, sigma)
+        :param discount_curve: Courbe à repricer
+        :param times: Grille de temps croissante commençant à 0
+        :param n_std: Largeur maximale de l'arbre, en écarts-types de x(t)
+        """
+        times = np.asarray(times, dtype=float)
+        if times[0] != 0.0 or np.any(np.diff(times) <= 0):
+            raise ValueError("la grille de l'arbre doit commencer à 0 et être strictement croissante")
+        if np.any(np.asarray(hw_model.sigma) <= 0):
+            raise ValueError(f"sigma doit être > 0 pour construire l'arbre: {hw_model.sigma}")
+
+        self.hw = hw_model
+        self.curve = discount_curve
+        self.n_std = n_std
+        self.times = times
+        self.dt = np.diff(times)
+        self.n_steps = len(self.dt)
+
+        self._build_x_tree()
+        self._fit_drift()
+
+    def _build_x_tree(self):
+        a = self.hw.a
+        self.dx = [0.0]
+        self.x = [np.zeros(1)]
+        self.mid = []  # indice du noeud fils central, pour chaque noeud
+        self.pu = []
+        self.pm = []
+        self.pd = []
+
+        for i, dt in enumerate(self.dt):
+            var = self.hw.conditional_variance(self.times[i], self.times[i + 1])  # variance de x sur un pas
+            dx_next = np.sqrt(3.0 * var)
+            mean = self.x[i] * np.exp(-a * dt)
+
+            # troncature à n_std écarts-types de x(t_{i+1})
+            std_next = np.sqrt(self.hw.calc_variance(self.times[i + 1]))
+            j_lim = max(int(np.ceil(self.n_std * std_next / dx_next)), 1)
+
+            k = np.rint(mean / dx_next).astype(int)
+            j_max = min(int(np.max(np.abs(k))) + 1, j_lim)
+            k = np.clip(k, -(j_max - 1), j_max - 1)
+
+            # aux bords tronqués |eta| peut dépasser 1/2 : on le borne pour garder pm >= 0
+            eta = np.clip((mean - k * dx_next) / dx_next, -np.sqrt(2.0 / 3.0), np.sqrt(2.0 / 3.0))
+            v = var / dx_next ** 2  # = 1/3
+            self.mid.append(k + j_max)
+            self.pu.append(0.5 * (v + eta * eta + eta))
+            self.pm.append(1.0 - v - eta * eta)
+            self.pd.append(0.5 * (v + eta * eta - eta))
+            self.dx.append(dx_next)
+            self.x.append(np.arange(-j_max, j_max + 1) * dx_next)
+
+    def _fit_drift(self):
+        # Induction avant : Q(0, 0) = 1, alpha_i choisi pour repricer P(0, t_{i+1})
+        dfs = self.curve.get_discount_factor(self.times)
+        self.alpha = np.zeros(self.n_steps)
+        self.arrow_debreu = [np.ones(1)]
+
+        for i, dt in enumerate(self.dt):
+            q = self.arrow_debreu[i]
+            x = self.x[i]
+            self.alpha[i] = (np.log(np.sum(q * np.exp(-x * dt))) - np.log(dfs[i + 1])) / dt
+
+            w = q * np.exp(-(self.alpha[i] + x) * dt)
+            n_next = len(self.x[i + 1])
+            mid = self.mid[i]
+            q_next = (
+                np.bincount(mid + 1, weights=w * self.pu[i], minlength=n_next)
+                + np.bincount(mid, weights=w * self.pm[i], minlength=n_next)
+                + np.bincount(mid - 1, weights=w * self.pd[i], minlength=n_next)
+            )
+            self.arrow_debreu.append(q_next)
+
+    def short_rates(self, level_index: int) -> np.ndarray:
+        """Taux courts des noeuds du niveau i."""
+        return self.alpha[level_index] + self.x[level_index]
+
+    def rollback(self, values_next: np.ndarray, level_index: int) -> np.ndarray:
+        """
+        Espérance actualisée d'un pas : valeurs du niveau i+1 -> niveau i.
+        values_next peut être 2-D (noeuds x produits) pour remonter plusieurs
+        produits à la fois sur le même arbre.
+
+        :param values_next: Valeurs au niveau i+1
+        :param level_index: Niveau i
+        """
+        i = level_index
+        mid = self.mid[i]
+        disc = np.exp(-self.short_rates(i) * self.dt[i])
+        pu, pm, pd = self.pu[i], self.pm[i], self.pd[i]
+        if values_next.ndim == 2:
+            disc, pu, pm, pd = disc[:, None], pu[:, None], pm[:, None], pd[:, None]
+        return disc * (pu * values_next[mid + 1] + pm * values_next[mid] + pd * values_next[mid - 1])
+
+    def fit_error(self) -> float:
+        """Écart maximal |sum_j Q(i, j) - P(0, t_i)| (contrôle de calibration)."""
+        dfs = self.curve.get_discount_factor(self.times)
+        sums = np.array([q.sum() for q in self.arrow_debreu])
+        return float(np.max(np.abs(sums - dfs)))
+
+
+# Un même arbre sert à tous les produits partageant (courbe, a, sigma, grille)
+tree_cache = LRUCache(max_size=16)
+
+
+def get_trinomial_tree(hw_model: HullWhiteModel, discount_curve: ZeroCouponCurve, times,
+                       n_std: float = 7.0) -> TrinomialHullWhiteTree:
+    """
+    Arbre trinomial calibré, construit une seule fois par état de marché.
+
+    :param hw_model: Modèle Hull-White (a, sigma)
+    :param discount_curve: Courbe d'actualisation
+    :param times: Grille de temps commençant à 0
+    :param n_std: Largeur maximale de l'arbre, en écarts-types
+    """
+    times = np.asarray(times, dtype=float)
+    key = (discount_curve.fingerprint(), hw_model.fingerprint(), times.tobytes(), float(n_std))
+    return tree_cache.get_or_build(key, lambda: TrinomialHullWhiteTree(hw_model, discount_curve, times, n_std))
@@ -1,11 +1,15 @@
 # Fonctions génériques
+import threading
+from collections import OrderedDict
+
 import numpy as np
 
 def year_fraction(t1: float, t2: float, convention: str = "ACT/365") -> float:
     # calcule la fraction d'annee entre deux dates (en annees)
-    # t1 et t2 sont deja des flottants (ex: 0.0, 0.5)
+    # t1 et t2 sont deja des flottants (ex: 0.0, 0.5), ou des tableaux numpy
+    # (calcul element par element pour tout un echeancier)
     
-    if t2 < t1:
+    if np.any(np.less(t2, t1)):
         raise ValueError(f"date fin {t2} < date debut {t1}")
 
     dt_raw = t2 - t1
@@ -26,6 +30,106 @@ def year_fraction(t1: float, t2: float, convention: str = "ACT/365") -> float:
     else:
         raise ValueError(f"convention inconnue: {convention}")
 
+class LRUCache:
+    """
+    Cache LRU générique avec compteurs de hits / misses.
+    Les objets sont construits à la demande par une fonction sans argument.
+
+    Sûr entre threads (Streamlit exécute chaque session dans son propre
+    thread) : le dictionnaire n'est modifié que sous un verrou court, et la
+    construction se fait hors de ce verrou, sous un verrou propre à la clé.
+    Deux sessions qui demandent le même objet en même temps ne le
+    construisent qu'une fois ; une construction longue ne bloque pas les
+    lectures des autres clés.
+
+    Un cache picklé (tâches envoyées à un pool de processus) arrive vide
+    chez le destinataire : les verrous et les objets en mémoire restent
+    propres au processus.
+    """
+
+    def __init__(self, max_size: int = 64):
+        """
+        :param max_size: Nombre maximal d'objets conservés (éviction LRU)
+        """
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._init_locks()
+
+    def _init_locks(self):
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"], state["_build_locks"]
+        state["_items"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_locks()
+
+    def _lookup(self, key):
+        # à appeler sous self._lock
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+        return item
+
+    def _build(self, key, build):
+        # construction d'un objet absent, hors du verrou du cache
+        item = build()
+        with self._lock:
+            self.misses += 1
+        return item
+
+    def _evict(self, key, item):
+        # hook des sous-classes (appelé hors verrou pour chaque objet évincé)
+        pass
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            item = self._lookup(key)
+            if item is not None:
+                return item
+            key_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # un autre thread a pu construire l'objet pendant l'attente
+            with self._lock:
+                item = self._lookup(key)
+            if item is not None:
+                return item
+
+            item = self._build(key, build)
+            with self._lock:
+                self._items[key] = item
+                evicted = []
+                while len(self._items) > self.max_size:
+                    evicted.append(self._items.popitem(last=False))
+                self._build_locks.pop(key, None)
+
+        for old_key, old_item in evicted:
+            self._evict(old_key, old_item)
+        return item
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
 if __name__ == "__main__":
     # test rapide
     print(f"act/365 (0 -> 0.5): {year_fraction(0, 0.5, 'ACT/365'):.6f}")
@@ -2,7 +2,7 @@ import streamlit as st
 import sys
 import os
 
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 
 from pricers.asset_swap import AssetSwapPricer
@@ -18,7 +18,7 @@ L'objectif est de calculer l'**Asset Swap Spread (ASW)** qui reflète le risque
 st.header("1. Environnement de Marché")
 with st.expander("Courbe des taux (OIS / Sans Risque)"):
     quotes = get_mock_ois_quotes()
-    ois_curve = ZeroCouponCurve.bootstrap_ois_curve(quotes, curve_name="EUR-OIS")
+    ois_curve = get_ois_curve(quotes, curve_name="EUR-OIS")
     st.write("Quotes utilisées :", quotes)
 
 st.header("2. Caractéristiques de l'Obligation")
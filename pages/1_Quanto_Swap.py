@@ -5,7 +5,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 
 from pricers.quanto_swap_pricer import QuantoSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve, get_zero_curve
 from core.market_data import get_mock_ois_quotes, get_mock_ibor_quotes
 
 st.set_page_config(page_title="Quanto Swap Pricing", layout="wide")
@@ -17,8 +17,8 @@ entre les taux d'intérêt étrangers et le taux de change (FX).
 """)
 
 st.sidebar.header("Données de Marché")
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(get_mock_ois_quotes(), "EUR-OIS")
-ibor_curve = ZeroCouponCurve(list(get_mock_ibor_quotes().keys()), list(get_mock_ibor_quotes().values()), "USD-LIBOR")
+ois_curve = get_ois_curve(get_mock_ois_quotes(), "EUR-OIS")
+ibor_curve = get_zero_curve(get_mock_ibor_quotes(), "USD-LIBOR")
 st.sidebar.success("Courbes OIS et IBOR chargées.")
 
 st.header("1. Paramètres du Contrat")
@@ -1,8 +1,10 @@
 import streamlit as st
 
 from core.hull_white import HullWhiteModel
+from core.monte_carlo import MonteCarloEngine
+from core.path_store import path_store
 from pricers.range_accrual_swap import RangeAccrualSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve, get_zero_curve
 from core.market_data import get_mock_ois_quotes, get_mock_ibor_quotes
 
 st.set_page_config(page_title="Range Accrual Swap", layout="wide")
@@ -23,7 +25,7 @@ with st.expander("Quotes OIS"):
             format="%.4f"
         )
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(
+ois_curve = get_ois_curve(
     edited_ois,
     curve_name="EUR-OIS"
 )
@@ -49,10 +51,11 @@ with st.expander("Zéros IBOR (proxy)"):
             )
         )
 
-projection_curve = ZeroCouponCurve(
-    ibor_times,
-    ibor_rates,
-    curve_name="EUR-IBOR-3M"
+# Mode tabulé (grille quotidienne) : la courbe est interrogée à chaque date d'observation
+projection_curve = get_zero_curve(
+    dict(zip(ibor_times, ibor_rates)),
+    curve_name="EUR-IBOR-3M",
+    tabulation_step=1 / 365
 )
 
 st.success("Courbe IBOR construite.")
@@ -110,6 +113,29 @@ with col3:
         step=1_000
     )
 
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    sampling = st.selectbox(
+        "Échantillonnage",
+        ["sobol", "pseudo", "antithetic"],
+        index=0
+    )
+
+with col2:
+    control_variate = st.checkbox("Variable de contrôle (forward moyen)", value=False)
+
+with col3:
+    # le résultat ne dépend pas du nombre de workers (un flux aléatoire par paquet)
+    n_workers = st.number_input("Threads Monte Carlo", value=1, min_value=1, step=1)
+
+# streaming (mémoire bornée) par défaut ; le cache garde la matrice complète des trajectoires
+# (n_paths x n_dates) pour la réutiliser d'un calcul à l'autre (pseudo / antithetic), même prix
+use_path_store = st.checkbox(
+    "Réutiliser les trajectoires entre calculs (matrice complète en mémoire, pseudo / antithetic)",
+    value=False
+)
+
 
 # Pricing
 st.header("Pricing")
@@ -131,13 +157,22 @@ if st.button("Pricer le Range Accrual Swap"):
     projection_curve=projection_curve,
     hw_model=hw_model,
     n_paths=int(n_paths),
-    seed=42
+    seed=42,
+    sampling=sampling,
+    control_variate=control_variate,
+    mc_engine=MonteCarloEngine(seed=42, n_workers=int(n_workers)),
+    path_store=path_store if use_path_store else None
     )
 
 
-    pv = pricer.price_range_accrual()
+    pv = pricer.price_range_accrual(streaming=not use_path_store)
 
-    st.metric("Valeur actuelle (PV)", f"{pv:,.2f}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Valeur actuelle (PV)", f"{pv:,.2f}")
+    col2.metric("Erreur standard MC", f"{pricer.pv_std_error:,.2f}")
+    # en sobol, arrondi à n_replicates x puissance de 2 (supérieure) ; en antithetic, nombre pair
+    col3.metric("Trajectoires simulées", f"{pricer.report['n_paths']:,}",
+                help=f"{pricer.report['n_paths_requested']:,} demandées")
     st.caption(
         "Pricing basé sur une jambe range accrual, "
         "taux forward IBOR projetés, actualisation OIS."
@@ -1,7 +1,9 @@
+import pandas as pd
 import streamlit as st
 
 from pricers.constant_notional_swap import ConstantNotionalSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve, get_zero_curve
+from core.risk import KeyRateEngine, pricer_trade
 from core.market_data import get_mock_ois_quotes, get_mock_ibor_quotes
 
 st.set_page_config(page_title="Constant Notional Swap", layout="wide")
@@ -24,7 +26,7 @@ with st.expander("Quotes OIS"):
             format="%.4f"
         )
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(
+ois_curve = get_ois_curve(
     edited_ois,
     curve_name="EUR-OIS"
 )
@@ -52,9 +54,8 @@ with st.expander("Zéros IBOR (proxy)"):
             )
         )
 
-projection_curve = ZeroCouponCurve(
-    ibor_times,
-    ibor_rates,
+projection_curve = get_zero_curve(
+    dict(zip(ibor_times, ibor_rates)),
     curve_name="EUR-IBOR-3M"
 )
 
@@ -121,3 +122,21 @@ if st.button("Pricer le Constant Notional Swap"):
         "Pricing d’un swap fixe contre flottant à notionnel constant, "
         "projection via la courbe IBOR et actualisation via la courbe OIS."
     )
+
+    # DV01 par pilier : +1bp sur chaque cotation OIS et chaque zéro IBOR
+    engine = KeyRateEngine(
+        edited_ois,
+        dict(zip(ibor_times, ibor_rates)),
+        ois_name="EUR-OIS",
+        ibor_name="EUR-IBOR-3M"
+    )
+    trade = pricer_trade(
+        lambda ois, ibor: ConstantNotionalSwapPricer(notional, maturity, payment_freq, fixed_rate, ois, ibor),
+        "price_constant_notional"
+    )
+    ladder = engine.dv01([trade])[0]
+
+    st.subheader("DV01 par pilier (+1bp)")
+    df_dv01 = pd.DataFrame({"Pilier": engine.bucket_labels(), "DV01": ladder}).set_index("Pilier")
+    st.bar_chart(df_dv01)
+    st.caption(f"DV01 total : {ladder.sum():,.4f}")
@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from core.curves import ZeroCouponCurve
+from core.curve_cache import curve_cache, get_ois_curve
 from core.market_data import get_mock_ois_quotes
 
 st.set_page_config(page_title="Courbe sans risque (OIS)", layout="wide")
@@ -37,12 +37,17 @@ for col, (T, r) in zip(cols, ois_quotes.items()):
 # ==============================
 # Bootstrap OIS curve
 # ==============================
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(
+ois_curve = get_ois_curve(
     edited_ois,
     curve_name="EUR-OIS"
 )
 
 st.success("Courbe OIS bootstrapée avec succès.")
+cache_stats = curve_cache.stats()
+st.caption(
+    f"Cache de courbes : {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+    f"({cache_stats['size']} courbes en mémoire)"
+)
 
 # ==============================
 # Construction des points de courbe
@@ -50,8 +55,8 @@ st.success("Courbe OIS bootstrapée avec succès.")
 st.header("Courbe sans risque obtenue")
 
 times = np.linspace(0.01, max(edited_ois.keys()), 100)
-discount_factors = [ois_curve.get_discount_factor(t) for t in times]
-zero_rates = [-np.log(df) / t for df, t in zip(discount_factors, times)]
+discount_factors = ois_curve.get_discount_factor(times)
+zero_rates = -np.log(discount_factors) / times
 
 df_curve = pd.DataFrame({
     "Maturité (années)": times,
@@ -2,8 +2,9 @@ import streamlit as st
 
 from pricers.callable_swap import CallableSwapPricer
 from core.hull_white import HullWhiteModel
-from core.curves import ZeroCouponCurve
-from core.market_data import get_mock_ois_quotes
+from core.curve_cache import get_ois_curve
+from core.market_data import get_mock_ois_quotes, get_mock_swaption_vols
+from core.calibration import HullWhiteCalibrator
 
 st.set_page_config(page_title="Callable Swap", layout="wide")
 st.title("Callable Swap (V1)")
@@ -20,19 +21,28 @@ with st.expander("Voir les quotes OIS (en dur)"):
         edited[T] = st.number_input(f"Taux swap OIS {T}Y", value=float(r), step=0.0001, format="%.4f")
     quotes = edited
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(quotes, curve_name="EUR-OIS-BOOTSTRAP")
+ois_curve = get_ois_curve(quotes, curve_name="EUR-OIS-BOOTSTRAP")
 st.success("Courbe OIS construite.")
 
 # Paramètres Hull-White
 st.header("Paramètres Hull-White")
 
-col1, col2 = st.columns(2)
-with col1:
-    a = st.number_input("a (vitesse de retour à la moyenne)", value=0.05, step=0.01, format="%.4f")
-with col2:
-    sigma = st.number_input("sigma (volatilité du taux court)", value=0.02, step=0.001, format="%.4f")
-
-hw = HullWhiteModel(a=a, sigma=sigma)
+calibrate = st.checkbox("Calibrer (a, sigma) sur la matrice de swaptions ATM (mock)", value=False)
+if calibrate:
+    expiries, tenors, vols = get_mock_swaption_vols()
+    calibrator = HullWhiteCalibrator(ois_curve, expiries, tenors, vols)
+    hw = calibrator.calibrate()
+    report = calibrator.report
+    st.write(f"a = {report['a']:.4f}, sigma = {report['sigma']:.5f} "
+             f"(RMSE {report['rmse_bp']:.2f} pb, {report['elapsed_ms']:.0f} ms)")
+else:
+    col1, col2 = st.columns(2)
+    with col1:
+        a = st.number_input("a (vitesse de retour à la moyenne)", value=0.05, step=0.01, format="%.4f")
+    with col2:
+        sigma = st.number_input("sigma (volatilité du taux court)", value=0.02, step=0.001, format="%.4f")
+
+    hw = HullWhiteModel(a=a, sigma=sigma)
 
 # Paramètres du swap
 st.header("Paramètres du swap")
@@ -63,6 +73,18 @@ st.subheader("Call schedule")
 call_from = st.number_input("Première date de call (années)", value=1.0, step=dt, format="%.4f")
 call_times = [x for x in payment_times[1:-1] if x >= call_from]
 
+steps_per_period = st.number_input(
+    "Pas de l'arbre par période (raffinement de la grille)",
+    value=1, min_value=1, step=1
+)
+tree_method = st.selectbox(
+    "Méthode",
+    ["trinomial", "binomial", "lsm", "pde"],
+    index=0,
+    help="trinomial : arbre Hull-White calibré sur la courbe OIS ; binomial : arbre simplifié V1 ; "
+         "lsm : Longstaff-Schwartz sur trajectoires Hull-White ; pde : Crank-Nicolson sur la grille HW calibrée"
+)
+
 st.write("Dates de paiement :", payment_times)
 st.write("Dates de call :", call_times if call_times else "Aucune")
 
@@ -76,9 +98,18 @@ if st.button("Pricer le Callable Swap"):
         payment_times=payment_times,
         call_times=call_times,
         discount_curve=ois_curve,
-        hw_model=hw
+        hw_model=hw,
+        steps_per_period=int(steps_per_period),
+        method=tree_method
     )
 
     price = pricer.price()
     st.metric("Prix (PV) du Callable Swap", f"{price:,.2f}")
-    st.caption("V1 : arbre HW simplifié, forward basé sur courbe OIS, call exercé si continuation > 0 (payeur fixe).")
+    if tree_method == "trinomial":
+        st.caption("Arbre trinomial HW calibré sur la courbe OIS (prix d'Arrow-Debreu), call exercé si continuation > 0 (payeur fixe).")
+    elif tree_method == "pde":
+        st.caption("EDP Hull-White (Crank-Nicolson) calibrée sur la courbe OIS, call appliqué aux dates de call.")
+    elif tree_method == "lsm":
+        st.caption("Longstaff-Schwartz : trajectoires HW exactes (facteur et actualisation), continuation régressée sur x à chaque date de call.")
+    else:
+        st.caption("V1 : arbre HW simplifié, forward basé sur courbe OIS, call exercé si continuation > 0 (payeur fixe).")
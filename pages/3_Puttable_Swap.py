@@ -5,7 +5,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 
 from pricers.puttable_swap_pricer import PuttableSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve, get_zero_curve
 from core.market_data import get_mock_ois_quotes, get_mock_ibor_quotes
 
 st.set_page_config(page_title="Puttable Swap Pricing", layout="wide")
@@ -18,8 +18,8 @@ Cette page décompose la valeur entre le swap vanille et la valeur de l'option d
 
 # Paramètres de Marché 
 st.sidebar.header("Market Environment")
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(get_mock_ois_quotes())
-ibor_curve = ZeroCouponCurve(list(get_mock_ibor_quotes().keys()), list(get_mock_ibor_quotes().values()))
+ois_curve = get_ois_curve(get_mock_ois_quotes())
+ibor_curve = get_zero_curve(get_mock_ibor_quotes())
 
 # Inputs 
 st.header("1. Caractéristiques du Swap")
@@ -5,14 +5,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 from pricers.variance_swap_pricer import VarianceSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 
 st.set_page_config(page_title="Variance Swap Analysis", layout="wide")
 st.title("📈 Variance Swap - Volatility Trading")
 
 st.sidebar.header("Paramètres de Marché")
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(get_mock_ois_quotes())
+ois_curve = get_ois_curve(get_mock_ois_quotes())
 
 st.header("1. Configuration du Swap")
 c1, c2, c3 = st.columns(3)
@@ -2,7 +2,7 @@ import streamlit as st
 import numpy as np
 
 from pricers.volatility_swap import VolatilitySwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes 
 
 st.set_page_config(page_title = "Volatility Swap", layout = "wide")
@@ -22,7 +22,7 @@ with st.expander("Voir les quotes OIS"):
         )
     quotes = edited
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(quotes, curve_name = "EUR-OIS")
+ois_curve = get_ois_curve(quotes, curve_name = "EUR-OIS")
 st.success("Courbe OIS construite.")
 
 st.header("Paramètres")
@@ -49,6 +49,8 @@ nb_obs = int(freq_map[freq] * maturity)
 st.write(f"Nombre d'observations : {nb_obs}"
          )
 
+n_paths = st.number_input("Nombre de scénarios Monte Carlo", value = 10_000, step = 1_000)
+
 
 st.header("Pricing")
 
@@ -58,11 +60,13 @@ if st.button("Pricer le Volatility Swap"):
         vol_strike = vol_strike/100.0,
         maturity=maturity,
         nb_obs= nb_obs,
-        discount_curve=ois_curve   
+        discount_curve=ois_curve,
+        n_paths = int(n_paths),
+        seed = 42
     )
 
     price, realized_vol = pricer.price()
 
-    st.metric("Volatilité réalisée simulée", f"{100*realized_vol:.2f} %")
+    st.metric("Volatilité réalisée simulée (moyenne)", f"{100*realized_vol:.2f} %")
     st.metric("Prix (PV) du volatility swap", f"{price:,.2f}")
     st.caption("V1 : volatilité réalisée simulée, pricing sous mesure neutre, pas de convexité")
\ No newline at end of file
@@ -1,7 +1,7 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 from pricers.mtm_swap import MtMSwapPricer
 
@@ -9,7 +9,7 @@ st.set_page_config(page_title="MtM Swap", layout="wide")
 st.title("Mark-to-Market Swap Pricing")
 
 quotes = get_mock_ois_quotes()
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(quotes)
+ois_curve = get_ois_curve(quotes)
 
 st.sidebar.header("Paramètres")
 base_n = st.sidebar.number_input("Notionnel de base", value=1_000_000.0)
@@ -1,7 +1,7 @@
 import streamlit as st
 
 from pricers.step_down_swap import StepDownPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 from core.utils import year_fraction
 
@@ -22,7 +22,7 @@ with st.expander("Voir les quotes OIS"):
         )
     quotes = edited
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(
+ois_curve = get_ois_curve(
     quotes,
     curve_name="EUR-OIS-BOOTSTRAP"
 )
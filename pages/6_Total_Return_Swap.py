@@ -5,15 +5,15 @@ import plotly.graph_objects as go
 import plotly.express as px
 
 from pricers.total_return_swap_pricer import TotalReturnSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve, get_zero_curve
 from core.market_data import get_mock_ois_quotes, get_mock_ibor_quotes
 
 st.set_page_config(page_title="Total Return Swap Pricing", layout="wide")
 st.title("📈 Total Return Swap (TRS) - Analyse")
 
 st.sidebar.header("Configuration Marché")
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(get_mock_ois_quotes())
-ibor_curve = ZeroCouponCurve(list(get_mock_ibor_quotes().keys()), list(get_mock_ibor_quotes().values()))
+ois_curve = get_ois_curve(get_mock_ois_quotes())
+ibor_curve = get_zero_curve(get_mock_ibor_quotes())
 
 st.header("1. Paramètres de l'Actif et du Financement")
 c1, c2, c3 = st.columns(3)
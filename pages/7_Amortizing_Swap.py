@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 
 from pricers.amortizing_swap import AmortizingSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 
 st.set_page_config(page_title="Amortizing Swap", layout="wide")
@@ -31,7 +31,7 @@ with st.expander("Voir les quotes OIS (en dur)"):
         )
     quotes = edited
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(quotes, curve_name="EUR-OIS-BOOTSTRAP")
+ois_curve = get_ois_curve(quotes, curve_name="EUR-OIS-BOOTSTRAP")
 st.success("Courbe OIS construite.")
 
 # Paramètres du swap 
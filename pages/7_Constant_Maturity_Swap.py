@@ -1,26 +1,44 @@
 import streamlit as st
+import pandas as pd
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from pricers.constant_maturity_swap import CMSPricer 
+from pricers.constant_maturity_swap import CMSPricer
+from core.curve_cache import get_ois_curve, get_zero_curve
+from core.market_data import get_mock_ois_quotes, get_mock_ibor_quotes, SwaptionVolSurface
 
 st.set_page_config(page_title="CMS Pricing", layout="wide")
 
 st.title("Constant Maturity Swap (CMS) Pricer")
 
+# courbes : OIS bootstrappée (actualisation), zéros IBOR (projection des swaps sous-jacents)
+ois_curve = get_ois_curve(get_mock_ois_quotes(), curve_name="EUR-OIS")
+projection_curve = get_zero_curve(get_mock_ibor_quotes(), curve_name="EUR-IBOR-3M")
+surface = SwaptionVolSurface.mock()
+
 col1, col2 = st.columns([1, 2])
 with col1:
     st.subheader("Paramètres")
     nominal = st.number_input("Nominal (€)", value=1_000_000, step=100_000)
     maturity = st.number_input("Maturité (Années)", value=5)
     fix_rate = st.number_input("Taux Fixe (K) %", value=3.0) / 100
-    cms_tenor = st.selectbox("Maturité Constante", ["CMS 10Y", "CMS 2Y"])
+    cms_tenor = st.selectbox("Maturité Constante", ["CMS 10Y", "CMS 5Y", "CMS 2Y"])
+    frequency = st.selectbox("Fréquence de paiement", ["1Y", "6M", "3M"], index=0)
+    convexity = st.checkbox("Ajustement de convexité (nappe de swaptions mock)", value=True)
 
 if st.button("Calculer"):
-    pricer = CMSPricer(discount_curve=None, swap_surface=None)
-    res = pricer.calculate_price(nominal, fix_rate, maturity, cms_tenor)
-    
+    tenor = float(cms_tenor.split()[1].rstrip("Y"))
+    payment_frequency = {"1Y": 1, "6M": 2, "3M": 4}[frequency]
+    pricer = CMSPricer(discount_curve=ois_curve, swap_surface=surface if convexity else None,
+                       projection_curve=projection_curve)
+    res = pricer.calculate_price(nominal, fix_rate, maturity, tenor, payment_frequency)
+
     with col2:
         st.metric("Prix Total (NPV)", f"{res['price']:,.2f} €")
         st.write(f"Jambe CMS : {res['leg_cms']:,.2f} € | Jambe Fixe : {res['leg_fix']:,.2f} €")
+        st.dataframe(pd.DataFrame({
+            "Fixing (années)": res["fixing_times"],
+            "Swap forward (%)": res["forward"] * 100,
+            "Convexité (pb)": res["convexity"] * 1e4,
+        }))
@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 
 from pricers.basis_swap import BasisSwapPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 
 st.set_page_config(page_title="Basis Swap", layout="wide")
@@ -33,7 +33,7 @@ with st.expander("Voir les quotes OIS (en dur)"):
         )
     quotes = edited
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(quotes, curve_name="EUR-OIS-BOOTSTRAP")
+ois_curve = get_ois_curve(quotes, curve_name="EUR-OIS-BOOTSTRAP")
 st.success("Courbe OIS construite.")
 
 #Paramètres du swap 
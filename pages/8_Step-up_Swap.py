@@ -1,7 +1,7 @@
 import streamlit as st
 
 from pricers.step_up_swap import StepUpPricer
-from core.curves import ZeroCouponCurve
+from core.curve_cache import get_ois_curve
 from core.market_data import get_mock_ois_quotes
 
 st.set_page_config(page_title="Step-Up Swap", layout="wide")
@@ -25,7 +25,7 @@ with st.expander("Voir / Modifier les quotes OIS"):
         )
     quotes = edited
 
-ois_curve = ZeroCouponCurve.bootstrap_ois_curve(
+ois_curve = get_ois_curve(
     quotes,
     curve_name="EUR-OIS-BOOTSTRAP"
 )
@@ -1,6 +1,6 @@
 import numpy as np
 from core.curves import ZeroCouponCurve
-from core.utils import year_fraction
+from core.legs import LegEngine, as_pv
 
 class AccretingSwapPricer:
     def __init__(self, notionals, payment_times, fixed_rate, discount_curve):
@@ -8,17 +8,14 @@ class AccretingSwapPricer:
         self.times = np.array(payment_times)
         self.fixed_rate = fixed_rate
         self.curve = discount_curve
+        self.legs = LegEngine(discount_curve)
 
     def price(self) -> float:
-        pv = 0.0
-        for i in range(len(self.notionals)):
-            t_start = self.times[i]
-            t_end = self.times[i+1]
-            dt = year_fraction(t_start, t_end)
-            
-            fwd = self.curve.get_forward_rate(t_start, t_end)
-            df = self.curve.get_discount_factor(t_end)
-            
-            pv += self.notionals[i] * (fwd - self.fixed_rate) * dt * df
-            
-        return pv
\ No newline at end of file
+        n = len(self.notionals)
+        t_start = self.times[:n]
+        t_end = self.times[1:n + 1]
+
+        # receveur du flottant, payeur du fixe, actualisation en fin de période
+        floating = self.legs.floating_cashflows(t_start, t_end, self.notionals)
+        fixed = self.legs.fixed_cashflows(t_start, t_end, self.notionals, self.fixed_rate)
+        return as_pv(self.legs.present_value(floating - fixed, t_end))
\ No newline at end of file
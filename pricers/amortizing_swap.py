@@ -2,7 +2,7 @@ import numpy as np
 from typing import List
 
 from core.curves import ZeroCouponCurve
-from core.utils import year_fraction
+from core.legs import LegEngine, as_pv, period_bounds
 
 
 class AmortizingSwapPricer:
@@ -35,40 +35,22 @@ class AmortizingSwapPricer:
         self.fixed_rate = fixed_rate
         self.times = payment_times
         self.curve = discount_curve
+        self.legs = LegEngine(discount_curve)
         
         assert len(notional_schedule) == len(payment_times) - 1, \
             "notional_schedule doit avoir une longueur = len(payment_times) - 1"
 
-    def fixed_leg_cf(self, period_idx: int) -> float:
-        """Calcule le flux de la jambe fixe pour la période."""
-        if period_idx >= len(self.notional_schedule):
-            return 0.0
-        
-        t1 = self.times[period_idx]
-        t2 = self.times[period_idx + 1]
-        dt = year_fraction(t1, t2)
-        notional = self.notional_schedule[period_idx]
-        
-        return notional * self.fixed_rate * dt
-
-    def floating_leg_cf(self, period_idx: int) -> float:
-        """Calcule le flux de la jambe flottante pour la période."""
-        if period_idx >= len(self.notional_schedule):
-            return 0.0
-        
-        t1 = self.times[period_idx]
-        t2 = self.times[period_idx + 1]
-        
-        # Forward rate entre t1 et t2
-        fwd = self.curve.get_forward_rate(t1, t2)
-        dt = year_fraction(t1, t2)
-        notional = self.notional_schedule[period_idx]
-        
-        return notional * fwd * dt
-
-    def discount_factor(self, t: float) -> float:
-        """Facteur d'actualisation à la date t."""
-        return self.curve.get_discount_factor(t)
+    def cashflow_table(self) -> dict:
+        """
+        Flux de toutes les périodes en une passe vectorisée.
+        Actualisation au milieu de la période (approximation).
+        """
+        t1, t2 = period_bounds(self.times)
+        return self.legs.cashflow_table(
+            t1, t2, self.notional_schedule,
+            fixed_rates=self.fixed_rate,
+            pay_times=(t1 + t2) / 2
+        )
 
     def price(self) -> float:
         """
@@ -78,49 +60,24 @@ class AmortizingSwapPricer:
         Un swap "vanilla" a PV = 0 en initiation.
         Si PV > 0, le swap vaut plus qu'une valeur nulle.
         """
-        pv = 0.0
-        
-        for period_idx in range(len(self.notional_schedule)):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            
-            # Milieu de la période pour l'actualisation (approximation)
-            t_mid = (t1 + t2) / 2
-            df = self.discount_factor(t_mid)
-            
-            # Flux: jambe flottante (reçue) - jambe fixe (payée)
-            fixed_cf = self.fixed_leg_cf(period_idx)
-            floating_cf = self.floating_leg_cf(period_idx)
-            
-            net_cf = floating_cf - fixed_cf
-            pv += net_cf * df
-        
-        return pv
+        # Flux: jambe flottante (reçue) - jambe fixe (payée)
+        return as_pv(np.sum(self.cashflow_table()["net_pv"], axis=-1))
 
     def get_schedule_summary(self) -> dict:
         """Retourne un résumé du calendrier d'amortissement et des flux."""
+        table = self.cashflow_table()
         summary = []
         
         for period_idx in range(len(self.notional_schedule)):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            dt = year_fraction(t1, t2)
-            
-            notional = self.notional_schedule[period_idx]
-            fixed_cf = self.fixed_leg_cf(period_idx)
-            floating_cf = self.floating_leg_cf(period_idx)
-            fwd = self.curve.get_forward_rate(t1, t2)
-            df = self.discount_factor((t1 + t2) / 2)
-            
             summary.append({
                 "période": period_idx + 1,
-                "début": f"{t1:.2f}Y",
-                "fin": f"{t2:.2f}Y",
-                "notionnel": f"{notional:,.0f}",
-                "taux_fwd": f"{fwd*100:.3f}%",
-                "cf_fixe": f"{fixed_cf:,.2f}",
-                "cf_flottant": f"{floating_cf:,.2f}",
-                "df": f"{df:.4f}"
+                "début": f"{table['start'][period_idx]:.2f}Y",
+                "fin": f"{table['end'][period_idx]:.2f}Y",
+                "notionnel": f"{table['notional'][period_idx]:,.0f}",
+                "taux_fwd": f"{table['forward'][period_idx]*100:.3f}%",
+                "cf_fixe": f"{table['fixed_cf'][period_idx]:,.2f}",
+                "cf_flottant": f"{table['floating_cf'][period_idx]:,.2f}",
+                "df": f"{table['df'][period_idx]:.4f}"
             })
         
         return summary
@@ -130,29 +87,16 @@ class AmortizingSwapPricer:
         Calcule le taux fixe d'équilibre (fair rate) qui rend le PV = 0.
         
         C'est le taux auquel le swap devrait être initié pour que sa valeur soit nulle.
+        Float pour une courbe simple, vecteur (S,) pour un ScenarioCurve.
         """
-        # PV de la jambe flottante
-        pv_floating = 0.0
-        for period_idx in range(len(self.notional_schedule)):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            t_mid = (t1 + t2) / 2
-            
-            floating_cf = self.floating_leg_cf(period_idx)
-            df = self.discount_factor(t_mid)
-            pv_floating += floating_cf * df
-        
-        denominator = 0.0
-        for period_idx in range(len(self.notional_schedule)):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            dt = year_fraction(t1, t2)
-            notional = self.notional_schedule[period_idx]
-            df = self.discount_factor((t1 + t2) / 2)
-            denominator += notional * dt * df
-        
-        if denominator == 0:
-            return 0.0
+        table = self.cashflow_table()
+
+        # PV de la jambe flottante (somme sur les périodes, scénario par scénario)
+        pv_floating = np.sum(table["floating_cf"] * table["df"], axis=-1)
         
-        fair_rate = pv_floating / denominator
-        return fair_rate
+        # annuité : sum N_i * dt_i * DF_i
+        denominator = np.sum(table["notional"] * table["accrual"] * table["df"], axis=-1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fair_rate = np.where(denominator == 0, 0.0, pv_floating / denominator)
+        return as_pv(fair_rate)
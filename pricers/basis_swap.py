@@ -2,7 +2,7 @@ import numpy as np
 from typing import List
 
 from core.curves import ZeroCouponCurve
-from core.utils import year_fraction
+from core.legs import LegEngine, as_pv, period_bounds
 
 
 class BasisSwapPricer:
@@ -41,42 +41,20 @@ class BasisSwapPricer:
         self.curve = discount_curve
         self.tenor_1 = tenor_1
         self.tenor_2 = tenor_2
+        self.legs = LegEngine(discount_curve)
 
-    def leg1_cf(self, period_idx: int) -> float:
-        """Calcule le flux de la jambe 1 (taux flottant 1) pour la période."""
-        if period_idx >= len(self.times) - 1:
-            return 0.0
-        
-        t1 = self.times[period_idx]
-        t2 = self.times[period_idx + 1]
-        
-        # Forward rate pour le tenor 1
-        # Exemple: si tenor_1 = 0.25 (3M), on prend le forward EURIBOR 3M
-        fwd1 = self.curve.get_forward_rate(t1, t1 + self.tenor_1)
-        dt = year_fraction(t1, t2)
-        
-        return self.notional * fwd1 * dt
-
-    def leg2_cf(self, period_idx: int) -> float:
-        """Calcule le flux de la jambe 2 (taux flottant 2 + spread) pour la période."""
-        if period_idx >= len(self.times) - 1:
-            return 0.0
-        
-        t1 = self.times[period_idx]
-        t2 = self.times[period_idx + 1]
-        
-        # Forward rate pour le tenor 2
-        fwd2 = self.curve.get_forward_rate(t1, t1 + self.tenor_2)
-        dt = year_fraction(t1, t2)
-        
-        # Ajouter le spread
-        total_rate = fwd2 + self.basis_spread
-        
-        return self.notional * total_rate * dt
-
-    def discount_factor(self, t: float) -> float:
-        """Facteur d'actualisation à la date t."""
-        return self.curve.get_discount_factor(t)
+    def cashflow_tables(self) -> tuple:
+        """
+        Flux des deux jambes sur toutes les périodes en une passe vectorisée.
+        Les forwards sont fixés sur [t1, t1 + tenor], l'actualisation se fait
+        au milieu de la période (approximation).
+        """
+        t1, t2 = period_bounds(self.times)
+        t_mid = (t1 + t2) / 2
+        leg1 = self.legs.cashflow_table(t1, t2, self.notional, pay_times=t_mid, fixing_ends=t1 + self.tenor_1)
+        leg2 = self.legs.cashflow_table(t1, t2, self.notional, spreads=self.basis_spread, pay_times=t_mid,
+                                        fixing_ends=t1 + self.tenor_2)
+        return leg1, leg2
 
     def price(self) -> float:
         """
@@ -88,94 +66,51 @@ class BasisSwapPricer:
         Si PV > 0: recevoir jambe 2 est avantageux pour le payeur 1.
         Si PV < 0: recevoir jambe 2 est désavantageux pour le payeur 1.
         """
-        pv = 0.0
+        leg1, leg2 = self.cashflow_tables()
         
-        for period_idx in range(len(self.times) - 1):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            t_mid = (t1 + t2) / 2
-            
-            df = self.discount_factor(t_mid)
-            
-            # Flux: jambe 2 (reçue) - jambe 1 (payée)
-            cf1 = self.leg1_cf(period_idx)
-            cf2 = self.leg2_cf(period_idx)
-            
-            net_cf = cf2 - cf1  # Recevoir jambe 2, payer jambe 1
-            pv += net_cf * df
-        
-        return pv
+        # Flux: jambe 2 (reçue) - jambe 1 (payée)
+        net_cf = leg2["floating_cf"] - leg1["floating_cf"]
+        return as_pv(np.sum(net_cf * leg1["df"], axis=-1))
 
     def calculate_fair_basis_spread(self) -> float:
         """
         Calcule le spread d'équilibre (fair spread) qui rend le PV = 0.
         
         C'est le spread auquel le basis swap devrait être initié pour que sa valeur soit nulle.
+        Float pour une courbe simple, vecteur (S,) pour un ScenarioCurve.
         """
-        # PV de la jambe 1
-        pv_leg1 = 0.0
-        for period_idx in range(len(self.times) - 1):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            t_mid = (t1 + t2) / 2
-            
-            cf1 = self.leg1_cf(period_idx)
-            df = self.discount_factor(t_mid)
-            pv_leg1 += cf1 * df
-        
+        leg1, leg2 = self.cashflow_tables()
+        df = leg1["df"]
 
-        denominator = 0.0
-        pv_leg2_base = 0.0
-        
-        for period_idx in range(len(self.times) - 1):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            dt = year_fraction(t1, t2)
-            t_mid = (t1 + t2) / 2
-            df = self.discount_factor(t_mid)
-            
-            # Forward pour leg2
-            fwd2 = self.curve.get_forward_rate(t1, t1 + self.tenor_2)
-            cf2_base = self.notional * fwd2 * dt
-            pv_leg2_base += cf2_base * df
-            
-            denominator += self.notional * dt * df
-        
-        if denominator == 0:
-            return 0.0
-        
-        fair_spread = (pv_leg1 - pv_leg2_base) / denominator
-        return fair_spread
+        # PV de la jambe 1 (somme sur les périodes, scénario par scénario)
+        pv_leg1 = np.sum(leg1["floating_cf"] * df, axis=-1)
+
+        # PV de la jambe 2 sans spread et annuité
+        pv_leg2_base = np.sum(self.notional * leg2["forward"] * leg2["accrual"] * df, axis=-1)
+        denominator = np.sum(self.notional * leg2["accrual"] * df, axis=-1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fair_spread = np.where(denominator == 0, 0.0, (pv_leg1 - pv_leg2_base) / denominator)
+        return as_pv(fair_spread)
 
     def get_schedule_summary(self) -> list:
         """Retourne un résumé du calendrier et des flux."""
+        leg1, leg2 = self.cashflow_tables()
         summary = []
         
+        tenor_1_label = f"{int(self.tenor_1*12)}M" if self.tenor_1 < 1 else f"{int(self.tenor_1)}Y"
+        tenor_2_label = f"{int(self.tenor_2*12)}M" if self.tenor_2 < 1 else f"{int(self.tenor_2)}Y"
+        
         for period_idx in range(len(self.times) - 1):
-            t1 = self.times[period_idx]
-            t2 = self.times[period_idx + 1]
-            dt = year_fraction(t1, t2)
-            
-            # Forwards
-            fwd1 = self.curve.get_forward_rate(t1, t1 + self.tenor_1)
-            fwd2 = self.curve.get_forward_rate(t1, t1 + self.tenor_2)
-            
-            cf1 = self.leg1_cf(period_idx)
-            cf2 = self.leg2_cf(period_idx)
-            df = self.discount_factor((t1 + t2) / 2)
-            
-            tenor_1_label = f"{int(self.tenor_1*12)}M" if self.tenor_1 < 1 else f"{int(self.tenor_1)}Y"
-            tenor_2_label = f"{int(self.tenor_2*12)}M" if self.tenor_2 < 1 else f"{int(self.tenor_2)}Y"
-            
             summary.append({
                 "période": period_idx + 1,
-                "début": f"{t1:.2f}Y",
-                "fin": f"{t2:.2f}Y",
-                f"fwd_{tenor_1_label}": f"{fwd1*100:.3f}%",
-                f"fwd_{tenor_2_label}": f"{fwd2*100:.3f}%",
-                f"cf_{tenor_1_label}": f"{cf1:,.2f}",
-                f"cf_{tenor_2_label}+spread": f"{cf2:,.2f}",
-                "df": f"{df:.4f}"
+                "début": f"{leg1['start'][period_idx]:.2f}Y",
+                "fin": f"{leg1['end'][period_idx]:.2f}Y",
+                f"fwd_{tenor_1_label}": f"{leg1['forward'][period_idx]*100:.3f}%",
+                f"fwd_{tenor_2_label}": f"{leg2['forward'][period_idx]*100:.3f}%",
+                f"cf_{tenor_1_label}": f"{leg1['floating_cf'][period_idx]:,.2f}",
+                f"cf_{tenor_2_label}+spread": f"{leg2['floating_cf'][period_idx]:,.2f}",
+                "df": f"{leg1['df'][period_idx]:.4f}"
             })
         
         return summary
@@ -3,7 +3,10 @@ from typing import List
 
 from core.hull_white import HullWhiteModel
 from core.curves import ZeroCouponCurve
-from core.utils import year_fraction
+from core.longstaff_schwartz import CancellableSwapBook, LongstaffSchwartzEngine
+from core.pde import get_hull_white_pde
+from core.portfolio import SwapBlock
+from core.trinomial_tree import get_trinomial_tree
 
 class HullWhiteTree:
     def __init__(
@@ -14,28 +17,28 @@ class HullWhiteTree:
     ):
         self.hw = hw_model
         self.curve = discount_curve
-        self.times = times
-        self.dt = np.diff(times)
+        self.times = np.asarray(times, dtype=float)
+        self.dt = np.diff(self.times)
 
-        self.tree = []
         self._build_tree()
 
     def _build_tree(self):
-        r0 = self.curve.get_zero_rate(0.0)
-        self.tree = [[r0]]
-
-        for i, t in enumerate(self.times[1:]):
-            var = self.hw.calc_variance(t)
-            dx = np.sqrt(var)
-
-            level = []
-            for j in range(i + 2):
-                rate = r0 + (2 * j - (i + 1)) * dx
-                level.append(rate)
-
-            self.tree.append(level)
-
-    def discount(self, level_index: int, r: float) -> float:
+        # arbre recombinant stocké en tableaux : le niveau i a i+1 noeuds
+        # r(i, j) = r0 + (2j - i) * dx_i, avec dx_i = sqrt(var(t_i) / i) pour que
+        # la dispersion du niveau i (i pas de +/- dx_i) soit bien var(t_i)
+        self.r0 = self.curve.get_zero_rate(0.0)
+
+        var = np.array([self.hw.calc_variance(t) for t in self.times[1:]])
+        levels = np.arange(1, len(self.times))
+        self.dx = np.concatenate(([0.0], np.sqrt(var / levels)))
+        self.n_levels = len(self.times)
+
+    def level_rates(self, level_index: int) -> np.ndarray:
+        # taux courts des i+1 noeuds du niveau i
+        i = level_index
+        return self.r0 + (2.0 * np.arange(i + 1) - i) * self.dx[i]
+
+    def discount(self, level_index: int, r):
         dt = self.dt[level_index]
         return np.exp(-r * dt)
 
@@ -48,66 +51,141 @@ class CallableSwapPricer:
         payment_times: List[float],
         call_times: List[float],
         discount_curve: ZeroCouponCurve,
-        hw_model: HullWhiteModel
+        hw_model: HullWhiteModel,
+        steps_per_period: int = 1,
+        method: str = "trinomial",
+        n_paths: int = 20_000
     ):
+        # method : "trinomial", "binomial", "lsm" (Longstaff-Schwartz sur n_paths trajectoires HW)
+        # ou "pde" (Crank-Nicolson sur la grille HW calibrée)
         self.N = notional
         self.fixed_rate = fixed_rate
         self.times = payment_times
         self.call_times = call_times
         self.curve = discount_curve
         self.hw = hw_model
-
-        self.tree = HullWhiteTree(hw_model, discount_curve, payment_times)
-
-    def _is_call_date(self, t: float, tol: float = 1e-10) -> bool:
-        return any(abs(t - tc) < tol for tc in self.call_times)
-
-    def fixed_leg_cf(self, dt: float) -> float:
-        return self.N * self.fixed_rate * dt
-
-    def floating_leg_cf(self, t1: float, t2: float) -> float:
+        self.steps_per_period = steps_per_period
+        self.method = method
+        self.n_paths = n_paths
+
+        # grille de l'arbre : dates de paiement, éventuellement raffinées
+        # (ex: steps_per_period=63 pour un pas quotidien sur des périodes trimestrielles)
+        self.grid = self._build_grid()
+        if method == "trinomial":
+            # arbre calibré sur la courbe, partagé par tous les trades de même grille
+            if self.grid[0] > 0:
+                self.grid = np.concatenate(([0.0], self.grid))
+            self.tree = get_trinomial_tree(hw_model, discount_curve, self.grid)
+        elif method == "binomial":
+            self.tree = HullWhiteTree(hw_model, discount_curve, self.grid)
+        elif method == "lsm":
+            self.tree = None
+        elif method == "pde":
+            self.tree = get_hull_white_pde(hw_model, discount_curve, np.concatenate((self.grid, call_times)))
+        else:
+            raise ValueError(f"methode d'arbre inconnue: {method}")
+
+    def _build_grid(self) -> np.ndarray:
+        times = np.asarray(self.times, dtype=float)
+        if self.steps_per_period == 1:
+            return times
+        frac = np.arange(self.steps_per_period) / self.steps_per_period
+        inner = times[:-1, None] + np.diff(times)[:, None] * frac[None, :]
+        return np.append(inner.ravel(), times[-1])
+
+    def _call_step_mask(self, tol: float = 1e-10) -> np.ndarray:
+        # dates de call projetées une fois pour toutes sur les pas de la grille
+        mask = np.zeros(len(self.grid), dtype=bool)
+        if len(self.call_times) == 0:
+            return mask
+        calls = np.sort(np.asarray(self.call_times, dtype=float))
+        idx = np.searchsorted(calls, self.grid)
+        left = np.abs(self.grid - calls[np.clip(idx - 1, 0, len(calls) - 1)]) < tol
+        right = np.abs(self.grid - calls[np.clip(idx, 0, len(calls) - 1)]) < tol
+        return left | right
+
+    def _period_cashflows(self) -> np.ndarray:
+        # flux nets (fixe - flottant) de chaque période, un seul appel courbe pour tout l'échéancier
+        times = np.asarray(self.times, dtype=float)
+        t1, t2 = times[:-1], times[1:]
+        dt = t2 - t1  # ACT/365, comme year_fraction
         fwd = self.curve.get_forward_rate(t1, t2)
-        dt = year_fraction(t1, t2)
-        return self.N * fwd * dt
+        return self.N * self.fixed_rate * dt - self.N * fwd * dt
 
     def price(self) -> float:
-        n = len(self.times)
-        values = []
+        if self.method == "trinomial":
+            return self._price_trinomial()
+        if self.method == "lsm":
+            return self._price_lsm()
+        if self.method == "pde":
+            return float(self.tree.price_cancellable(self.book())[0])
+        return self._price_binomial()
+
+    def book(self) -> CancellableSwapBook:
+        # le trade sous forme de livre annulable : recevoir le fixe (notionnel négatif), call de la contrepartie
+        block = SwapBlock([-self.N], [self.fixed_rate], [list(self.times)])
+        return CancellableSwapBook(block, [list(self.call_times)], holder_exercises=False)
+
+    def _price_lsm(self) -> float:
+        # Longstaff-Schwartz : mêmes conventions que l'arbre trinomial (forward continu, courbe unique)
+        engine = LongstaffSchwartzEngine(self.hw, self.curve, n_paths=self.n_paths)
+        return float(engine.price(self.book())[0])
+
+    def _price_trinomial(self) -> float:
+        # Chaque période k vaut, à sa date de début : N * (K dt_k + ln P(t_k, t_{k+1})) * P(t_k, t_{k+1})
+        # (recevoir le fixe, payer le forward -ln(P)/dt, même convention que get_forward_rate).
+        # Le zéro-coupon P(t_k, t_{k+1}) est remonté dans l'arbre avec le swap (2e colonne).
+        tree = self.tree
+        times = np.asarray(self.times, dtype=float)
+        pay_steps = np.searchsorted(self.grid, times)
+        n = tree.n_steps
+
+        start_period = np.full(n + 1, -1)
+        start_period[pay_steps[:-1]] = np.arange(len(times) - 1)
+        is_end = np.zeros(n + 1, dtype=bool)
+        is_end[pay_steps[1:]] = True
+        call_mask = self._call_step_mask()
+        dt = np.diff(times)
+
+        values = np.zeros((len(tree.x[n]), 2))
+        values[:, 1] = 1.0
+        for i in range(n - 1, -1, -1):
+            values = tree.rollback(values, i)
+
+            k = start_period[i]
+            if k >= 0:
+                bond = values[:, 1]
+                values[:, 0] += self.N * (self.fixed_rate * dt[k] + np.log(bond)) * bond
+            if call_mask[i]:
+                np.minimum(values[:, 0], 0.0, out=values[:, 0])
+            if is_end[i]:
+                values[:, 1] = 1.0
+
+        return float(values[0, 0])
+
+    def _price_binomial(self) -> float:
+        n = len(self.grid)
+        period_cf = self._period_cashflows()
+
+        # flux par pas de grille : la période k est créditée au pas de sa date de début
+        step_cf = np.zeros(n)
+        step_cf[0:n - 1:self.steps_per_period] = period_cf
+        call_mask = self._call_step_mask()
 
         #condition finale
-        dt_last = year_fraction(self.times[-2], self.times[-1])
-
-        last_values = []
-        for _ in self.tree.tree[-1]:
-            cf_fixed = self.fixed_leg_cf(dt_last)
-            cf_float = self.floating_leg_cf(self.times[-2], self.times[-1])
-            last_values.append(cf_fixed - cf_float)
-
-        values.append(last_values)
-
-        #backward induction
-        for i in reversed(range(n - 1)):
-            t = self.times[i]
-            dt = year_fraction(t, self.times[i + 1])
-
-            current = []
-            next_values = values[-1]
-
-            for j, r in enumerate(self.tree.tree[i]):
-                cont = 0.5 * next_values[j] + 0.5 * next_values[j + 1]
-                cont *= self.tree.discount(i, r)
-
-                cf_fixed = self.fixed_leg_cf(dt)
-                cf_float = self.floating_leg_cf(t, self.times[i + 1])
-                cont += cf_fixed - cf_float
-
-                if self._is_call_date(t):
-                    value = min(cont, 0.0)
-                else:
-                    value = cont
-
-                current.append(value)
-
-            values.append(current)
-
-        return values[-1][0]
+        values = np.full(n, period_cf[-1])
+
+        #backward induction vectorisée sur chaque niveau
+        j = np.arange(n)
+        r0 = self.tree.r0
+        dx = self.tree.dx
+        dt = self.tree.dt
+        for i in range(n - 2, -1, -1):
+            r = r0 + (2.0 * j[:i + 1] - i) * dx[i]
+            values = 0.5 * (values[:-1] + values[1:]) * np.exp(-r * dt[i])
+            values += step_cf[i]
+
+            if call_mask[i]:
+                np.minimum(values, 0.0, out=values)
+
+        return values[0]
@@ -1,51 +1,249 @@
+# Constant Maturity Swap : taux de swap forward, annuités et ajustement de convexité par réplication statique
+import time
+
 import numpy as np
+from scipy.integrate import simpson
+from scipy.stats import norm
+
+from core.curves import ZeroCouponCurve
+from core.legs import LegEngine
+from core.market_data import SwaptionVolSurface
+from core.portfolio import SwapBlock, regular_schedules
+from core.utils import LRUCache
+
+
+# Blocs (forwards, annuités) d'un tenor, partagés par tous les CMS d'un même état de courbes
+annuity_cache = LRUCache(max_size=32)
+
+
+def annuity_mapping(rates, tau: float, n_periods: int, delay):
+    """
+    Fonction de Hagan P(T_f, T_p) / A(T_f) d'un swap de n_periods périodes
+    de longueur tau, en fonction de son propre taux (courbe plate en taux
+    de swap) ; delay = T_p - T_f.
+    """
+    x = tau * rates
+    log_growth = np.log1p(x)
+    denom = -np.expm1(-n_periods * log_growth)
+    small = np.abs(x) < 1e-7
+    inverse_annuity = np.where(small, (1.0 + 0.5 * (n_periods + 1) * x) / (n_periods * tau),
+                               rates / np.where(small, 1.0, denom))
+    return inverse_annuity * np.exp(-(delay / tau) * log_growth)
+
 
 class CMSPricer:
-    def __init__(self, discount_curve, swap_surface):
+    """
+    Swaps CMS : receveur du taux de swap de maturité constante (fixé en
+    début de période, payé en fin), payeur du fixe.
+
+    Taux de swap forward et annuités : pour chaque tenor, les échéanciers
+    des swaps sous-jacents de toutes les fixings forment un bloc (fixings x
+    périodes) ; les facteurs d'actualisation et de projection sont évalués
+    une seule fois sur les dates uniques du bloc. Les blocs sont mis en
+    cache par (courbes, tenor, fixings) dans annuity_cache.
+
+    Ajustement de convexité par réplication statique sous la mesure
+    annuité : E^{T_p}[S] = S0 + int f''(K) OTM(K) dK avec
+    f(K) = K G(K) / G(S0), G la fonction de Hagan (annuity_mapping) et OTM
+    les swaptions hors de la monnaie en modèle normal (vols de la nappe).
+    L'intégrale est une quadrature de Simpson sur une grille de strikes
+    S0 + std * u, vectorisée sur toutes les fixings uniques (fixing,
+    paiement, tenor).
+    """
+
+    def __init__(self, discount_curve: ZeroCouponCurve, swap_surface: SwaptionVolSurface = None,
+                 projection_curve: ZeroCouponCurve = None, swap_frequency: int = 1,
+                 n_strikes: int = 201, n_std: float = 8.0):
+        """
+        :param discount_curve: Courbe d'actualisation
+        :param swap_surface: Nappe de vols normales ATM des swaptions (None = pas d'ajustement de convexité)
+        :param projection_curve: Courbe de projection des swaps sous-jacents (par défaut la courbe d'actualisation)
+        :param swap_frequency: Fréquence de la jambe fixe des swaps sous-jacents (par an)
+        :param n_strikes: Nombre de strikes de la réplication (impair, Simpson)
+        :param n_std: Demi-largeur de la grille de strikes, en écarts-types
+        """
         self.discount_curve = discount_curve
         self.swap_surface = swap_surface
+        self.legs = LegEngine(discount_curve, projection_curve)
+        self.swap_frequency = swap_frequency
+        self.n_strikes = n_strikes | 1
+        self.n_std = n_std
+        self.report = None
+
+    def _n_periods(self, tenors) -> np.ndarray:
+        # nombre de périodes des swaps sous-jacents ; un tenor qui n'est pas un multiple de la période est refusé
+        tenors = np.asarray(tenors, dtype=float)
+        periods = tenors * self.swap_frequency
+        n_periods = np.rint(periods)
+        invalid = (n_periods < 1) | (np.abs(periods - n_periods) > 1e-9)
+        if np.any(invalid):
+            raise ValueError(f"tenors CMS incompatibles avec la fréquence {self.swap_frequency}: {np.unique(tenors[invalid])}")
+        return n_periods.astype(int)
+
+    def _swap_block(self, fixings, tenor: float) -> tuple:
+        # bloc (fixings x périodes) des swaps sous-jacents, une évaluation de courbe par date unique
+        tau = 1.0 / self.swap_frequency
+        ends = fixings[:, None] + np.arange(1, int(self._n_periods(tenor)) + 1) * tau
+        starts = ends - tau
+        dates, index = np.unique(np.concatenate((starts, ends), axis=1), return_inverse=True)
+        index = index.reshape(len(fixings), -1)
+        P_d = self.legs.discount_factors(dates)[index]
+        P_p = self.legs.projection_curve.get_discount_factor(dates)[index]
+
+        n = ends.shape[1]
+        accrual = self.legs.accruals(starts, ends)
+        forwards = P_p[:, :n] / P_p[:, n:] - 1.0
+        annuity = np.sum(accrual * P_d[:, n:], axis=1)
+        swap_rates = np.sum(forwards * P_d[:, n:], axis=1) / annuity
+        return swap_rates, annuity
+
+    def swap_rates(self, fixing_times, tenors) -> tuple:
+        """
+        Taux de swap forward et annuités (en date 0) des swaps sous-jacents.
+
+        :param fixing_times: Dates de fixing (années), début des swaps sous-jacents
+        :param tenors: Tenors des swaps sous-jacents (années), diffusables avec fixing_times ; multiples
+                       de la période de la jambe fixe (1 / swap_frequency), sinon ValueError
+        :return: (taux de swap forward, annuités), de la forme diffusée
+        """
+        fixing_times, tenors = np.broadcast_arrays(np.asarray(fixing_times, dtype=float),
+                                                   np.asarray(tenors, dtype=float))
+        self._n_periods(tenors)
+        rates = np.empty(fixing_times.shape)
+        annuities = np.empty(fixing_times.shape)
+        curves = (self.legs.discount_curve.fingerprint(), self.legs.projection_curve.fingerprint())
+        for tenor in np.unique(tenors):
+            rows = tenors == tenor
+            fixings, inverse = np.unique(fixing_times[rows], return_inverse=True)
+            key = curves + (self.swap_frequency, float(tenor), fixings.tobytes())
+            block_rates, block_annuities = annuity_cache.get_or_build(key, lambda: self._swap_block(fixings, tenor))
+            rates[rows] = block_rates[inverse]
+            annuities[rows] = block_annuities[inverse]
+        return rates, annuities
+
+    def convexity_adjustments(self, forwards, fixing_times, pay_times, tenors) -> np.ndarray:
+        """
+        Ajustements de convexité E^{T_p}[S] - S0 par réplication statique.
 
-    def get_discount_factor(self, date):
-        return 1 / (1 + 0.03 * date)
+        :param forwards: Taux de swap forward S0
+        :param fixing_times: Dates de fixing
+        :param pay_times: Dates de paiement des coupons CMS
+        :param tenors: Tenors des swaps sous-jacents
+        """
+        forwards, fixing_times, pay_times, tenors = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (forwards, fixing_times, pay_times, tenors)))
+        if self.swap_surface is None:
+            return np.zeros(forwards.shape)
 
-    def get_forward_swap_rate(self, date, tenor):
-        return 0.035  # 3.5%
+        # une quadrature par fixing unique (fixing, paiement, tenor, S0)
+        points = np.column_stack((fixing_times.ravel(), pay_times.ravel(), tenors.ravel(), forwards.ravel()))
+        unique, inverse = np.unique(points, axis=0, return_inverse=True)
+        fix, pay, tenor, S0 = unique.T
+        expiry = np.maximum(fix, 0.0)
+        std = self.swap_surface.vol(expiry, tenor) * np.sqrt(expiry)
 
-    def get_convexity_adjustment(self, fwd_rate, vol, time):
-        convexity = 0.5 * (fwd_rate ** 2) * (vol ** 2) * time 
-        return convexity
+        tau = 1.0 / self.swap_frequency
+        n_periods = self._n_periods(tenor)[:, None]
+        delay = (pay - fix)[:, None]
+        u = np.linspace(-self.n_std, self.n_std, self.n_strikes)
+        K = S0[:, None] + std[:, None] * u
+
+        # f''(K) par différences centrées ; strikes sous -1/tau (annuité infinie) exclus
+        h = 1e-4
+        valid = tau * (K - h) > -0.99
+        K_safe = np.where(valid, K, 0.0)
+        G0 = annuity_mapping(S0[:, None], tau, n_periods, delay)
+
+        def f(k):
+            return k * annuity_mapping(k, tau, n_periods, delay) / G0
+
+        f2 = (f(K_safe + h) - 2.0 * f(K_safe) + f(K_safe - h)) / (h * h)
+
+        # swaptions normales hors de la monnaie (non actualisées, par unité d'annuité)
+        otm = std[:, None] * (norm.pdf(u) - np.abs(u) * norm.cdf(-np.abs(u)))
+        adjustments = simpson(np.where(valid, f2 * otm, 0.0), x=K, axis=1)
+        return adjustments[inverse.ravel()].reshape(forwards.shape)
+
+    def cms_rates(self, fixing_times, pay_times, tenors) -> dict:
+        """
+        Taux CMS ajustés de coupons quelconques (tous trades confondus).
+
+        :return: dict avec forward, convexity, rate (forward + convexity) et annuity
+        """
+        forwards, annuities = self.swap_rates(fixing_times, tenors)
+        convexity = self.convexity_adjustments(forwards, fixing_times, pay_times, tenors)
+        return {"forward": forwards, "convexity": convexity, "rate": forwards + convexity, "annuity": annuities}
+
+    def price_book(self, block: SwapBlock, cms_tenors) -> dict:
+        """
+        Bloc de swaps CMS : la jambe flottante du SwapBlock paie le taux CMS
+        (+ spread) fixé en début de période.
+
+        :param block: Bloc de swaps (notionnels, taux fixes, échéanciers, spreads)
+        :param cms_tenors: Tenor CMS par trade (n,) ou scalaire
+        :return: dict avec price, leg_cms, leg_fix (n,), coupons (taux par période) et elapsed_ms
+        """
+        start = time.perf_counter()
+        mask = block.mask
+        tenors = np.broadcast_to(np.asarray(cms_tenors, dtype=float).reshape(-1, 1), mask.shape)
+        coupons = self.cms_rates(block.starts[mask], block.pay_times[mask], tenors[mask])
+
+        rates = np.zeros(mask.shape)
+        rates[mask] = coupons["rate"]
+        weight = np.where(mask, block.notionals * self.legs.accruals(block.starts, block.ends), 0.0)
+        df = self.legs.discount_factors(block.pay_times)
+        leg_cms = np.sum(weight * (rates + block.spreads) * df, axis=1)
+        leg_fix = np.sum(weight * block.fixed_rates * df, axis=1)
+
+        self.report = {
+            "price": leg_cms - leg_fix,
+            "leg_cms": leg_cms,
+            "leg_fix": leg_fix,
+            "coupons": coupons,
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+        return self.report
 
     def calculate_price(self, nominal, fix_rate, maturity_years, cms_tenor, payment_frequency=1):
-        pv_cms_leg = 0
-        pv_fix_leg = 0
-        
-        schedule = np.arange(1, maturity_years + 1, 1/payment_frequency)
-        
-        for ti in schedule:
-            year_frac = 1.0 / payment_frequency
-            df = self.get_discount_factor(ti)
-            
-            fwd_s = self.get_forward_swap_rate(ti, cms_tenor)
-            
-            vol_swap = 0.20
-            conv_adj = self.get_convexity_adjustment(fwd_s, vol_swap, ti)
-            
-            adjusted_cms_i = fwd_s + conv_adj
-            
-            flow_cms = adjusted_cms_i * year_frac
-            
-            pv_cms_leg += df * flow_cms
-            
-            flow_fix = fix_rate * year_frac
-            pv_fix_leg += df * flow_fix
-
-        pv_cms_leg *= nominal
-        pv_fix_leg *= nominal
-        
-        price = pv_cms_leg - pv_fix_leg
-        
+        """
+        Swap CMS unique : reçoit le CMS de tenor cms_tenor, paie fix_rate.
+
+        :return: dict avec price, leg_cms, leg_fix et le détail des fixings
+        """
+        block = SwapBlock(np.array([float(nominal)]), np.array([float(fix_rate)]),
+                          regular_schedules([maturity_years], [payment_frequency]))
+        report = self.price_book(block, cms_tenor)
         return {
-            "price": price,
-            "leg_cms": pv_cms_leg,
-            "leg_fix": pv_fix_leg
+            "price": float(report["price"][0]),
+            "leg_cms": float(report["leg_cms"][0]),
+            "leg_fix": float(report["leg_fix"][0]),
+            "fixing_times": block.starts[block.mask],
+            "forward": report["coupons"]["forward"],
+            "convexity": report["coupons"]["convexity"],
         }
+
+
+if __name__ == "__main__":
+    # test rapide : swap CMS 10Y, puis un bloc de 1000 swaps CMS 2Y / 5Y / 10Y
+    curve = ZeroCouponCurve([0.5, 1, 2, 5, 10, 30], [0.025, 0.027, 0.03, 0.032, 0.033, 0.034])
+    pricer = CMSPricer(curve, SwaptionVolSurface.mock())
+    res = pricer.calculate_price(1_000_000, 0.033, 10, 10.0)
+    print(f"CMS 10Y sur 10 ans : {res['price']:,.2f} (jambe CMS {res['leg_cms']:,.2f}, fixe {res['leg_fix']:,.2f})")
+    print(f"ajustements de convexité (pb) : {np.round(res['convexity'] * 1e4, 2)}")
+
+    # contrôle : au premier ordre, l'ajustement vaut sigma^2 T G'(S0) / G(S0)
+    S0, _ = pricer.swap_rates(5.0, 10.0)
+    h = 1e-6
+    slope = np.log(annuity_mapping(S0 + h, 1.0, 10, 1.0) / annuity_mapping(S0 - h, 1.0, 10, 1.0)) / (2 * h)
+    first_order = pricer.swap_surface.vol(5.0, 10.0) ** 2 * 5.0 * slope
+    exact = pricer.convexity_adjustments(S0, 5.0, 6.0, 10.0)
+    print(f"convexité 5y x 10y : réplication {exact * 1e4:.4f} pb, premier ordre {first_order * 1e4:.4f} pb")
+
+    rng = np.random.default_rng(0)
+    n = 1000
+    block = SwapBlock(rng.uniform(1e6, 1e7, size=n), rng.uniform(0.02, 0.04, size=n),
+                      regular_schedules(rng.integers(1, 21, size=n), rng.choice([1, 2, 4], size=n)))
+    tenors = rng.choice([2.0, 5.0, 10.0], size=n)
+    for label in ("froid", "cache"):
+        report = pricer.price_book(block, tenors)
+        print(f"{n} swaps CMS ({label}) en {report['elapsed_ms']:.0f} ms")
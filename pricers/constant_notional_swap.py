@@ -1,4 +1,5 @@
 from core.curves import ZeroCouponCurve
+from core.legs import LegEngine, as_pv, period_bounds
 
 class ConstantNotionalSwapPricer:
     def __init__(
@@ -18,6 +19,7 @@ class ConstantNotionalSwapPricer:
         self.K = fixed_rate
         self.discount_curve = discount_curve
         self.projection_curve = projection_curve
+        self.legs = LegEngine(discount_curve, projection_curve)
 
     # Création des dates de paiement
     def create_payment_times(self):
@@ -30,44 +32,17 @@ class ConstantNotionalSwapPricer:
 
     # Calcul des cashflows fixes
     def compute_fixed_cashflows(self):
-        cashflows = []
+        t_prev, t = period_bounds(self.payment_times)
+        return self.legs.fixed_cashflows(t_prev, t, self.N, self.K)
 
-        for i in range(1, len(self.payment_times)):
-            alpha_i = self.payment_times[i] - self.payment_times[i - 1]
-            Ci = self.N * self.K * alpha_i
-            cashflows.append(Ci)
-
-        return cashflows
-
-    # Calcul des cashflows flottants (forward IBOR déterministe)
+    # Calcul des cashflows flottants (forward IBOR déterministe, composition simple)
     def compute_floating_cashflows(self):
-        cashflows = []
-
-        for i in range(1, len(self.payment_times)):
-            t_prev = self.payment_times[i - 1]
-            t = self.payment_times[i]
-            alpha_i = t - t_prev
-
-            P0 = self.projection_curve.get_discount_factor(t_prev)
-            P1 = self.projection_curve.get_discount_factor(t)
-
-            forward_rate = (P0 / P1 - 1.0) / alpha_i
-            Ci = self.N * forward_rate * alpha_i
-
-            cashflows.append(Ci)
-
-        return cashflows
+        t_prev, t = period_bounds(self.payment_times)
+        return self.legs.floating_cashflows(t_prev, t, self.N, compounding="simple")
 
     # Actualisation OIS
     def compute_present_value(self, cashflows):
-        pv = 0.0
-
-        for i, Ci in enumerate(cashflows):
-            Ti = self.payment_times[i + 1]
-            df = self.discount_curve.get_discount_factor(Ti)
-            pv += Ci * df
-
-        return pv
+        return as_pv(self.legs.present_value(cashflows, self.payment_times[1:]))
 
     def price_constant_notional(self) -> float:
         # Dates de paiement
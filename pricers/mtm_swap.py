@@ -1,6 +1,6 @@
 import numpy as np
 from core.curves import ZeroCouponCurve
-from core.utils import year_fraction
+from core.legs import LegEngine, as_pv, period_bounds
 
 class MtMSwapPricer:
     def __init__(self, base_notional, fx_rates, payment_times, fixed_rate, discount_curve):
@@ -9,21 +9,17 @@ class MtMSwapPricer:
         self.times = np.array(payment_times)
         self.fixed_rate = fixed_rate
         self.curve = discount_curve
+        self.legs = LegEngine(discount_curve)
 
-    def price(self) -> float:
-        pv = 0.0
+    def notionals(self) -> np.ndarray:
+        # notionnel de chaque période réajusté sur le fixing FX de fin de période
         s0 = self.fx_rates[0]
-        
-        for i in range(len(self.times) - 1):
-            t_start = self.times[i]
-            t_end = self.times[i+1]
-            dt = year_fraction(t_start, t_end)
-            
-            notional_i = self.n0 * (self.fx_rates[i+1] / s0)
-            
-            fwd = self.curve.get_forward_rate(t_start, t_end)
-            df = self.curve.get_discount_factor(t_end)
-            
-            pv += notional_i * (fwd - self.fixed_rate) * dt * df
-            
-        return pv
\ No newline at end of file
+        return self.n0 * (self.fx_rates[1:len(self.times)] / s0)
+
+    def price(self) -> float:
+        t_start, t_end = period_bounds(self.times)
+        notionals = self.notionals()
+
+        floating = self.legs.floating_cashflows(t_start, t_end, notionals)
+        fixed = self.legs.fixed_cashflows(t_start, t_end, notionals, self.fixed_rate)
+        return as_pv(self.legs.present_value(floating - fixed, t_end))
\ No newline at end of file
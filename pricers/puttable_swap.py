@@ -1,7 +1,14 @@
 import numpy as np
 
+from core.hull_white import HullWhiteModel
+from core.longstaff_schwartz import CancellableSwapBook, LongstaffSchwartzEngine
+from core.portfolio import SwapBlock
+
 class PuttableSwapPricer:
-    def __init__(self, notional, maturity, fixed_rate, frequency, a, sigma, discount_curve, projection_curve):
+    def __init__(self, notional, maturity, fixed_rate, frequency, a, sigma, discount_curve, projection_curve,
+                 method="heuristic", n_paths=20_000):
+        # method : "heuristic" (approximation de valeur temps) ou "lsm" (Longstaff-Schwartz sous Hull-White,
+        # résiliation possible à chaque date de paiement avant l'échéance)
         self.notional = notional
         self.maturity = maturity
         self.fixed_rate = fixed_rate
@@ -10,6 +17,21 @@ class PuttableSwapPricer:
         self.sigma = sigma
         self.discount_curve = discount_curve
         self.projection_curve = projection_curve
+        if method not in ("heuristic", "lsm"):
+            raise ValueError(f"methode inconnue: {method}")
+        self.method = method
+        self.n_paths = n_paths
+
+    def book(self) -> CancellableSwapBook:
+        # payeur du fixe avec droit de résilier aux dates de paiement intermédiaires
+        times = np.linspace(1/self.n_payments, self.maturity, int(self.maturity * self.n_payments))
+        block = SwapBlock([self.notional], [self.fixed_rate], [np.concatenate(([0.0], times))])
+        return CancellableSwapBook(block, [times[:-1]], holder_exercises=True)
+
+    def option_value_lsm(self, sigma) -> float:
+        engine = LongstaffSchwartzEngine(HullWhiteModel(self.a, sigma), self.discount_curve, self.projection_curve,
+                                         n_paths=self.n_paths)
+        return float(engine.run(self.book())["option"][0])
 
     def price(self, custom_sigma=None):
         # Permet de tester différents scénarios de volatilité
@@ -38,6 +60,9 @@ class PuttableSwapPricer:
             })
             
         # Valeur de l'option (Put) : Droit de résilier si la PV du swap devient trop négative
+        if self.method == "lsm":
+            return pv_vanilla, self.option_value_lsm(sig), details
+
         # Modélisation via l'approximation de la valeur temps de Hull-White
         time_value_factor = (sig * np.sqrt(self.maturity)) / (self.a + 0.05)
         option_value = max(0, -pv_vanilla) * time_value_factor * 0.5
@@ -1,6 +1,12 @@
+from functools import partial
+
 from core.curves import ZeroCouponCurve
 from core.hull_white import HullWhiteModel
+from core.monte_carlo import MonteCarloEngine, concat_chunks
 import numpy as np
+from scipy.stats import norm, qmc
+
+SAMPLING_METHODS = ("pseudo", "antithetic", "sobol")
 
 class RangeAccrualSwapPricer:
     def __init__(
@@ -15,8 +21,21 @@ class RangeAccrualSwapPricer:
         projection_curve: ZeroCouponCurve,
         hw_model,
         n_paths=10000,
-        seed=42
+        seed=42,
+        block_size=252,
+        sampling="pseudo",
+        control_variate=False,
+        n_replicates=16,
+        mc_engine: MonteCarloEngine = None,
+        path_store=None
     ):
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"methode d'echantillonnage inconnue: {sampling}")
+        if mc_engine is None:
+            mc_engine = MonteCarloEngine(seed=seed)
+        if sampling == "antithetic" and mc_engine.chunk_size % 2:
+            raise ValueError("chunk_size doit être pair en mode antithetic (paires z / -z)")
+
         self.N = notional
         self.T0 = 0.0
         self.Tn = maturity
@@ -30,39 +49,114 @@ class RangeAccrualSwapPricer:
         self.hw_model = hw_model
         self.n_paths = n_paths
         self.seed = seed
-
-    # Simulation Ornstein-Uhlenbeck des x(t)
+        self.block_size = block_size  # nb de dates d'observation simulées à la fois (mode streaming)
+        self.sampling = sampling  # "pseudo", "antithetic" (paires z / -z) ou "sobol" (Sobol brouillé + pont brownien)
+        self.control_variate = control_variate  # variable de contrôle : forward moyen de la période
+        self.n_replicates = n_replicates  # nb de brouillages Sobol indépendants (erreur standard en mode sobol)
+        # paquets de trajectoires, un flux SeedSequence par paquet (par réplique en mode sobol) :
+        # résultat identique quel que soit le nombre de workers
+        self.mc_engine = mc_engine
+        self.report = None
+        # cache de trajectoires partagé (core.path_store.PathStore) : en mode pseudo / antithetic
+        # hors streaming, les x(t) d'un même (a, sigma, grille, graine) ne sont simulés qu'une fois
+        self.path_store = path_store
+
+    # Nombre de trajectoires réellement simulées (self.report["n_paths"] après pricing) :
+    # - antithetic : nombre pair (n_paths // 2 paires)
+    # - sobol : n_replicates blocs de 2^m points, 2^m >= n_paths / n_replicates (arrondi à la
+    #   puissance de 2 supérieure : jamais moins de trajectoires que demandé)
+    def n_simulated_paths(self):
+        if self.sampling == "antithetic":
+            return 2 * max(self.n_paths // 2, 1)
+        if self.sampling == "sobol":
+            return self.n_replicates * self._sobol_points_per_replicate()
+        return self.n_paths
+
+    def _sobol_points_per_replicate(self):
+        per_replicate = max(-(-int(self.n_paths) // self.n_replicates), 2)
+        return 1 << (per_replicate - 1).bit_length()
+
+    # Tirages gaussiens d'un bloc de dates (n_draws x n) en mode pseudo / antithetic ;
+    # en antithetic les trajectoires 2k et 2k+1 forment une paire (z, -z)
+    def _normal_block(self, rng, n_draws, n):
+        if self.sampling == "antithetic":
+            z = np.empty((n_draws, n))
+            z[:, 0::2] = rng.normal(size=(n_draws, n // 2))
+            z[:, 1::2] = -z[:, 0::2]
+            return z
+        return rng.normal(size=(n_draws, n))
+
+    # Simulation Ornstein-Uhlenbeck des x(t), par paquets de trajectoires
     def simulate_x_paths(self, obs_grid):
-        rng = np.random.default_rng(self.seed)
-        n_times = len(obs_grid)
-        x = np.zeros((self.n_paths, n_times))
-
-        a = self.hw_model.a
-        sigma = self.hw_model.sigma
-
-        for j in range(1, n_times):
-            dt = obs_grid[j] - obs_grid[j - 1]
-            z = rng.normal(size=self.n_paths)
-
-            # schéma exact OU
-            x[:, j] = (
-                x[:, j - 1] * np.exp(-a * dt)
-                + sigma * np.sqrt((1 - np.exp(-2 * a * dt)) / (2 * a)) * z
-            )
-
-        return x
+        if self.sampling == "sobol":
+            return self.simulate_x_paths_sobol(obs_grid)
+        if self.path_store is not None:
+            return self.path_store.hull_white_paths(self.hw_model, obs_grid, self.n_simulated_paths(), self.mc_engine,
+                                                    antithetic=self.sampling == "antithetic")
+        return self.mc_engine.run_concat(partial(self._simulate_x_chunk, obs_grid), self.n_simulated_paths())
+
+    def _simulate_x_chunk(self, obs_grid, rng, n):
+        # schéma exact OU (HullWhiteModel.simulate_x), paires (x, -x) en antithetic
+        return self.hw_model.simulate_x(obs_grid, rng, n, antithetic=self.sampling == "antithetic")
+
+    # Simulation quasi-Monte Carlo : x(t) = exp(-a t) W(v(t)) avec v(t) = e^{2at} var(x(t)) (variance_clock),
+    # le mouvement brownien W étant construit par pont brownien sur l'horloge v : les premières
+    # dimensions Sobol (les mieux réparties) fixent la valeur finale puis les milieux successifs.
+    # Chaque réplique (un brouillage indépendant) est un paquet du moteur Monte Carlo.
+    def simulate_x_paths_sobol(self, obs_grid):
+        return concat_chunks(self._map_sobol_replicates(obs_grid, self._sobol_x_chunk))
+
+    def _map_sobol_replicates(self, obs_grid, task):
+        t = np.asarray(obs_grid, dtype=float)
+        v = self.hw_model.variance_clock(t)
+
+        plan = self._brownian_bridge_plan(v)
+        sizes = [self._sobol_points_per_replicate()] * self.n_replicates
+        return self.mc_engine.map(partial(task, obs_grid, plan), sizes)
+
+    def _sobol_x_chunk(self, obs_grid, plan, rng, n):
+        t = np.asarray(obs_grid, dtype=float)
+        n_times = len(t)
+        sampler = qmc.Sobol(d=n_times - 1, scramble=True, seed=rng)
+        u = sampler.random_base2(int(np.log2(n)))
+        z = norm.ppf(np.clip(u, 1e-12, 1 - 1e-12))
+
+        w = np.zeros((n_times, n))
+        for k, (m, left, right, w_left, w_right, std) in enumerate(plan):
+            w[m] = w_left * w[left] + w_right * w[right] + std * z[:, k]
+
+        return (np.exp(-self.hw_model.a * t)[:, None] * w).T
+
+    def _sobol_statistics_chunk(self, obs_grid, plan, rng, n):
+        return self.path_statistics_mc(obs_grid, self._sobol_x_chunk(obs_grid, plan, rng, n))
+
+    # Ordre de construction du pont brownien sur les temps v (v[0] = 0, W(0) = 0) :
+    # liste de (indice, gauche, droite, poids gauche, poids droite, écart-type)
+    @staticmethod
+    def _brownian_bridge_plan(v):
+        n = len(v) - 1
+        if n == 0:
+            return []
+        # valeur finale : W(v_n) = sqrt(v_n) * z  (la colonne 0 vaut toujours 0)
+        plan = [(n, 0, 0, 0.0, 0.0, np.sqrt(v[n] - v[0]))]
+        intervals = [(0, n)]
+        while intervals:
+            next_intervals = []
+            for left, right in intervals:
+                if right - left < 2:
+                    continue
+                m = (left + right) // 2
+                span = v[right] - v[left]
+                w_left = (v[right] - v[m]) / span
+                w_right = (v[m] - v[left]) / span
+                std = np.sqrt((v[m] - v[left]) * (v[right] - v[m]) / span)
+                plan.append((m, left, right, w_left, w_right, std))
+                next_intervals += [(left, m), (m, right)]
+            intervals = next_intervals
+        return plan
     
     def bond_price_hw(self, t, T, x_t):
-        P0T = self.projection_curve.get_discount_factor(T)
-        P0t = self.projection_curve.get_discount_factor(t)
-
-        B = self.hw_model.calc_b(t, T)
-        var = self.hw_model.calc_variance(t)
-
-        return (
-            P0T / P0t
-            * np.exp(-B * x_t - 0.5 * B * B * var)
-        )
+        return self.hw_model.bond_price(self.projection_curve, t, T, x_t)
     
     # InterBank Offered Rate (IBOR) utilisé pour le forward rate
     def forward_ibor_hw(self, t, delta, x_t):
@@ -70,6 +164,52 @@ class RangeAccrualSwapPricer:
         P = np.maximum(P, 1e-12)
         return (1.0 / P - 1.0) / delta
 
+    # Partie déterministe de P(t,t+delta) = A(t) exp(-B x), calculée une seule fois sur toute
+    # la grille d'observation (P(0,t), P(0,t+delta), B(t,t+delta), var(t) en appels vectorisés)
+    def forward_coefficients(self, obs_grid):
+        delta = self.get_tenor_ibor()
+        t = np.asarray(obs_grid, dtype=float)
+
+        P0t = self.projection_curve.get_discount_factor(t)
+        P0T = self.projection_curve.get_discount_factor(t + delta)
+        B = self.hw_model.calc_b(t, t + delta)
+        var = self.hw_model.calc_variance(t)
+        log_A = np.log(P0T / P0t) - 0.5 * B * B * var
+
+        return log_A, B, var
+
+    # Bornes sur x(t) équivalentes au range :
+    # L = (1/P - 1)/delta est croissant en x (B > 0), donc
+    #   L >= lower  <=>  x >= (ln A + ln(1 + lower*delta)) / B
+    #   L <= upper  <=>  x <= (ln A + ln(1 + upper*delta)) / B
+    def range_thresholds(self, obs_grid):
+        delta = self.get_tenor_ibor()
+        log_A, B, _ = self.forward_coefficients(obs_grid)
+
+        if 1.0 + self.lower * delta > 0:
+            x_lo = (log_A + np.log1p(self.lower * delta)) / B
+        else:
+            x_lo = np.full(len(B), -np.inf)  # borne basse toujours respectée
+
+        if 1.0 + self.upper * delta > 0:
+            x_hi = (log_A + np.log1p(self.upper * delta)) / B
+        else:
+            x_hi = np.full(len(B), -np.inf)  # borne haute jamais respectée
+
+        return x_lo, x_hi
+
+    # Forward IBOR simulé (n_dates x n_paths) à partir des coefficients de la grille
+    @staticmethod
+    def _forwards_from_coefficients(log_A, B, x, delta):
+        return (np.exp(B[:, None] * x - log_A[:, None]) - 1.0) / delta
+
+    # Espérance exacte du forward simulé à chaque date :
+    # x(t) ~ N(0, var(t)) donc E[1/P(t,t+delta)] = P(0,t)/P(0,t+delta) * exp(B^2 var)
+    def expected_forwards(self, obs_grid):
+        delta = self.get_tenor_ibor()
+        log_A, B, var = self.forward_coefficients(obs_grid)
+        return (np.exp(0.5 * B * B * var - log_A) - 1.0) / delta
+
 
     # On crée une liste des dates de paiement
     def create_payment_times(self):
@@ -107,40 +247,166 @@ class RangeAccrualSwapPricer:
     # Ai represent le pourcentage de temps passé dans l'intervalle [lower_bound, upper_bound] pour la période i
     # On transforme en montcarlo
     def Ai_computation_mc(self, obs_grid, x_paths):
-        Ai_list = []
-        delta = self.get_tenor_ibor()
-
+        fractions, _ = self.path_statistics_mc(obs_grid, x_paths)
+        # Moyenne Monte Carlo
+        return [float(f.mean()) for f in fractions]
+
+    # Statistiques par trajectoire sur la matrice complète des x(t) :
+    # fractions (n_periods x n_paths) de temps dans le range et, si la variable
+    # de contrôle est active, forwards moyens par période (sinon None)
+    def path_statistics_mc(self, obs_grid, x_paths):
+        x_lo, x_hi = self.range_thresholds(obs_grid)
+
+        # Indicateur dans le range pour toutes les dates en une seule opération
+        in_range = (x_paths >= x_lo) & (x_paths <= x_hi)
+        if self.control_variate:
+            log_A, B, _ = self.forward_coefficients(obs_grid)
+            forwards = self._forwards_from_coefficients(log_A, B, x_paths.T, self.get_tenor_ibor()).T
+
+        ranges = self.period_grid_ranges(obs_grid)
+        fractions = np.empty((len(ranges), x_paths.shape[0]))
+        mean_forwards = np.empty_like(fractions) if self.control_variate else None
         # On parcourt chaque période de paiement
-        for obs_times_i in self.observation_times:
-
-            # Nombre de jours d'observation dans la période
-            n_obs = len(obs_times_i)
-
-            # Tableau pour stocker, pour chaque scénario,nle nombre de jours où le taux est dans le range
-            count_in_range = np.zeros(self.n_paths)
-
-            # Boucle sur les jours de la période
-            for t in obs_times_i:
-                t_key = round(t, 10) # arrondi pour éviter les problèmes de flottement
-                time_index = obs_grid.index(t_key)
-
-                x_t = x_paths[:, time_index]
-
-                L = self.forward_ibor_hw(t_key, delta, x_t)
-                in_range = (L >= self.lower) & (L <= self.upper)
-                count_in_range += in_range.astype(float)
-
-
+        for i, (lo, hi, n_obs) in enumerate(ranges):
             # Fraction de temps dans le range pour chaque scénario
-            fraction_in_range = count_in_range / n_obs
+            fractions[i] = in_range[:, lo:hi + 1].sum(axis=1) / n_obs
+            if self.control_variate:
+                mean_forwards[i] = forwards[:, lo:hi + 1].sum(axis=1) / n_obs
 
-            # Moyenne Monte Carlo
-            Ai = fraction_in_range.mean()
+        return fractions, mean_forwards
 
-            Ai_list.append(float(Ai))
 
-        return Ai_list
+    # Plage [début, fin] d'indices de la grille couverte par chaque période
+    # (les dates d'une période sont contiguës dans la grille triée ; deux
+    # périodes consécutives peuvent partager leur date frontière)
+    def period_grid_ranges(self, obs_grid):
+        grid = np.asarray(obs_grid)
+        ranges = []
+        for obs_times_i in self.observation_times:
+            idx = np.searchsorted(grid, [round(t, 10) for t in obs_times_i])
+            ranges.append((int(idx[0]), int(idx[-1]), len(obs_times_i)))
+        return ranges
+
+    def Ai_computation_streaming(self, obs_grid):
+        fractions, _ = self.path_statistics_streaming(obs_grid)
+        return [float(f.mean()) for f in fractions]
+
+    # Version streaming : l'état OU avance par blocs de dates, et les jours
+    # dans le range sont cumulés par période au fil de l'eau.
+    # Mémoire O(chunk_size x block_size) au lieu de O(n_paths x n_obs).
+    # Mêmes flux aléatoires que simulate_x_paths : résultat identique.
+    # En mode sobol, chaque réplique est simulée sur toute la grille (pont brownien).
+    def path_statistics_streaming(self, obs_grid):
+        if self.sampling == "sobol":
+            return concat_chunks(self._map_sobol_replicates(obs_grid, self._sobol_statistics_chunk), axis=1)
+
+        # coefficients du schéma exact OU et bornes du range, une fois pour toute la grille
+        t = np.asarray(obs_grid, dtype=float)
+        decay, vol = self.hw_model.step_coefficients(t[:-1], t[1:])
+        setup = {
+            "decay": decay,
+            "vol": vol,
+            "thresholds": self.range_thresholds(obs_grid),
+            "forward_coefficients": self.forward_coefficients(obs_grid) if self.control_variate else None,
+            "ranges": self.period_grid_ranges(obs_grid),
+        }
+        task = partial(self._streaming_statistics_chunk, obs_grid, setup)
+        return self.mc_engine.run_concat(task, self.n_simulated_paths(), axis=1)
+
+    def _streaming_statistics_chunk(self, obs_grid, setup, rng, n_sim):
+        delta = self.get_tenor_ibor()
+        decay, vol = setup["decay"], setup["vol"]
+        x_lo, x_hi = setup["thresholds"]
+        if self.control_variate:
+            log_A, B, _ = setup["forward_coefficients"]
 
+        ranges = setup["ranges"]
+        counts = [np.zeros(n_sim) for _ in ranges]
+        fwd_sums = [np.zeros(n_sim) for _ in ranges] if self.control_variate else None
+        fractions = np.empty((len(ranges), n_sim))
+        mean_forwards = np.empty_like(fractions) if self.control_variate else None
+
+        n_times = len(obs_grid)
+        x = np.zeros(n_sim)
+        first_open = 0  # première période pas encore terminée
+
+        for b0 in range(0, n_times, self.block_size):
+            b1 = min(b0 + self.block_size, n_times)
+
+            # tirages du bloc (dans le même ordre que la simulation complète)
+            n_draws = b1 - max(b0, 1)
+            z_block = self._normal_block(rng, n_draws, n_sim) if n_draws > 0 else None
+
+            x_block = np.empty((b1 - b0, n_sim))
+            for j in range(b0, b1):
+                if j > 0:
+                    # schéma exact OU
+                    x = x * decay[j - 1] + vol[j - 1] * z_block[j - max(b0, 1)]
+                x_block[j - b0] = x
+
+            # indicateur dans le range : une seule comparaison diffusée sur le bloc
+            in_block = (x_block >= x_lo[b0:b1, None]) & (x_block <= x_hi[b0:b1, None])
+            if self.control_variate:
+                fwd_block = self._forwards_from_coefficients(log_A[b0:b1], B[b0:b1], x_block, delta)
+
+            # cumul par période sur la partie du bloc qui la recouvre
+            for i in range(first_open, len(ranges)):
+                lo, hi, n_obs = ranges[i]
+                if lo >= b1:
+                    break
+                start, stop = max(lo, b0), min(hi + 1, b1)
+                if start < stop:
+                    counts[i] += in_block[start - b0:stop - b0].sum(axis=0)
+                    if self.control_variate:
+                        fwd_sums[i] += fwd_block[start - b0:stop - b0].sum(axis=0)
+                if hi < b1:
+                    # période terminée : on libère ses compteurs
+                    fractions[i] = counts[i] / n_obs
+                    counts[i] = None
+                    if self.control_variate:
+                        mean_forwards[i] = fwd_sums[i] / n_obs
+                        fwd_sums[i] = None
+                    first_open = i + 1
+
+        return fractions, mean_forwards
+
+    # Estimation des Ai et de leurs erreurs standard à partir des statistiques par trajectoire.
+    # Variable de contrôle : Ai_cv = mean(F_i) - beta_i (mean(Y_i) - E[Y_i]), beta_i = cov(F_i, Y_i) / var(Y_i).
+    # Unités indépendantes pour l'erreur standard : trajectoires (pseudo), paires (antithetic)
+    # ou répliques brouillées (sobol).
+    def estimate_Ai(self, obs_grid, fractions, mean_forwards=None):
+        samples = fractions
+        if mean_forwards is not None:
+            expected = self.expected_forwards(obs_grid)
+            centered = np.empty_like(mean_forwards)
+            self.cv_betas = []
+            for i, (lo, hi, n_obs) in enumerate(self.period_grid_ranges(obs_grid)):
+                centered[i] = mean_forwards[i] - expected[lo:hi + 1].sum() / n_obs
+                var_y = centered[i].var()
+                beta = np.mean((fractions[i] - fractions[i].mean()) * centered[i]) / var_y if var_y > 0 else 0.0
+                self.cv_betas.append(float(beta))
+            samples = fractions - np.array(self.cv_betas)[:, None] * centered
+
+        if self.sampling == "antithetic":
+            units = 0.5 * (samples[:, 0::2] + samples[:, 1::2])
+        elif self.sampling == "sobol":
+            units = samples.reshape(len(samples), self.n_replicates, -1).mean(axis=2)
+        else:
+            units = samples
+
+        n_units = units.shape[1]
+        Ai_list = [float(s.mean()) for s in samples]
+        Ai_std_errors = units.std(axis=1, ddof=1) / np.sqrt(n_units)
+
+        # erreur standard de la PV : PV = sum_i N c alpha_i DF(T_i) Ai
+        weights = np.array([
+            self.N * self.c * (self.payment_times[i] - self.payment_times[i - 1])
+            * self.discount_curve.get_discount_factor(self.payment_times[i])
+            for i in range(1, len(self.payment_times))
+        ])
+        pv_std_error = float((weights @ units).std(ddof=1) / np.sqrt(n_units))
+
+        return Ai_list, [float(s) for s in Ai_std_errors], pv_std_error
 
     def compute_cashflows(self):
         cashflows = []
@@ -165,9 +431,20 @@ class RangeAccrualSwapPricer:
         return pv
 
 
-    def price_range_accrual(self) -> float:
+    def price_range_accrual(self, streaming: bool = True) -> float:
         """
         Pricing complet d'un Range Accrual Swap (jambe range)
+
+        Les erreurs standard Monte Carlo sont disponibles ensuite dans
+        self.Ai_std_errors et self.pv_std_error ; self.report reprend la PV,
+        son erreur standard et le nombre de trajectoires réellement simulées
+        (arrondi en mode sobol / antithetic, voir n_simulated_paths).
+
+        :param streaming: simulation par blocs de dates (mémoire bornée) ;
+                          False garde la matrice complète des trajectoires.
+                          Le path_store n'est utilisé que sans streaming : le
+                          cache stocke la matrice complète, incompatible avec la
+                          borne mémoire (mêmes flux aléatoires, même prix)
         """
         # Dates de paiement
         self.payment_times = self.create_payment_times()
@@ -179,8 +456,13 @@ class RangeAccrualSwapPricer:
         obs_grid = sorted(
             {round(t,10) for period in self.observation_times for t in period}
         )
-        x_paths = self.simulate_x_paths(obs_grid)
-        self.Ai_list = self.Ai_computation_mc(obs_grid, x_paths)
+        if streaming:
+            fractions, mean_forwards = self.path_statistics_streaming(obs_grid)
+        else:
+            x_paths = self.simulate_x_paths(obs_grid)
+            fractions, mean_forwards = self.path_statistics_mc(obs_grid, x_paths)
+
+        self.Ai_list, self.Ai_std_errors, self.pv_std_error = self.estimate_Ai(obs_grid, fractions, mean_forwards)
 
         # Cashflows
         self.cashflows = self.compute_cashflows()
@@ -188,5 +470,12 @@ class RangeAccrualSwapPricer:
         # Actualisation OIS (Overnight Index Swap)
         pv = self.compute_present_value()
 
+        self.report = {
+            "pv": pv,
+            "pv_std_error": self.pv_std_error,
+            "sampling": self.sampling,
+            "n_paths_requested": self.n_paths,
+            "n_paths": self.n_simulated_paths(),
+        }
         return pv
     
\ No newline at end of file
@@ -1,5 +1,6 @@
 import numpy as np
 from core.curves import ZeroCouponCurve
+from core.monte_carlo import MonteCarloEngine
 
 class VolatilitySwapPricer:
     def __init__(
@@ -9,7 +10,10 @@ class VolatilitySwapPricer:
             maturity : float, 
             nb_obs : int, 
             discount_curve : ZeroCouponCurve, 
-            sigma_model : float = 0.20
+            sigma_model : float = 0.20,
+            n_paths : int = 1,
+            seed : int = 42,
+            mc_engine : MonteCarloEngine = None
     ):
         self.N = notional
         self.K = vol_strike
@@ -17,22 +21,32 @@ class VolatilitySwapPricer:
         self.n = nb_obs
         self.curve = discount_curve
         self.sigma = sigma_model
+        self.n_paths = n_paths
+        # générateur dédié (SeedSequence par paquet) au lieu de l'état global np.random
+        self.mc_engine = mc_engine if mc_engine is not None else MonteCarloEngine(seed=seed)
     
-    def simulate_log_returns(self) -> np.ndarray:
+    def simulate_log_returns(self, rng : np.random.Generator = None, n_paths : int = None) -> np.ndarray:
+        # n_paths=None : une seule trajectoire (vecteur de taille nb_obs)
+        if rng is None:
+            rng = np.random.default_rng(self.mc_engine.seed)
         dt = self.T/self.n
-        return np.random.normal(
+        size = self.n if n_paths is None else (n_paths, self.n)
+        return rng.normal(
             loc = 0.0,
             scale = self.sigma * np.sqrt(dt),
-            size = self.n
+            size = size
         )
     
     def realized_vol(self, returns : np.ndarray) -> float : 
-        realized_var = np.sum(returns**2)/self.T
+        realized_var = np.sum(returns**2, axis=-1)/self.T
         return np.sqrt(realized_var)
+
+    def _realized_vol_chunk(self, rng, n_paths):
+        return self.realized_vol(self.simulate_log_returns(rng, n_paths))
     
     def price(self):
-        returns = self.simulate_log_returns()
-        rv = self.realized_vol(returns)
+        # volatilité réalisée moyenne sur n_paths trajectoires
+        rv = float(self.mc_engine.run_concat(self._realized_vol_chunk, self.n_paths).mean())
 
         payoff = self.N * (rv - self.K)
 